@@ -0,0 +1,245 @@
+import argparse
+import numpy as np
+import pandas as pd
+from database.journal import TradeJournal, TRADE_JOURNAL_FILE
+
+DEFAULT_CAPITAL = 1000  # per-trade capital assumed when a legacy record doesn't reveal its size
+RECORD_COLUMNS = ["timestamp", "coin", "action", "price", "reason", "size", "entry", "fee"]
+TRADE_COLUMNS = ["coin", "mode", "entry_ts", "exit_ts", "entry", "exit", "size", "pnl", "fills"]
+
+# Reason strings written by trade_manager
+TRANCHE_PATTERN = r"entry \(\d/3\)"
+PROFIT_PATTERN = r"profit: \$(-?[\d,]+(?:\.\d+)?)"
+
+
+def records_frame(records):
+    """Journal records as columns; `ts` is the timestamp in epoch seconds"""
+    frame = pd.DataFrame.from_records(list(records), columns=RECORD_COLUMNS)
+    frame["price"] = frame["price"].astype(np.float64)
+    frame["size"] = frame["size"].astype(np.float64)
+    frame["entry"] = frame["entry"].astype(np.float64)
+    frame["fee"] = frame["fee"].astype(np.float64).fillna(0.0)
+    frame["ts"] = pd.to_datetime(frame["timestamp"], format="ISO8601").astype("int64") / 1e9
+    return frame
+
+
+def pair_trades(frame, capital=DEFAULT_CAPITAL):
+    """
+    Splits journal rows into closed trades and the rows of still-open
+    positions. Per coin, everything up to and including a sell is one trade.
+    Its entry is the size-weighted average of its fills: the aggressive
+    tranches when there are any, otherwise the buys. Sells that record their
+    size and entry are used as is. For older records the size is recovered
+    from the profit in the sell reason, which was computed from the first
+    fill, and the PnL is recomputed at the real average entry. Fees paid
+    on the paper exchange are deducted.
+    Returns (trades, open rows).
+    """
+    frame = frame.reset_index(drop=True)
+    sells = frame["action"].eq("sell")
+    by_coin = sells.groupby(frame["coin"])
+    position = by_coin.cumsum() - sells
+    closed = position < by_coin.transform("sum")
+    rows = frame[closed].assign(position=position[closed])
+    if rows.empty:
+        return pd.DataFrame(columns=TRADE_COLUMNS), frame[~closed]
+
+    keys = [rows["coin"], rows["position"]]
+    buys = rows["action"].eq("buy")
+    tranche = rows["reason"].str.contains(TRANCHE_PATTERN, regex=True, na=False)
+    # With tranches, the strategy's "Entry with ..." signal row is the first tranche again
+    fills = buys & (tranche | ~tranche.groupby(keys).transform("any"))
+    weight = rows["size"].fillna(1.0).where(fills, 0.0)
+    grouped = rows.assign(
+        weight=weight,
+        cost=weight * rows["price"],
+        first_fill=rows["price"].where(fills),
+        fill=fills,
+    ).groupby(["coin", "position"], sort=False)
+    entries = grouped.agg(
+        entry_ts=("ts", "min"),
+        weight=("weight", "sum"),
+        cost=("cost", "sum"),
+        first_fill=("first_fill", "first"),
+        fills=("fill", "sum"),
+        fees=("fee", "sum"),
+    )
+
+    exits = rows[rows["action"].eq("sell")].set_index(["coin", "position"])
+    trades = entries.join(exits[["ts", "price", "reason", "size", "entry"]], how="inner")
+    average = trades["cost"] / trades["weight"].where(trades["weight"] > 0)
+    entry = trades["entry"].fillna(average)
+
+    # Legacy sells: reported profit = (exit - first fill) * size
+    reported = trades["reason"].str.extract(PROFIT_PATTERN, expand=False).str.replace(",", "").astype(np.float64)
+    gap = trades["price"] - trades["first_fill"]
+    aggressive = trades["reason"].str.startswith("Aggressive")
+    fallback = capital / trades["first_fill"] * np.where(aggressive, trades["fills"] / 3, 1.0)
+    size = trades["size"].fillna((reported / gap.where(gap != 0)).fillna(fallback))
+
+    trades = pd.DataFrame({
+        "coin": trades.index.get_level_values("coin"),
+        "mode": np.where(aggressive, "aggressive", "default"),
+        "entry_ts": trades["entry_ts"].to_numpy(),
+        "exit_ts": trades["ts"].to_numpy(),
+        "entry": entry.to_numpy(),
+        "exit": trades["price"].to_numpy(),
+        "size": size.to_numpy(),
+        "pnl": ((trades["price"] - entry) * size - trades["fees"]).to_numpy(),
+        "fills": trades["fills"].to_numpy(),
+    })
+    # A sell without its buys (a truncated journal) can't be priced
+    trades = trades[trades["pnl"].notna()].sort_values("exit_ts", kind="stable", ignore_index=True)
+    return trades, frame[~closed]
+
+
+def covered_time(starts, ends):
+    """Length of the union of [start, end] intervals"""
+    if len(starts) == 0:
+        return 0.0
+    order = np.argsort(starts, kind="stable")
+    starts, ends = starts[order], ends[order]
+    reach = np.maximum.accumulate(ends)
+    before = np.concatenate(([-np.inf], reach[:-1]))
+    return float(np.maximum(0.0, reach - np.maximum(starts, before)).sum())
+
+
+class TradeAnalytics:
+    """
+    Realized PnL, win rate, drawdown and exposure over journal records.
+    `update(records)` pairs the new records with the positions still open,
+    so following a growing journal costs O(new records); running totals are
+    advanced with the new trades only.
+    """
+
+    def __init__(self, capital=DEFAULT_CAPITAL):
+        self.capital = float(capital)
+        self.count = 0
+        self.wins = 0
+        self.realized = 0.0
+        self.gross_profit = 0.0
+        self.gross_loss = 0.0
+        self.peak = self.capital
+        self.max_drawdown = 0.0
+        self.max_drawdown_pct = 0.0
+        self.first_ts = None
+        self.last_ts = None
+        self._open = records_frame([])
+        self._batches = []
+        self._trades = None
+
+    def update(self, records):
+        """Adds journal records; returns the number of trades they closed"""
+        new = records_frame(records)
+        if new.empty:
+            return 0
+        self.first_ts = new["ts"].min() if self.first_ts is None else min(self.first_ts, new["ts"].min())
+        self.last_ts = new["ts"].max() if self.last_ts is None else max(self.last_ts, new["ts"].max())
+        frame = new if self._open.empty else pd.concat([self._open, new], ignore_index=True)
+        closed, self._open = pair_trades(frame, self.capital)
+        if closed.empty:
+            return 0
+
+        pnl = closed["pnl"].to_numpy()
+        equity = self.capital + self.realized + np.cumsum(pnl)
+        peaks = np.maximum(self.peak, np.maximum.accumulate(equity))
+        self.max_drawdown = max(self.max_drawdown, float((peaks - equity).max()))
+        self.max_drawdown_pct = max(self.max_drawdown_pct, float(((peaks - equity) / peaks).max()))
+        self.peak = float(peaks[-1])
+        self.realized = float(equity[-1] - self.capital)
+        self.count += len(pnl)
+        self.wins += int((pnl > 0).sum())
+        self.gross_profit += float(pnl[pnl > 0].sum())
+        self.gross_loss -= float(pnl[pnl < 0].sum())
+        self._batches.append(closed)
+        self._trades = None
+        return len(closed)
+
+    @property
+    def trades(self):
+        """Every closed trade in exit order (see TRADE_COLUMNS)"""
+        if self._trades is None:
+            self._trades = pd.concat(self._batches, ignore_index=True) if self._batches else pd.DataFrame(columns=TRADE_COLUMNS)
+            self._batches = [self._trades]
+        return self._trades
+
+    def open_positions(self):
+        """{coin: entry timestamp} for coins with a position still open"""
+        buys = self._open[self._open["action"].eq("buy")]
+        return buys.groupby("coin")["ts"].min().to_dict()
+
+    def equity(self):
+        """(exit timestamps, equity after each closed trade)"""
+        trades = self.trades
+        return trades["exit_ts"].to_numpy(np.float64), self.capital + np.cumsum(trades["pnl"].to_numpy(np.float64))
+
+    def exposure(self):
+        """Share of the journal's time span with at least one position open"""
+        if self.first_ts is None or self.last_ts <= self.first_ts:
+            return 0.0
+        open_since = np.fromiter(self.open_positions().values(), dtype=np.float64)
+        starts = np.concatenate((self.trades["entry_ts"].to_numpy(np.float64), open_since))
+        ends = np.concatenate((self.trades["exit_ts"].to_numpy(np.float64), np.full(len(open_since), self.last_ts)))
+        return covered_time(starts, ends) / (self.last_ts - self.first_ts)
+
+    def summary(self):
+        holding = (self.trades["exit_ts"] - self.trades["entry_ts"]).to_numpy(np.float64)
+        return {
+            "trades": self.count,
+            "realized_pnl": round(self.realized, 2),
+            "win_rate": round(self.wins / self.count, 4) if self.count else 0.0,
+            "avg_win": round(self.gross_profit / self.wins, 2) if self.wins else 0.0,
+            "avg_loss": round(-self.gross_loss / (self.count - self.wins), 2) if self.count > self.wins else 0.0,
+            "profit_factor": round(self.gross_profit / self.gross_loss, 2) if self.gross_loss else None,
+            "max_drawdown": round(self.max_drawdown, 2),
+            "max_drawdown_pct": round(self.max_drawdown_pct, 4),
+            "exposure": round(self.exposure(), 4),
+            "avg_holding_seconds": round(float(holding.mean()), 1) if len(holding) else 0.0,
+            "open_positions": len(self.open_positions()),
+        }
+
+    def by_coin(self):
+        """Per-coin trades, realized PnL, win rate and average PnL"""
+        trades = self.trades
+        if trades.empty:
+            return pd.DataFrame(columns=["trades", "pnl", "win_rate", "avg_pnl"])
+        return trades.assign(win=trades["pnl"] > 0).groupby("coin").agg(
+            trades=("pnl", "size"),
+            pnl=("pnl", "sum"),
+            win_rate=("win", "mean"),
+            avg_pnl=("pnl", "mean"),
+        ).sort_values("pnl", ascending=False)
+
+
+def analyze(path=TRADE_JOURNAL_FILE, capital=DEFAULT_CAPITAL, coin=None):
+    """Reads a trade journal into a TradeAnalytics, optionally for one coin only"""
+    analytics = TradeAnalytics(capital)
+    offset = 0
+    journal = TradeJournal(path)
+    while True:
+        records, offset = journal.read_from(offset, limit=100_000)
+        if not records:
+            return analytics
+        if coin is not None:
+            records = [record for record in records if record.get("coin") == coin]
+        analytics.update(records)
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Report realized performance from the trade journal")
+    parser.add_argument("journal", nargs="?", default=TRADE_JOURNAL_FILE)
+    parser.add_argument("--capital", type=float, default=DEFAULT_CAPITAL,
+                        help="Capital per trade, used when an old record doesn't reveal its size")
+    parser.add_argument("--coin", help="Only this coin's trades")
+    parser.add_argument("--trades-out", help="Write the paired trades to this CSV file")
+    args = parser.parse_args()
+
+    analytics = analyze(args.journal, args.capital, args.coin)
+    for key, value in analytics.summary().items():
+        print(f"{key}: {value}")
+    by_coin = analytics.by_coin()
+    if len(by_coin) > 1:
+        print()
+        print(by_coin.round(4).to_string())
+    if args.trades_out:
+        analytics.trades.to_csv(args.trades_out, index=False)
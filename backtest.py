@@ -0,0 +1,302 @@
+import argparse
+import contextlib
+import datetime
+import os
+import numpy as np
+from database.ledger import SignalLedger
+from database.window import MarketWindow
+from database.candles import CandleAggregator
+from operation.volatility import IndicatorSet
+from engine import next_deadline
+from exchange import PaperExchange, SPREAD, FEE, SLIPPAGE, LATENCY
+from main import CoinState, WINDOW_SIZE, COLLECT_INTERVAL, TRADE_INTERVAL
+from operation.strategy import TradingStrategy, BUY_SIGNAL, MOMENTUM_THRESHOLD
+from telemetry import configure_logging, quiet_logs
+from trade_manager import open_trade, monitor_interval
+
+DAY = 24 * 60 * 60
+
+
+def load_ticks(path, coin=None):
+    """
+    Loads a historical tick file into (ts, price, change24h) float arrays sorted by time.
+
+    CSV and Parquet files need `ts` (unix seconds or ISO timestamps) and
+    `price` columns, plus optional `change24h` and `coin` columns (rows are
+    filtered by `coin` when both are present). .npz files hold `ts`, `price`
+    and optionally `change24h` arrays; .npy files hold an (n, 2) or (n, 3)
+    array with the same column order. A missing 24h change is derived from
+    the price 24 hours earlier.
+    """
+    extension = os.path.splitext(path)[1].lower()
+    changes = None
+    if extension in (".csv", ".parquet"):
+        import pandas as pd
+        frame = pd.read_csv(path) if extension == ".csv" else pd.read_parquet(path)
+        if coin is not None and "coin" in frame.columns:
+            frame = frame[frame["coin"] == coin]
+        ts_column = "ts" if "ts" in frame.columns else "timestamp"
+        ts = frame[ts_column]
+        if not np.issubdtype(ts.dtype, np.number):
+            ts = pd.to_datetime(ts).map(lambda value: value.timestamp())
+        ts = ts.to_numpy(dtype=np.float64)
+        prices = frame["price"].to_numpy(dtype=np.float64)
+        if "change24h" in frame.columns:
+            changes = frame["change24h"].to_numpy(dtype=np.float64)
+    elif extension == ".npz":
+        data = np.load(path)
+        ts = data["ts"].astype(np.float64)
+        prices = data["price"].astype(np.float64)
+        if "change24h" in data:
+            changes = data["change24h"].astype(np.float64)
+    elif extension == ".npy":
+        data = np.load(path).astype(np.float64)
+        ts, prices = data[:, 0], data[:, 1]
+        if data.shape[1] > 2:
+            changes = data[:, 2]
+    else:
+        raise ValueError(f"Unsupported tick file format: {path}")
+
+    order = np.argsort(ts, kind="stable")
+    ts, prices = ts[order], prices[order]
+    changes = changes[order] if changes is not None else changes_from_prices(ts, prices)
+    return ts, prices, changes
+
+
+def changes_from_prices(ts, prices):
+    """24h percentage change per tick, measured against the last tick at least a day older"""
+    previous = np.searchsorted(ts, ts - DAY, side="right") - 1
+    reference = prices[np.maximum(previous, 0)]
+    return (prices / reference - 1) * 100
+
+
+class TickReplay:
+    """
+    Simulated clock and price source. `seek` moves the clock forward and the
+    quote is the latest tick at or before it, like a live poll would return.
+    """
+
+    def __init__(self, coin, ts, prices, changes):
+        self.coin = coin
+        self.ts = ts
+        self.prices = prices
+        self.changes = changes
+        self.index = 0
+        self.time = float(ts[0])
+
+    def seek(self, t):
+        self.time = t
+        last = len(self.ts) - 1
+        while self.index < last and self.ts[self.index + 1] <= t:
+            self.index += 1
+
+    def now(self):
+        return datetime.datetime.fromtimestamp(self.time)
+
+    def getPrice(self, coin, priority=None):
+        return float(self.prices[self.index])
+
+    def changesof24h(self, coin, priority=None):
+        return float(self.changes[self.index])
+
+    def getQuote(self, coin, priority=None):
+        return self.getPrice(coin), self.changesof24h(coin)
+
+    def price_at(self, coin, t):
+        """The quote at any time `t`, without moving the clock"""
+        return float(self.prices[max(int(np.searchsorted(self.ts, t, side="right")) - 1, 0)])
+
+
+class BacktestResult:
+    def __init__(self, trades, equity_ts, equity, total_money, open_trade=None):
+        self.trades = trades
+        self.equity_ts = np.asarray(equity_ts, dtype=np.float64)
+        self.equity = np.asarray(equity, dtype=np.float64)
+        self.total_money = total_money
+        self.open_trade = open_trade
+
+    def summary(self):
+        equity = self.equity if len(self.equity) else np.array([self.total_money])
+        peaks = np.maximum.accumulate(equity)
+        return {
+            "pnl": float(equity[-1] - self.total_money),
+            "final_equity": float(equity[-1]),
+            "max_drawdown": float(((peaks - equity) / peaks).max()),
+            "trades": sum(1 for trade in self.trades if trade["action"] == "sell"),
+            "open_position": self.open_trade is not None,
+        }
+
+    def save(self, trades_path=None, equity_path=None):
+        import pandas as pd
+        if trades_path:
+            pd.DataFrame(self.trades, columns=["timestamp", "coin", "action", "price", "reason", "size", "entry", "fee"]).to_csv(trades_path, index=False)
+        if equity_path:
+            pd.DataFrame({"ts": self.equity_ts, "equity": self.equity}).to_csv(equity_path, index=False)
+
+
+class Backtest:
+    """
+    Replays historical ticks through TradingStrategy and the trade objects
+    from trade_manager on the same schedule TradingBot.run_market follows
+    live: warm-up points every COLLECT_INTERVAL, signal checks every
+    TRADE_INTERVAL, open trades checked at trade_manager.monitor_interval and a
+    `window_size` cool-down after each trade. Every quote read is folded into
+    candles, as live, for `average_timeframe` and the `indicators`. With
+    `execution` (PaperExchange options such as spread, fee, slippage and
+    latency), orders fill on a simulated exchange instead of at the checked
+    price. Nothing touches the network, the database or the trade journal.
+    """
+
+    def __init__(self, ts, prices, changes, coin="bitcoin", total_money=1000, risk_percentage=2,
+                 mode="default", target_profit=1, window_size=WINDOW_SIZE, momentum_threshold=MOMENTUM_THRESHOLD,
+                 average_timeframe=None, indicators=(), execution=None):
+        self.coin = coin
+        self.total_money = float(total_money)
+        self.mode = mode.lower()
+        self.target_profit = float(target_profit)
+        self.window_size = int(window_size)
+        self.replay = TickReplay(coin, ts, prices, changes)
+        self.window = MarketWindow(coin, self.window_size)
+        self.candles = CandleAggregator(coin)
+        self.indicators = IndicatorSet(indicators)
+        self.exchange = None if execution is None else PaperExchange(
+            clock=lambda: self.replay.time, prices=self.replay.price_at, **execution)
+        self.trades = []
+        self.strategy = TradingStrategy(
+            total_money=total_money,
+            risk_percentage=risk_percentage,
+            mode=mode,
+            target_profit=target_profit,
+            ledger=SignalLedger(clock=self.replay.now, persist=False),
+            source=self.replay,
+            recorder=self.record_trade,
+            windows={coin: self.window},
+            reset=False,
+            momentum_threshold=momentum_threshold,
+            candles={coin: self.candles},
+            average_timeframe=average_timeframe,
+            indicators=indicators,
+            indicator_sets={coin: self.indicators}
+        )
+
+    def fold_price(self, t, price):
+        for timeframe, candle in self.candles.add(t, price):
+            if timeframe == self.strategy.indicator_timeframe:
+                self.indicators.update_candle(candle)
+
+    def record_trade(self, coin, action, price, reason, **fields):
+        self.trades.append({
+            "timestamp": self.replay.now().isoformat(),
+            "coin": coin,
+            "action": action,
+            "price": price,
+            "reason": reason,
+            **fields
+        })
+
+    def run(self, verbose=False):
+        with contextlib.nullcontext() if verbose else quiet_logs():
+            return self._run()
+
+    def _run(self):
+        replay, coin = self.replay, self.coin
+        end = float(replay.ts[-1])
+        epoch = t = float(replay.ts[0])
+        state = CoinState(coin, self.window_size)
+        realized = 0.0
+        trade = None
+        equity_ts, equity = [], []
+        last_deadline = None
+
+        while t <= end:
+            replay.seek(t)
+            state.price, state.changes24 = replay.getQuote(coin)
+            self.fold_price(t, state.price)
+
+            if state.ready:
+                signal, level = self.strategy.momentum_based_entry_signal(coin, 1)
+                if signal == BUY_SIGNAL:
+                    trade = open_trade(coin, replay.getPrice(coin), self.total_money, self.mode,
+                                       self.target_profit, self.record_trade, self.exchange)
+                    monitor_deadline = None
+                    while True:
+                        price = replay.getPrice(coin)
+                        self.fold_price(t, price)
+                        if trade.update(price):
+                            realized += trade.profit
+                            trade = None
+                            state.pending = self.window_size
+                            break
+                        equity_ts.append(t)
+                        equity.append(self.total_money + realized + trade.unrealized(price))
+                        interval = monitor_interval(trade, price)
+                        deadline = next_deadline(t, interval, epoch)
+                        if monitor_deadline is not None and deadline <= monitor_deadline:
+                            deadline = monitor_deadline + interval
+                        monitor_deadline = deadline
+                        if deadline > end:
+                            break
+                        t = deadline
+                        replay.seek(t)
+                    if trade is not None:
+                        break  # data ended with the trade still open
+            else:
+                self.window.append(state.price, state.changes24)
+                state.pending -= 1
+                if state.warming_up and state.ready:
+                    state.warming_up = False
+
+            equity_ts.append(t)
+            equity.append(self.total_money + realized)
+
+            interval = COLLECT_INTERVAL if state.warming_up else TRADE_INTERVAL
+            deadline = next_deadline(t, interval, epoch)
+            if last_deadline is not None and deadline <= last_deadline:
+                deadline = last_deadline + interval
+            last_deadline = t = deadline
+
+        return BacktestResult(self.trades, equity_ts, equity, self.total_money, trade)
+
+
+def run_backtest(path, coin="bitcoin", total_money=1000, risk_percentage=2, mode="default", target_profit=1,
+                 window_size=WINDOW_SIZE, momentum_threshold=MOMENTUM_THRESHOLD, verbose=False, average_timeframe=None,
+                 indicators=(), execution=None):
+    ts, prices, changes = load_ticks(path, coin)
+    backtest = Backtest(ts, prices, changes, coin, total_money, risk_percentage, mode, target_profit,
+                        window_size, momentum_threshold, average_timeframe, indicators, execution)
+    return backtest.run(verbose)
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Replay historical ticks through the trading strategy")
+    parser.add_argument("ticks", help="Tick file (.csv, .parquet, .npz or .npy)")
+    parser.add_argument("--coin", default="bitcoin")
+    parser.add_argument("--mode", default="default", choices=["default", "aggressive"])
+    parser.add_argument("--money", type=float, default=1000)
+    parser.add_argument("--risk", type=float, default=2)
+    parser.add_argument("--target-profit", type=float, default=1)
+    parser.add_argument("--window", type=int, default=WINDOW_SIZE, help="Price points in the rolling window")
+    parser.add_argument("--momentum", type=float, default=MOMENTUM_THRESHOLD, help="Minimum 24h change (%%) to consider a buy")
+    parser.add_argument("--average-timeframe", choices=["1m", "5m", "1h"],
+                        help="Average candle closes of this timeframe in the trend filter instead of the raw window")
+    parser.add_argument("--paper", action="store_true",
+                        help="Fill orders on the simulated exchange (exchange.py) instead of at the checked price")
+    parser.add_argument("--spread", type=float, default=SPREAD, help="Bid/ask spread (%%) with --paper")
+    parser.add_argument("--fee", type=float, default=FEE, help="Fee per fill (%% of notional) with --paper")
+    parser.add_argument("--slippage", type=float, default=SLIPPAGE, help="Market order slippage (%%) with --paper")
+    parser.add_argument("--latency", type=float, default=LATENCY, help="Order latency (seconds) with --paper")
+    parser.add_argument("--trades-out", help="Write the trade list to this CSV file")
+    parser.add_argument("--equity-out", help="Write the equity curve to this CSV file")
+    parser.add_argument("--verbose", action="store_true", help="Show the strategy's output")
+    args = parser.parse_args()
+    configure_logging(level="DEBUG" if args.verbose else "WARNING")
+
+    execution = None
+    if args.paper:
+        execution = {"spread": args.spread, "fee": args.fee, "slippage": args.slippage, "latency": args.latency}
+    result = run_backtest(args.ticks, args.coin, args.money, args.risk, args.mode, args.target_profit,
+                          args.window, args.momentum, args.verbose, args.average_timeframe,
+                          execution=execution)
+    result.save(args.trades_out, args.equity_out)
+    for key, value in result.summary().items():
+        print(f"{key}: {value}")
@@ -0,0 +1,250 @@
+import argparse
+import gc
+import json
+import os
+import platform
+import random
+import sys
+import tempfile
+import time
+import tracemalloc
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from market import MarketDataSource
+from telemetry import quiet_logs
+
+BASELINE_FILE = os.path.join(os.path.dirname(os.path.abspath(__file__)), "baseline.json")
+MARKET_COUNTS = (1, 10, 100)
+HISTORY_SIZES = (1000, 10000, 100000)
+TOLERANCE = 0.25  # fractional slowdown against the baseline reported as a regression
+NOISE_FLOOR_US = 10.0  # absolute slowdown below which a change is scheduling noise, not a regression
+REPEATS = 3  # runs of every benchmark; each latency keeps its fastest run
+
+
+class SyntheticSource(MarketDataSource):
+    """Offline random-walk quotes; every fetch moves each coin one step"""
+
+    def __init__(self, seed=1):
+        super().__init__(ttl=0)
+        self.rng = random.Random(seed)
+        self.prices = {}
+
+    def fetchQuotes(self, coins):
+        quotes = {}
+        for coin in coins:
+            price = self.prices.get(coin, 100.0) * (1 + self.rng.gauss(0.0002, 0.002))
+            self.prices[coin] = price
+            quotes[coin] = (price, self.rng.gauss(1.0, 1.5))
+        return quotes
+
+
+def percentiles(samples):
+    samples = sorted(samples)
+    pick = lambda q: samples[min(len(samples) - 1, int(q * len(samples)))]
+    return {"p50_us": pick(0.50) * 1e6, "p99_us": pick(0.99) * 1e6, "mean_us": sum(samples) / len(samples) * 1e6}
+
+
+def bench_markets(markets, ticks, seed=1):
+    """
+    Runs `ticks` bot ticks over `markets` coins with full windows: one batched
+    fetch, then persist and the entry-signal chain for every coin.
+    """
+    from database.db import initialize_database, close_database, record_tick
+    from database.window import get_window, clear_windows
+    from main import WINDOW_SIZE
+    from operation.getReady import makeReadyAll
+    from operation.strategy import TradingStrategy
+
+    source = SyntheticSource(seed)
+    coins = [f"coin-{index}" for index in range(markets)]
+    initialize_database()
+    clear_windows()
+    strategy = TradingStrategy(source=source, reset=False)
+    for coin in coins:
+        window = get_window(coin, WINDOW_SIZE)
+        for _ in range(WINDOW_SIZE):
+            window.append(100.0, 1.0)
+
+    timings = {"fetch": [], "persist": [], "signal": [], "tick": []}
+    clock = time.perf_counter
+    for _ in range(ticks):
+        tick_start = clock()
+        quotes = makeReadyAll(coins, source)
+        fetched = clock()
+        timings["fetch"].append(fetched - tick_start)
+        for coin in coins:
+            price, change = quotes[coin]
+            start = clock()
+            get_window(coin).append(price, change)
+            record_tick(coin, price, change)
+            persisted = clock()
+            strategy.momentum_based_entry_signal(coin, 1)
+            timings["persist"].append(persisted - start)
+            timings["signal"].append(clock() - persisted)
+        timings["tick"].append(clock() - tick_start)
+    close_database()
+
+    result = {stage: percentiles(samples) for stage, samples in timings.items()}
+    result["ticks_per_sec"] = len(timings["tick"]) / sum(timings["tick"])
+    return result
+
+
+def measure_memory(func, *args):
+    gc.collect()
+    tracemalloc.start()
+    try:
+        func(*args)
+        _, peak = tracemalloc.get_traced_memory()
+    finally:
+        tracemalloc.stop()
+    return peak / 1024
+
+
+def bench_history(trades, samples=500):
+    """record_trade, full history stream and daily-limit lookup with `trades` already journaled"""
+    from database.db import journal, record_trade, iter_trade_history, initialize_database, close_database
+    from database.ledger import SignalLedger
+
+    journal.close()
+    with open(journal.path, "w") as file:
+        line = json.dumps({"timestamp": "2024-01-01T00:00:00", "coin": "bitcoin", "action": "buy",
+                           "price": 100.0, "reason": "Entry with default mode"}, separators=(",", ":"))
+        file.write((line + "\n") * trades)
+
+    initialize_database()
+    ledger = SignalLedger()
+    record, count = [], []
+    for _ in range(samples):
+        start = time.perf_counter()
+        record_trade("bitcoin", "sell", 101.0, "Default mode profit: $1.00")
+        record.append(time.perf_counter() - start)
+        start = time.perf_counter()
+        ledger.count("bitcoin", "reject")
+        count.append(time.perf_counter() - start)
+
+    start = time.perf_counter()
+    streamed = sum(1 for _ in iter_trade_history())
+    stream_seconds = time.perf_counter() - start
+    close_database()
+    journal.close()
+    return {
+        "record_trade": percentiles(record),
+        "daily_limit_check": percentiles(count),
+        "stream_history_ms": stream_seconds * 1000,
+        "streamed_trades": streamed,
+    }
+
+
+def fastest(runs):
+    """Merges repeated results, keeping the lowest latency and the highest throughput of each metric"""
+    merged = {}
+    for key, value in runs[0].items():
+        if isinstance(value, dict):
+            merged[key] = fastest([run[key] for run in runs])
+        elif key == "ticks_per_sec":
+            merged[key] = max(run[key] for run in runs)
+        elif isinstance(value, (int, float)):
+            merged[key] = min(run[key] for run in runs)
+        else:
+            merged[key] = value
+    return merged
+
+
+def run(ticks, quick=False, repeats=REPEATS):
+    results = {
+        "python": platform.python_version(),
+        "machine": platform.machine(),
+        "markets": {},
+        "history": {},
+    }
+    market_counts = MARKET_COUNTS[:2] if quick else MARKET_COUNTS
+    history_sizes = HISTORY_SIZES[:2] if quick else HISTORY_SIZES
+    for markets in market_counts:
+        # Fewer ticks for many markets keeps the sample count per stage comparable
+        tick_count = max(20, ticks // markets)
+        result = fastest([bench_markets(markets, tick_count) for _ in range(repeats)])
+        result["memory_kb"] = measure_memory(bench_markets, markets, 20)
+        results["markets"][str(markets)] = result
+    for trades in history_sizes:
+        results["history"][str(trades)] = fastest([bench_history(trades) for _ in range(repeats)])
+    return results
+
+
+def report(results):
+    print(f"{'markets':>8} {'stage':<8} {'p50 µs':>10} {'p99 µs':>10}")
+    for markets, result in results["markets"].items():
+        for stage in ("fetch", "persist", "signal", "tick"):
+            print(f"{markets:>8} {stage:<8} {result[stage]['p50_us']:>10.1f} {result[stage]['p99_us']:>10.1f}")
+        print(f"{markets:>8} {'':<8} {result['ticks_per_sec']:>10.1f} ticks/s {result['memory_kb']:>8.0f} KB peak")
+    print()
+    print(f"{'trades':>8} {'record p50/p99 µs':>20} {'limit check p50 µs':>20} {'stream ms':>10}")
+    for trades, result in results["history"].items():
+        print(f"{trades:>8} {result['record_trade']['p50_us']:>9.1f}/{result['record_trade']['p99_us']:<10.1f}"
+              f"{result['daily_limit_check']['p50_us']:>20.2f} {result['stream_history_ms']:>10.1f}")
+
+
+def latency_metrics(results, keys=("p50_us", "p99_us")):
+    """Flattens the latency percentiles in `keys` into {name: microseconds}"""
+    metrics = {}
+    for group in ("markets", "history"):
+        for size, result in results[group].items():
+            for stage, values in result.items():
+                if isinstance(values, dict):
+                    for key in keys:
+                        metrics[f"{group}[{size}].{stage}.{key}"] = values[key]
+    return metrics
+
+
+def compare(results, baseline, tolerance=TOLERANCE, noise_floor=NOISE_FLOOR_US):
+    """
+    Returns the p50 latencies that got slower than the baseline by more than
+    `tolerance` and by more than `noise_floor` µs. p99s of microsecond stages
+    swing well past any useful tolerance between identical runs, so they are
+    reported but not compared.
+    """
+    current, previous = latency_metrics(results, ("p50_us",)), latency_metrics(baseline, ("p50_us",))
+    regressions = []
+    for name, value in current.items():
+        reference = previous.get(name)
+        if reference and value > reference * (1 + tolerance) and value - reference > noise_floor:
+            regressions.append((name, reference, value))
+    return regressions
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Tick-to-decision latency and storage cost benchmarks")
+    parser.add_argument("--ticks", type=int, default=2000, help="Ticks for the 1-market run (scaled down for more markets)")
+    parser.add_argument("--quick", action="store_true", help="Skip the 100-market and 100k-trade runs")
+    parser.add_argument("--repeats", type=int, default=REPEATS, help="Runs per benchmark; the fastest of each latency is kept")
+    parser.add_argument("--save", action="store_true", help=f"Save results as the baseline ({BASELINE_FILE})")
+    parser.add_argument("--compare", action="store_true", help="Compare against the saved baseline; exit 1 on regressions")
+    parser.add_argument("--tolerance", type=float, default=TOLERANCE)
+    parser.add_argument("--noise-floor", type=float, default=NOISE_FLOOR_US, help="Slowdowns under this many µs are ignored")
+    parser.add_argument("--output", help="Also write the results to this JSON file")
+    args = parser.parse_args()
+
+    with tempfile.TemporaryDirectory() as workdir:
+        cwd = os.getcwd()
+        os.chdir(workdir)  # the database and journal are created relative to the working directory
+        try:
+            with quiet_logs():
+                results = run(args.ticks, args.quick, args.repeats)
+        finally:
+            os.chdir(cwd)
+
+    report(results)
+    if args.output:
+        with open(args.output, "w") as file:
+            json.dump(results, file, indent=2)
+    if args.save:
+        with open(BASELINE_FILE, "w") as file:
+            json.dump(results, file, indent=2)
+        print(f"\n💾 Baseline saved to {BASELINE_FILE}")
+    if args.compare:
+        with open(BASELINE_FILE) as file:
+            regressions = compare(results, json.load(file), args.tolerance, args.noise_floor)
+        for name, reference, value in regressions:
+            print(f"🐢 {name}: {reference:.1f} µs -> {value:.1f} µs")
+        print(f"\n{'❌' if regressions else '✅'} {len(regressions)} regressions beyond {args.tolerance:.0%}")
+        sys.exit(1 if regressions else 0)
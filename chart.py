@@ -0,0 +1,86 @@
+import numpy as np
+
+CHART_BUCKETS = 2048  # buckets a PriceSeries keeps, whatever the number of ticks
+
+
+class PriceSeries:
+    """
+    A coin's prices for the live chart, in at most `capacity` buckets. Each
+    bucket keeps the lowest and highest tick it covers, with their times.
+    When the buckets run out, neighbours are merged pairwise and each new
+    bucket covers twice as many ticks. Appends are amortized O(1), and
+    memory and drawing cost stay bounded however long the bot runs.
+    """
+
+    def __init__(self, capacity=CHART_BUCKETS):
+        self.capacity = capacity - capacity % 2
+        self.span = 1  # ticks per bucket
+        self.ticks = 0
+        self.last = None  # (ts, price) of the newest tick
+        self._buckets = np.empty((self.capacity, 4), dtype=np.float64)  # t_low, low, t_high, high
+        self._counts = np.zeros(self.capacity, dtype=np.int64)
+        self._size = 0
+
+    def __len__(self):
+        return self._size
+
+    def append(self, ts, price):
+        self.ticks += 1
+        self.last = (ts, price)
+        if self._size and self._counts[self._size - 1] < self.span:
+            bucket = self._buckets[self._size - 1]
+            if price < bucket[1]:
+                bucket[0], bucket[1] = ts, price
+            if price > bucket[3]:
+                bucket[2], bucket[3] = ts, price
+            self._counts[self._size - 1] += 1
+            return
+        if self._size == self.capacity:
+            self._merge()
+        self._buckets[self._size] = (ts, price, ts, price)
+        self._counts[self._size] = 1
+        self._size += 1
+
+    def _merge(self):
+        left, right = self._buckets[0::2], self._buckets[1::2]
+        low = np.where(right[:, 1] < left[:, 1], right[:, 0], left[:, 0]), np.minimum(left[:, 1], right[:, 1])
+        high = np.where(right[:, 3] > left[:, 3], right[:, 2], left[:, 2]), np.maximum(left[:, 3], right[:, 3])
+        half = self.capacity // 2
+        self._buckets[:half] = np.column_stack((low[0], low[1], high[0], high[1]))
+        self._counts[:half] = self._counts[0::2] + self._counts[1::2]
+        self._counts[half:] = 0
+        self._size = half
+        self.span *= 2
+
+    def points(self):
+        """(times, prices): every bucket's low and high in time order"""
+        buckets = self._buckets[:self._size]
+        low_first = buckets[:, 0] <= buckets[:, 2]
+        times = np.where(low_first[:, None], buckets[:, [0, 2]], buckets[:, [2, 0]]).ravel()
+        prices = np.where(low_first[:, None], buckets[:, [1, 3]], buckets[:, [3, 1]]).ravel()
+        return times, prices
+
+
+def lttb(x, y, threshold):
+    """
+    Largest-Triangle-Three-Buckets: picks `threshold` of the points that
+    keep the line's visual shape, in O(len(x)). Returns (x, y).
+    """
+    n = len(x)
+    if threshold >= n or threshold < 3:
+        return x, y
+    every = (n - 2) / (threshold - 2)
+    keep = np.empty(threshold, dtype=np.int64)
+    keep[0], keep[-1] = 0, n - 1
+    a = 0
+    for i in range(threshold - 2):
+        start, end = int(i * every) + 1, int((i + 1) * every) + 1
+        next_end = min(int((i + 2) * every) + 1, n)
+        if end >= next_end:
+            average_x, average_y = x[n - 1], y[n - 1]
+        else:
+            average_x, average_y = x[end:next_end].mean(), y[end:next_end].mean()
+        areas = np.abs((x[a] - average_x) * (y[start:end] - y[a]) - (x[a] - x[start:end]) * (average_y - y[a]))
+        a = start + int(np.argmax(areas))
+        keep[i + 1] = a
+    return x[keep], y[keep]
@@ -0,0 +1,401 @@
+"""
+Shards the watched coins across worker processes so strategy and trade
+management for many markets use more than one core:
+
+    python -m daemon --coins bitcoin,ethereum,solana,dogecoin --workers 2
+
+The supervisor process fetches every coin's quote with one batched request
+and writes it into shared-memory ring buffers, which the workers read, so
+nothing is pickled per tick. Workers send trades and checkpoints back over
+one queue, and the supervisor is the only process writing the trade journal
+and the snapshot file. A worker that exits is restarted from its last
+checkpoint; one that keeps crashing is retired and its coins move to the
+least loaded workers.
+"""
+import asyncio
+import multiprocessing
+import os
+import queue
+import signal
+import threading
+import time
+from collections import deque
+from multiprocessing import shared_memory
+import numpy as np
+from database.db import record_trade
+from database.snapshot import save_snapshot, load_snapshot
+from engine import next_deadline
+from feed import PriceFeed
+from main import TradingBot, normalize_coins
+from market import MarketDataSource, CoinGeckoSource, PRIORITY_POSITION
+from telemetry import configure_logging, flush_logs, get_logger, metrics, LOG_LEVEL, LOG_FORMAT
+
+FETCH_INTERVAL = 5  # seconds between batched quote fetches for all coins
+QUOTE_SLOTS = 64  # quotes kept per coin in the shared ring buffers
+QUOTE_MAX_AGE = 30  # seconds before a shared quote counts as missing
+FEED_CHECK_INTERVAL = 0.1  # seconds between worker checks for new shared quotes
+SUPERVISE_INTERVAL = 1.0  # seconds between worker liveness checks
+STOP_TIMEOUT = 15  # seconds a worker gets to checkpoint and exit before it is killed
+MAX_RESTARTS = 3  # restarts allowed within RESTART_WINDOW before a worker is retired
+RESTART_WINDOW = 300
+
+log = get_logger("cluster")
+
+
+class SharedQuotes:
+    """
+    Per-coin ring buffers of (timestamp, price, 24h change) quotes in one
+    shared-memory block, written by a single process and read by any number.
+    A coin's write counter is bumped after its slot is filled, so readers
+    take the newest quote without locks; the ring only has to be long enough
+    that the writer can't lap a slot while it is being copied.
+    `SharedQuotes(coins)` creates the block, `SharedQuotes(coins, name)`
+    attaches to it.
+    """
+
+    def __init__(self, coins, name=None, slots=QUOTE_SLOTS):
+        self.coins = list(coins)
+        self.index = {coin: i for i, coin in enumerate(self.coins)}
+        self.slots = slots
+        self.owner = name is None
+        counts_size = len(self.coins) * 8
+        size = counts_size + len(self.coins) * slots * 3 * 8
+        self.memory = shared_memory.SharedMemory(name=name, create=self.owner, size=size if self.owner else 0)
+        self.counts = np.ndarray((len(self.coins),), dtype=np.int64, buffer=self.memory.buf)
+        self.quotes = np.ndarray((len(self.coins), slots, 3), dtype=np.float64, buffer=self.memory.buf, offset=counts_size)
+        if self.owner:
+            self.counts[:] = 0
+
+    @property
+    def name(self):
+        return self.memory.name
+
+    def write(self, quotes, ts=None):
+        """Appends {coin: (price, 24h change)} to the coins' rings"""
+        ts = time.time() if ts is None else ts
+        for coin, (price, change24h) in quotes.items():
+            i = self.index.get(coin)
+            if i is None:
+                continue
+            count = int(self.counts[i])
+            self.quotes[i, count % self.slots] = (ts, price, change24h)
+            self.counts[i] = count + 1
+
+    def count(self, coin):
+        """Quotes written for the coin so far; changes whenever a new one lands"""
+        return int(self.counts[self.index[coin]])
+
+    def latest(self, coin):
+        """The coin's newest (timestamp, price, 24h change), or None before the first"""
+        i = self.index[coin]
+        while True:
+            count = int(self.counts[i])
+            if count == 0:
+                return None
+            ts, price, change24h = self.quotes[i, (count - 1) % self.slots]
+            if int(self.counts[i]) - count < self.slots - 1:
+                return float(ts), float(price), float(change24h)
+
+    def close(self):
+        self.counts = self.quotes = None  # views must go before the block is closed
+        self.memory.close()
+        if self.owner:
+            self.memory.unlink()
+
+
+class SharedQuoteSource(MarketDataSource):
+    """Quotes read from SharedQuotes; quotes older than `max_age` seconds count as missing"""
+
+    def __init__(self, shared, max_age=QUOTE_MAX_AGE):
+        super().__init__(ttl=0)
+        self.shared = shared
+        self.max_age = max_age
+
+    def fetchQuotes(self, coins):
+        now = time.time()
+        quotes = {}
+        for coin in coins:
+            quote = self.shared.latest(coin) if coin in self.shared.index else None
+            if quote is not None and now - quote[0] <= self.max_age:
+                quotes[coin] = quote[1:]
+        return quotes
+
+
+class SharedQuoteFeed(PriceFeed):
+    """Publishes every quote the supervisor writes to the shared buffers"""
+
+    def __init__(self, source, check_interval=FEED_CHECK_INTERVAL):
+        super().__init__(self.fetch_price)
+        self.source = source
+        self.check_interval = check_interval
+
+    async def fetch_price(self, coin):
+        return self.source.getPrice(coin)
+
+    async def stream(self):
+        shared = self.source.shared
+        seen = {coin: shared.count(coin) for coin in shared.coins}
+        self.set_connected(True)
+        try:
+            while True:
+                await asyncio.sleep(self.check_interval)
+                for coin, count in seen.items():
+                    latest = shared.count(coin)
+                    if latest != count:
+                        seen[coin] = latest
+                        self.publish(coin, shared.latest(coin)[1])
+        finally:
+            self.set_connected(False)
+
+
+def run_worker(index, coins, quotes_name, quote_coins, options, snapshot, events, logging_options):
+    """Worker process: runs a TradingBot for its coins on the shared quotes until SIGTERM"""
+    signal.signal(signal.SIGINT, signal.SIG_IGN)  # Ctrl+C reaches the supervisor, which stops the workers
+    configure_logging(*logging_options)
+    shared = SharedQuotes(quote_coins, quotes_name)
+    source = SharedQuoteSource(shared)
+    bot = TradingBot(
+        coins=coins,
+        source=source,
+        feed=SharedQuoteFeed(source),
+        recorder=lambda *trade, **fields: events.put(("trade", index, (trade, fields))),
+        save_checkpoint=lambda state: events.put(("checkpoint", index, state)),
+        load_checkpoint=lambda: snapshot,
+        **options
+    )
+
+    def stop_with_parent():
+        multiprocessing.parent_process().join()
+        bot.stop()
+
+    # A signal rather than a shared Event: a worker killed inside Event.wait would deadlock set()
+    signal.signal(signal.SIGTERM, lambda signum, frame: bot.stop())
+    threading.Thread(target=stop_with_parent, name="parent-watch", daemon=True).start()
+    log.info("Worker started", worker=index, pid=os.getpid(), coins=",".join(coins))
+    try:
+        bot.start()
+    finally:
+        shared.close()
+        flush_logs()
+
+
+def checkpoint_part(state, coins):
+    """The part of a checkpoint covering `coins`: their progress and open positions"""
+    if not state:
+        return None
+    return {
+        "window_size": state.get("window_size"),
+        "saved_at": state.get("saved_at", 0),
+        "states": {coin: saved for coin, saved in state.get("states", {}).items() if coin in coins},
+        "positions": [trade for trade in state.get("positions", []) if trade["coin"] in coins],
+    }
+
+
+def merge_checkpoints(*states):
+    """Combines worker checkpoints into one; the oldest saved_at wins"""
+    states = [state for state in states if state]
+    if not states:
+        return None
+    return {
+        "window_size": states[0].get("window_size"),
+        "saved_at": min(state.get("saved_at", 0) for state in states),
+        "states": {coin: saved for state in states for coin, saved in state.get("states", {}).items()},
+        "positions": [trade for state in states for trade in state.get("positions", [])],
+    }
+
+
+class Worker:
+    """A worker process slot and the coins sharded to it"""
+
+    def __init__(self, index, coins):
+        self.index = index
+        self.coins = list(coins)
+        self.process = None
+        self.restarts = deque()  # monotonic times of recent restarts
+
+
+class Supervisor:
+    """
+    Runs `workers` TradingBot processes (one per core by default) over the
+    coins, dealt round-robin. `options` are passed to every TradingBot.
+    `start` blocks until `stop` is called; `stop` may be called from any
+    thread or a signal handler.
+    """
+
+    def __init__(self, coins=None, workers=None, source=None, fetch_interval=FETCH_INTERVAL,
+                 log_level=LOG_LEVEL, log_format=LOG_FORMAT, **options):
+        self.coins = normalize_coins(coins)
+        count = max(1, min(workers or os.cpu_count() or 1, len(self.coins)))
+        self.workers = [Worker(index, self.coins[index::count]) for index in range(count)]
+        # The only fetcher, so it skips the quote cache but keeps the plan's rate limit
+        self.source = source or CoinGeckoSource(os.environ.get("COINGECKO_API_URL"), ttl=0)
+        self.fetch_interval = fetch_interval
+        self.logging_options = (log_level, log_format)
+        self.options = options
+        self.context = multiprocessing.get_context("spawn")
+        self.events = self.context.Queue()
+        self.checkpoints = {}  # worker index -> its last checkpoint
+        self.shared = None
+        self.is_running = False
+        self._stop = threading.Event()
+
+    def start(self):
+        """Starts the fetcher and the workers, then supervises them until stopped"""
+        self.is_running = True
+        self._stop.clear()
+        snapshot = load_snapshot() if self.options.get("warm_start", True) else None
+        quote_coins = list(self.coins)
+        if snapshot:
+            for worker in self.workers:
+                self.checkpoints[worker.index] = checkpoint_part(snapshot, worker.coins)
+            # Positions on coins no longer watched stay with the first worker
+            unwatched = {trade["coin"] for trade in snapshot.get("positions", [])} - set(self.coins)
+            if unwatched:
+                self.checkpoints[0] = merge_checkpoints(self.checkpoints[0], checkpoint_part(snapshot, unwatched))
+                quote_coins.extend(sorted(unwatched))
+
+        self.shared = SharedQuotes(quote_coins)
+        self.fetch()  # so workers find quotes from their first tick
+        fetcher = threading.Thread(target=self.run_fetcher, name="quote-fetcher", daemon=True)
+        fetcher.start()
+        for worker in self.workers:
+            self.spawn(worker)
+        log.info("=== Cluster Started ===", workers=len(self.workers), coins=",".join(self.coins))
+        metrics.gauge("cluster_workers", lambda: {str(worker.index): len(worker.coins) for worker in self.workers})
+
+        try:
+            while not self._stop.is_set():
+                self.drain(SUPERVISE_INTERVAL)
+                self.supervise()
+        finally:
+            self._stop.set()
+            for worker in self.workers:
+                worker.process.terminate()
+            for worker in self.workers:
+                self.halt(worker)
+            fetcher.join()
+            self.save()
+            self.shared.close()
+            self.is_running = False
+            log.info("=== Cluster Stopped ===")
+
+    def stop(self):
+        self._stop.set()
+
+    def spawn(self, worker, snapshot=None):
+        """Starts the worker's process, resuming from `snapshot` or its last checkpoint"""
+        if snapshot is not None:
+            self.checkpoints[worker.index] = snapshot
+        worker.process = self.context.Process(
+            target=run_worker,
+            name=f"trader-worker-{worker.index}",
+            args=(worker.index, worker.coins, self.shared.name, self.shared.coins, self.options,
+                  self.checkpoints.get(worker.index), self.events, self.logging_options),
+            daemon=True
+        )
+        worker.process.start()
+
+    def halt(self, worker):
+        """Asks the worker to checkpoint and exit (SIGTERM), killing it after STOP_TIMEOUT"""
+        worker.process.terminate()
+        deadline = time.monotonic() + STOP_TIMEOUT
+        # Keep draining: a worker can't exit while its queued events are unread
+        while worker.process.is_alive() and time.monotonic() < deadline:
+            self.drain(0.1)
+        if worker.process.is_alive():
+            log.warning("⚠️ Worker did not stop in time, killing it", worker=worker.index)
+            worker.process.kill()
+        worker.process.join()
+        self.drain()
+
+    def drain(self, timeout=0):
+        """Handles queued worker events, waiting up to `timeout` seconds for the first"""
+        try:
+            event = self.events.get(timeout=timeout) if timeout else self.events.get_nowait()
+            while True:
+                self.handle(*event)
+                event = self.events.get_nowait()
+        except queue.Empty:
+            pass
+
+    def handle(self, kind, index, payload):
+        if kind == "trade":
+            trade, fields = payload
+            record_trade(*trade, **fields)
+            metrics.inc("cluster_trades_total")
+        elif kind == "checkpoint":
+            # A retired worker's late checkpoint would resurrect coins that moved on
+            if any(worker.index == index for worker in self.workers):
+                self.checkpoints[index] = {**payload, "saved_at": time.time()}
+                self.save()
+
+    def save(self):
+        snapshot = merge_checkpoints(*self.checkpoints.values())
+        if snapshot is None:
+            return
+        try:
+            save_snapshot(snapshot)
+        except Exception as e:
+            log.exception("❌ Checkpoint failed", error=str(e))
+
+    def supervise(self):
+        """Restarts workers that exited; retires those restarted MAX_RESTARTS times in RESTART_WINDOW"""
+        for worker in list(self.workers):
+            if self._stop.is_set() or worker.process.is_alive():
+                continue
+            metrics.inc("worker_exits_total", worker=worker.index)
+            now = time.monotonic()
+            while worker.restarts and now - worker.restarts[0] > RESTART_WINDOW:
+                worker.restarts.popleft()
+            if len(worker.restarts) >= MAX_RESTARTS:
+                log.error("❌ Worker keeps crashing, moving its coins", worker=worker.index, exitcode=worker.process.exitcode)
+                self.retire(worker)
+            else:
+                worker.restarts.append(now)
+                log.warning("⚠️ Worker exited, restarting", worker=worker.index, exitcode=worker.process.exitcode)
+                self.spawn(worker)
+
+    def retire(self, retired):
+        """Drops a worker and rebalances its coins and positions onto the least loaded workers"""
+        self.workers.remove(retired)
+        state = self.checkpoints.pop(retired.index, None)
+        if not self.workers:
+            log.error("❌ No workers left, stopping the cluster")
+            self.stop()
+            return
+
+        moved = {}
+        for coin in retired.coins:
+            target = min(self.workers, key=lambda worker: len(worker.coins))
+            target.coins.append(coin)
+            moved.setdefault(target.index, []).append(coin)
+        unwatched = {trade["coin"] for trade in (state or {}).get("positions", [])} - set(retired.coins)
+        if unwatched:
+            # Listed on their new worker, so a later retire or rebalance moves them again
+            index = next(iter(moved), self.workers[0].index)
+            target = next(worker for worker in self.workers if worker.index == index)
+            target.coins.extend(sorted(unwatched - set(target.coins)))
+            moved.setdefault(index, []).extend(unwatched)
+
+        for worker in self.workers:
+            if worker.index in moved:
+                self.halt(worker)
+                snapshot = merge_checkpoints(self.checkpoints.get(worker.index), checkpoint_part(state, moved[worker.index]))
+                self.spawn(worker, snapshot)
+                log.info("🔀 Rebalanced coins", worker=worker.index, coins=",".join(worker.coins))
+        self.save()
+
+    def run_fetcher(self):
+        """Refreshes every coin's shared quote once per fetch_interval"""
+        epoch = time.monotonic()
+        while not self._stop.wait(max(0, next_deadline(time.monotonic(), self.fetch_interval, epoch) - time.monotonic())):
+            self.fetch()
+
+    def fetch(self):
+        try:
+            with metrics.span("fetch"):
+                quotes = self.source.getQuotes(self.shared.coins, PRIORITY_POSITION)
+            self.shared.write(quotes)
+        except Exception as e:
+            metrics.inc("fetch_errors_total")
+            log.exception("❌ Quote fetch failed", error=str(e))
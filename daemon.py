@@ -0,0 +1,105 @@
+"""
+Headless entry point for servers: python -m daemon --coins bitcoin,ethereum
+
+Only the data and strategy path is imported (no tkinter, ttkbootstrap or
+pandas), and only after the arguments parse, so --help and bad arguments
+return immediately. Import and startup timings are logged.
+"""
+import time
+
+_process_start = time.perf_counter()
+
+import argparse
+import signal
+
+
+def parse_args(argv=None):
+    parser = argparse.ArgumentParser(description="Run the trading bot without the UI")
+    parser.add_argument("--coins", default="bitcoin", help="Comma-separated CoinGecko coin ids")
+    parser.add_argument("--mode", default="default", choices=["default", "aggressive"])
+    parser.add_argument("--money", type=float, default=1000, help="Capital per trade")
+    parser.add_argument("--risk", type=float, default=2, help="Risk percentage")
+    parser.add_argument("--target-profit", type=float, default=1, help="Profit step per target (%%)")
+    parser.add_argument("--window", type=int, default=None, help="Price points in the rolling window (default 60)")
+    parser.add_argument("--momentum", type=float, default=None, help="Minimum 24h change (%%) to consider a buy (default 1)")
+    parser.add_argument("--average-timeframe", default=None, choices=["1m", "5m", "1h"],
+                        help="Average candle closes of this timeframe in the trend filter instead of the raw window")
+    parser.add_argument("--indicators", default=None,
+                        help="Indicators to compute on 1m candles and log with each signal check, e.g. rsi:14,atr:14")
+    parser.add_argument("--positions-per-coin", type=int, default=1)
+    parser.add_argument("--paper", action="store_true",
+                        help="Fill trades on the simulated exchange (exchange.py) with spread, fees and slippage")
+    parser.add_argument("--workers", type=int, default=1, help="Shard the coins across this many processes (see cluster.py)")
+    parser.add_argument("--cold-start", action="store_true", help="Ignore the last checkpoint and collect a fresh window")
+    parser.add_argument("--backfill", action="store_true",
+                        help="Seed each coin's first window from one history request instead of live quotes, "
+                             "when the source's history is as fine as the warm-up spacing")
+    parser.add_argument("--feed", default=None, help="poll, websocket or replay:<tick file> (default: $PRICE_FEED or poll)")
+    parser.add_argument("--log-level", default=None, help="DEBUG, INFO, WARNING or ERROR (default: $TRADER_LOG_LEVEL or INFO)")
+    parser.add_argument("--log-format", default=None, choices=["text", "json"])
+    parser.add_argument("--metrics-port", type=int, default=None, help="Serve Prometheus metrics on this port")
+    return parser.parse_args(argv)
+
+
+def main(argv=None):
+    args = parse_args(argv)
+
+    import telemetry
+    telemetry.configure_logging(args.log_level or telemetry.LOG_LEVEL, args.log_format or telemetry.LOG_FORMAT)
+    log = telemetry.get_logger("daemon")
+
+    start = time.perf_counter()
+    if args.workers > 1:
+        from cluster import Supervisor
+    else:
+        from main import start_bot
+    log.info("Imported bot modules", import_ms=round((time.perf_counter() - start) * 1000, 1))
+
+    metrics_port = args.metrics_port if args.metrics_port is not None else telemetry.METRICS_PORT
+    if metrics_port:
+        telemetry.serve_metrics(metrics_port)
+        log.info("Serving metrics", port=metrics_port)
+
+    options = {
+        "total_money": args.money,
+        "risk_percentage": args.risk,
+        "mode": args.mode,
+        "target_profit": args.target_profit,
+        "coins": args.coins,
+        "positions_per_coin": args.positions_per_coin,
+        "warm_start": not args.cold_start,
+        "backfill": args.backfill,
+    }
+    if args.window is not None:
+        options["window_size"] = args.window
+    if args.momentum is not None:
+        options["momentum_threshold"] = args.momentum
+    if args.average_timeframe is not None:
+        options["average_timeframe"] = args.average_timeframe
+    if args.indicators is not None:
+        options["indicators"] = args.indicators
+    if args.paper:
+        from exchange import PaperExchange
+        options["exchange"] = PaperExchange()
+    if args.workers > 1:
+        if args.feed:
+            log.warning("--feed is ignored with --workers; workers read the supervisor's shared quotes")
+        bot = Supervisor(
+            workers=args.workers,
+            log_level=args.log_level or telemetry.LOG_LEVEL,
+            log_format=args.log_format or telemetry.LOG_FORMAT,
+            **options
+        )
+    else:
+        bot = start_bot(feed=args.feed, **options)
+    signal.signal(signal.SIGTERM, lambda signum, frame: bot.stop())
+    log.info("Ready to start", startup_ms=round((time.perf_counter() - _process_start) * 1000, 1))
+    try:
+        bot.start()
+    except KeyboardInterrupt:
+        bot.stop()
+    telemetry.flush_logs()
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,158 @@
+import threading
+import numpy as np
+from database.db import record_candle
+
+TIMEFRAMES = {"1m": 60, "5m": 5 * 60, "1h": 60 * 60}  # candle length in seconds
+CANDLE_CAPACITY = 1440  # closed candles kept in memory per timeframe (a day of 1m candles)
+CANDLE_FIELDS = ("ts", "open", "high", "low", "close", "volume")
+
+
+class CandleSeries:
+    """
+    OHLCV candles of one timeframe. A tick is folded into the forming candle
+    in O(1); closed candles go into fixed-size NumPy rings together with a
+    running total of their closes, so the mean close of the last n candles is
+    O(1) for any n up to the capacity. Periods without ticks are filled with
+    flat candles at the previous close, including the gap between loaded
+    candles and the first live tick. Quotes carry no traded volume, so
+    `volume` counts ticks.
+    """
+
+    def __init__(self, seconds, capacity=CANDLE_CAPACITY):
+        self.seconds = seconds
+        self.capacity = int(capacity)
+        # One spare slot keeps the running total from before the oldest candle
+        self._candles = np.zeros((self.capacity + 1, len(CANDLE_FIELDS)), dtype=np.float64)
+        self._totals = np.zeros(self.capacity + 1, dtype=np.float64)
+        self._closed = 0  # candles closed so far, including ones overwritten since
+        self._total = 0.0
+        self.current = None  # [ts, open, high, low, close, volume] of the forming candle
+
+    def __len__(self):
+        return min(self._closed, self.capacity)
+
+    def add(self, ts, price, volume=1):
+        """Folds one tick in; returns the candles it closed as tuples (usually none)"""
+        price = float(price)
+        start = ts - ts % self.seconds
+        current = self.current
+        if current is None:
+            closed = []
+            if self._closed:
+                last = self._candles[(self._closed - 1) % len(self._totals)]
+                closed = self._fill(last[0], start, last[4])
+            self.current = [start, price, price, price, price, volume]
+            return closed
+        if start <= current[0]:
+            # Same period (a late tick is folded into the forming candle too)
+            if price > current[2]:
+                current[2] = price
+            if price < current[3]:
+                current[3] = price
+            current[4] = price
+            current[5] += volume
+            return []
+
+        closed = [tuple(current)]
+        self._append(closed[0])
+        closed.extend(self._fill(current[0], start, current[4]))
+        self.current = [start, price, price, price, price, volume]
+        return closed
+
+    def _fill(self, after, start, close):
+        """Appends flat candles at `close` for the periods between the candle starting at `after` and `start`"""
+        missing = int((start - after) // self.seconds) - 1
+        flats = []
+        # Only the last `capacity` flat candles would survive in the ring anyway
+        for k in range(min(missing, self.capacity), 0, -1):
+            flat = (start - k * self.seconds, close, close, close, close, 0)
+            self._append(flat)
+            flats.append(flat)
+        return flats
+
+    def _append(self, candle):
+        slot = self._closed % len(self._totals)
+        self._candles[slot] = candle
+        self._total += candle[4]
+        self._totals[slot] = self._total
+        self._closed += 1
+
+    def load(self, candles):
+        """Appends already closed candles, oldest first, e.g. from the Candle table on a warm restart"""
+        for candle in candles:
+            self._append(tuple(candle))
+
+    def close_mean(self, n):
+        """Mean close of the last `n` closed candles"""
+        if not 0 < n <= len(self):
+            raise ValueError(f"{n} candles requested, {len(self)} available")
+        last = (self._closed - 1) % len(self._totals)
+        before = self._totals[(self._closed - 1 - n) % len(self._totals)] if self._closed > n else 0.0
+        return (self._totals[last] - before) / n
+
+    def candles(self, n=None):
+        """The last `n` closed candles (all kept by default), oldest first, as rows of CANDLE_FIELDS"""
+        n = len(self) if n is None else min(n, len(self))
+        slots = np.arange(self._closed - n, self._closed) % len(self._totals)
+        return self._candles[slots]
+
+
+class CandleAggregator:
+    """
+    1m/5m/1h candles for one market, built from its ticks as they arrive.
+    `recorder(market, timeframe, candle)` receives every closed candle
+    (database.db.record_candle persists them through the batched writer).
+    """
+
+    def __init__(self, name, timeframes=TIMEFRAMES, capacity=CANDLE_CAPACITY, recorder=None):
+        self.name = name
+        self.series = {timeframe: CandleSeries(TIMEFRAMES[timeframe], capacity) for timeframe in timeframes}
+        self.recorder = recorder
+        self._lock = threading.Lock()
+
+    def __getitem__(self, timeframe):
+        return self.series[timeframe]
+
+    def add(self, ts, price, volume=1):
+        """Folds one tick into every timeframe; returns the [(timeframe, candle)] it closed"""
+        with self._lock:
+            closed = [(timeframe, candle) for timeframe, series in self.series.items()
+                      for candle in series.add(ts, price, volume)]
+        if self.recorder is not None:
+            for timeframe, candle in closed:
+                self.recorder(self.name, timeframe, candle)
+        return closed
+
+    def close_mean(self, timeframe, n):
+        with self._lock:
+            return self.series[timeframe].close_mean(n)
+
+    def count(self, timeframe):
+        """Closed candles available for `timeframe`"""
+        return len(self.series[timeframe])
+
+    def candles(self, timeframe, n=None):
+        with self._lock:
+            return self.series[timeframe].candles(n)
+
+
+_candles = {}
+_candles_lock = threading.Lock()
+
+
+def get_candles(name):
+    """Returns the market's candle aggregator, creating one that persists its candles on first use"""
+    with _candles_lock:
+        candles = _candles.get(name)
+        if candles is None:
+            candles = _candles[name] = CandleAggregator(name, recorder=record_candle)
+        return candles
+
+
+def find_candles(name):
+    return _candles.get(name)
+
+
+def clear_candles():
+    with _candles_lock:
+        _candles.clear()
@@ -1,8 +1,29 @@
-import json
+import time
 import datetime
-from peewee import Model, CharField, TextField, SqliteDatabase
+import itertools
+import threading
+from peewee import Model, CharField, FloatField, IntegerField, SqliteDatabase
+from database.window import clear_windows
+from database.journal import TradeJournal
+from telemetry import get_logger
 
-db = SqliteDatabase('database.db')
+DATABASE_FILE = 'database.db'
+TICK_FLUSH_INTERVAL = 1.0  # seconds buffered rows wait before being written in one transaction
+
+log = get_logger("db")
+
+# WAL lets the UI and strategy threads read while the tick writer commits.
+# synchronous=NORMAL is durable across application crashes in WAL mode and
+# only risks the last commits on power loss.
+PRAGMAS = {
+    'journal_mode': 'wal',
+    'synchronous': 'normal',
+    'cache_size': -16 * 1024,  # 16 MB page cache per connection
+    'temp_store': 'memory',
+}
+
+# Connections are per thread (peewee default); each one applies PRAGMAS on open
+db = SqliteDatabase(DATABASE_FILE, pragmas=PRAGMAS, timeout=10)
 
 class BaseModel(Model):
     class Meta:
@@ -10,62 +31,185 @@ class BaseModel(Model):
 
 class Market(BaseModel):
     name = CharField(unique=True)
-    priceRanges = TextField(null=True)
-    changesRange = TextField(null=True)
- 
-    def get_price_ranges(self):
-        return json.loads(self.priceRanges) if self.priceRanges else []
 
-    def set_price_ranges(self, value):
-        self.priceRanges = json.dumps(value)
+class Tick(BaseModel):
+    """ Append-only price history; rolling windows live in database.window """
+    market = CharField()
+    ts = FloatField()  # unix timestamp
+    price = FloatField()
+    change24h = FloatField()
 
-    def get_changes_range(self):
-        return json.loads(self.changesRange) if self.changesRange else []
+    class Meta:
+        indexes = (
+            (('market', 'ts'), False),
+        )
 
-    def set_changes_range(self, value):
-        self.changesRange = json.dumps(value)
+class Signal(BaseModel):
+    """ Every evaluated entry signal, for the daily limits in operation.strategy """
+    coin = CharField()
+    day = CharField()  # ISO date, so per-day lookups hit the (coin, day) index
+    ts = FloatField()
+    signal = CharField()
+    level = IntegerField()
 
-def initialize_database ():
-    db.connect()
-    # Create a Bitcoin market explicitly
-    db.create_tables([Market], safe=True)
-    # Market.create(name ='bitcoin')
-    # market = Market.get(Market.name == 'bitcoin')
-    # market.get_price_ranges = []
-    # market.get_changes_range = []
-    # check = market.save()
-    # print(check)
+    class Meta:
+        indexes = (
+            (('coin', 'day'), False),
+        )
+
+class Candle(BaseModel):
+    """ Closed OHLCV candles from database.candles; volume counts ticks """
+    market = CharField()
+    timeframe = CharField()  # "1m", "5m" or "1h"
+    ts = FloatField()  # unix timestamp the candle opens at
+    open = FloatField()
+    high = FloatField()
+    low = FloatField()
+    close = FloatField()
+    volume = FloatField()
+
+    class Meta:
+        indexes = (
+            (('market', 'timeframe', 'ts'), False),
+        )
+
+TABLES = [Market, Tick, Signal, Candle]
+
+class DatabaseSession:
+    """
+    Opens the database once per process, creates the schema once and writes
+    ticks and signals in batched transactions from a single background
+    writer thread.
+    """
+
+    def __init__(self, flush_interval=TICK_FLUSH_INTERVAL):
+        self.flush_interval = flush_interval
+        self.schema_ready = False
+        self._rows = {}
+        self._lock = threading.Lock()
+        self._flush_lock = threading.Lock()
+        self._stop = threading.Event()
+        self._writer = None
 
+    def open(self):
+        db.connect(reuse_if_open=True)
+        with self._lock:
+            if not self.schema_ready:
+                db.create_tables(TABLES, safe=True)
+                self.schema_ready = True
+            if self._writer is None or not self._writer.is_alive():
+                self._stop.clear()
+                self._writer = threading.Thread(target=self._run_writer, name="tick-writer", daemon=True)
+                self._writer.start()
 
+    def add_row(self, model, row):
+        with self._lock:
+            self._rows.setdefault(model, []).append(row)
+
+    def add_tick(self, market, price, change24h, ts=None):
+        self.add_row(Tick, {"market": market, "ts": time.time() if ts is None else ts, "price": price, "change24h": change24h})
+
+    def flush(self):
+        """ Writes all buffered rows in one transaction """
+        with self._flush_lock:
+            with self._lock:
+                pending, self._rows = self._rows, {}
+            if not pending:
+                return 0
+            db.connect(reuse_if_open=True)
+            with db.atomic():
+                for model, rows in pending.items():
+                    for start in range(0, len(rows), 500):
+                        model.insert_many(rows[start:start + 500]).execute()
+            return sum(len(rows) for rows in pending.values())
+
+    def _run_writer(self):
+        while not self._stop.wait(self.flush_interval):
+            try:
+                self.flush()
+            except Exception as e:
+                log.exception("❌ Database flush failed", error=str(e))
+        db.close()
+
+    def close(self):
+        self._stop.set()
+        if self._writer is not None and self._writer is not threading.current_thread():
+            self._writer.join()
+        self._writer = None
+        self.flush()
+        if not db.is_closed():
+            db.close()
+
+
+session = DatabaseSession()
+
+def initialize_database ():
+    session.open()
 
 def clear_database():
-    """ Clears database every 24 hours """
-    print("🗑 Clearing database...")
+    """ Clears the rolling windows every 24 hours; the tick history is kept """
+    log.info("🗑 Clearing database...")
+    initialize_database()
+    clear_windows()
     Market.delete().execute()
 
+def record_tick(market, price, change24h, ts=None):
+    session.add_tick(market, price, change24h, ts)
+
+def recent_ticks(market, limit):
+    """ Returns the market's last `limit` ticks, oldest first """
+    session.flush()
+    query = (Tick
+             .select()
+             .where(Tick.market == market)
+             .order_by(Tick.ts.desc())
+             .limit(limit))
+    return list(reversed(list(query)))
+
+def record_candle(market, timeframe, candle):
+    """ Buffers a closed (ts, open, high, low, close, volume) candle for the batched writer """
+    ts, open_, high, low, close, volume = candle
+    session.add_row(Candle, {"market": market, "timeframe": timeframe, "ts": ts, "open": open_,
+                             "high": high, "low": low, "close": close, "volume": volume})
+
+def recent_candles(market, timeframe, limit, since=None):
+    """ Returns the market's last `limit` closed candles of `timeframe` as tuples, oldest first, optionally only those starting at or after `since` """
+    session.flush()
+    where = (Candle.market == market) & (Candle.timeframe == timeframe)
+    if since is not None:
+        where &= Candle.ts >= since
+    query = (Candle
+             .select(Candle.ts, Candle.open, Candle.high, Candle.low, Candle.close, Candle.volume)
+             .where(where)
+             .order_by(Candle.ts.desc())
+             .limit(limit)
+             .tuples())
+    return list(reversed(list(query)))
+
 def close_database():
-    db.close()
+    session.close()
 
-TRADE_HISTORY_FILE = "trade_history.json"
+journal = TradeJournal()
 
-def load_trade_history():
-    try:
-        with open(TRADE_HISTORY_FILE, "r") as file:
-            return json.load(file)
-    except (FileNotFoundError, json.JSONDecodeError):
-        return []
+def load_trade_history(offset=0, limit=None):
+    """ Returns recorded trades, optionally a page of `limit` records after `offset` """
+    trades = iter_trade_history()
+    if offset or limit is not None:
+        stop = None if limit is None else offset + limit
+        trades = itertools.islice(trades, offset, stop)
+    return list(trades)
 
-def save_trade_history(trade_data):
-    with open(TRADE_HISTORY_FILE, "w") as file:
-        json.dump(trade_data, file, indent=4)
+def iter_trade_history():
+    """ Streams recorded trades without loading the whole journal """
+    return iter(journal)
 
-def record_trade(coin, action, price, reason):
-    trade_data = load_trade_history()
-    trade_data.append({
+def record_trade(coin, action, price, reason, **fields):
+    """ Journals a fill; trades add `size` (coins) and, on sells, the average `entry` price """
+    journal.append({
         "timestamp": datetime.datetime.now().isoformat(),
         "coin": coin,
         "action": action,
         "price": price,
-        "reason": reason
-    })
-    save_trade_history(trade_data)
\ No newline at end of file
+        "reason": reason,
+        **fields
+    })
\ No newline at end of file
@@ -0,0 +1,147 @@
+import json
+import os
+import threading
+import time
+from telemetry import get_logger, configure_logging
+
+TRADE_JOURNAL_FILE = "trade_history.jsonl"
+LEGACY_HISTORY_FILE = "trade_history.json"
+
+# fsync policies: every record, at most once per `fsync_interval`, or leave it to the OS
+FSYNC_ALWAYS = "always"
+FSYNC_INTERVAL = "interval"
+FSYNC_NEVER = "never"
+FSYNC_POLICIES = (FSYNC_ALWAYS, FSYNC_INTERVAL, FSYNC_NEVER)
+
+log = get_logger("journal")
+
+
+class TradeJournal:
+    """
+    Append-only JSON Lines trade log. Recording a trade writes one line, so
+    the cost doesn't grow with the history, and a crash can at worst leave a
+    torn last line that readers skip.
+    """
+
+    def __init__(self, path=TRADE_JOURNAL_FILE, fsync=FSYNC_INTERVAL, fsync_interval=1.0):
+        if fsync not in FSYNC_POLICIES:
+            raise ValueError(f"fsync must be one of {FSYNC_POLICIES}, got {fsync!r}")
+        self.path = path
+        self.fsync = fsync
+        self.fsync_interval = fsync_interval
+        self._file = None
+        self._last_sync = 0.0
+        self._lock = threading.Lock()
+
+    def _open(self):
+        if self._file is None:
+            if not os.path.exists(self.path) and os.path.exists(LEGACY_HISTORY_FILE):
+                migrate_trade_history(LEGACY_HISTORY_FILE, self.path)
+            self._file = open(self.path, "ab")
+            # Terminate a line torn by a crash so the next record starts cleanly
+            if self._file.tell() > 0:
+                with open(self.path, "rb") as existing:
+                    existing.seek(-1, os.SEEK_END)
+                    if existing.read(1) != b"\n":
+                        self._file.write(b"\n")
+        return self._file
+
+    def append(self, record):
+        line = (json.dumps(record, separators=(",", ":")) + "\n").encode("utf-8")
+        with self._lock:
+            file = self._open()
+            file.write(line)
+            file.flush()
+            if self.fsync == FSYNC_ALWAYS:
+                os.fsync(file.fileno())
+            elif self.fsync == FSYNC_INTERVAL:
+                now = time.monotonic()
+                if now - self._last_sync >= self.fsync_interval:
+                    os.fsync(file.fileno())
+                    self._last_sync = now
+
+    def sync(self):
+        with self._lock:
+            if self._file is not None:
+                self._file.flush()
+                os.fsync(self._file.fileno())
+                self._last_sync = time.monotonic()
+
+    def read_from(self, offset=0, limit=None):
+        """
+        Reads complete records starting at byte `offset`.
+        Returns (records, next_offset) so callers can resume where they stopped.
+        """
+        records = []
+        if not os.path.exists(self.path):
+            if os.path.exists(LEGACY_HISTORY_FILE):
+                with self._lock:
+                    self._open()
+            else:
+                return records, offset
+        with open(self.path, "rb") as file:
+            file.seek(offset)
+            while limit is None or len(records) < limit:
+                line = file.readline()
+                if not line.endswith(b"\n"):
+                    break  # end of file, or a record still being written
+                offset += len(line)
+                record = _parse(line)
+                if record is not None:
+                    records.append(record)
+        return records, offset
+
+    def __iter__(self):
+        offset = 0
+        while True:
+            records, offset = self.read_from(offset, limit=1000)
+            if not records:
+                return
+            yield from records
+
+    def close(self):
+        with self._lock:
+            if self._file is not None:
+                self._file.close()
+                self._file = None
+
+
+def _parse(line):
+    line = line.strip()
+    if not line:
+        return None
+    try:
+        return json.loads(line)
+    except json.JSONDecodeError:
+        log.warning("⚠️ Skipping corrupt trade journal line", line=line[:80])
+        return None
+
+
+def migrate_trade_history(source=LEGACY_HISTORY_FILE, target=TRADE_JOURNAL_FILE):
+    """
+    One-time conversion of a trade_history.json array into the JSON Lines
+    journal. The original file is kept, renamed to `<source>.migrated`.
+    Returns the number of migrated trades.
+    """
+    if not os.path.exists(source):
+        return 0
+    with open(source, "r") as file:
+        try:
+            trades = json.load(file)
+        except json.JSONDecodeError:
+            log.error("❌ Trade history is corrupt and was not migrated", source=source)
+            return 0
+
+    with open(target, "a") as file:
+        for trade in trades:
+            file.write(json.dumps(trade, separators=(",", ":")) + "\n")
+        file.flush()
+        os.fsync(file.fileno())
+    os.replace(source, source + ".migrated")
+    log.info("📦 Migrated trade history", trades=len(trades), source=source, target=target)
+    return len(trades)
+
+
+if __name__ == "__main__":
+    configure_logging()
+    migrate_trade_history()
@@ -0,0 +1,75 @@
+import datetime
+import threading
+from peewee import fn
+from database.db import Signal, session, initialize_database
+
+
+class SignalLedger:
+    """
+    Records every evaluated entry signal and keeps per-coin, per-day counts
+    in memory. A day's counts are loaded from the Signal table once (on first
+    use of that day) and then updated incrementally, so `count` is O(1)
+    no matter how much history is stored. Earlier days' counts are dropped
+    from memory when a new day starts (a persisted day is reloaded if asked
+    for again). With `persist=False` (backtests) the ledger is memory-only.
+    """
+
+    def __init__(self, clock=datetime.datetime.now, persist=True):
+        self.clock = clock
+        self.persist = persist
+        self._counts = {}  # (coin, day, signal) -> count
+        self._loaded_days = set()
+        self._today = None
+        self._lock = threading.Lock()
+
+    def _roll(self, day):
+        """Drops the counts of days before `day` once it starts, so a long-running ledger holds about one day"""
+        if self._today is not None and day <= self._today:
+            return
+        self._today = day
+        self._counts = {key: total for key, total in self._counts.items() if key[1] >= day}
+        self._loaded_days = {loaded for loaded in self._loaded_days if loaded >= day}
+
+    def _load_day(self, day):
+        if day in self._loaded_days or not self.persist:
+            return
+        session.flush()
+        initialize_database()
+        query = (Signal
+                 .select(Signal.coin, Signal.signal, fn.COUNT(Signal.id).alias("total"))
+                 .where(Signal.day == day)
+                 .group_by(Signal.coin, Signal.signal))
+        for row in query:
+            self._counts[(row.coin, day, row.signal)] = row.total
+        self._loaded_days.add(day)
+
+    def record(self, coin, signal, level):
+        now = self.clock()
+        day = now.date().isoformat()
+        with self._lock:
+            self._roll(day)
+            self._load_day(day)
+            key = (coin, day, signal)
+            self._counts[key] = self._counts.get(key, 0) + 1
+        if not self.persist:
+            return
+        session.add_row(Signal, {
+            "coin": coin,
+            "day": day,
+            "ts": now.timestamp(),
+            "signal": signal,
+            "level": level,
+        })
+
+    def count(self, coin, signal, day=None):
+        """ Number of `signal` results recorded for `coin` on `day` (default: today) """
+        today = day is None
+        day = (day or self.clock().date()).isoformat()
+        with self._lock:
+            if today:
+                self._roll(day)
+            self._load_day(day)
+            return self._counts.get((coin, day, signal), 0)
+
+
+ledger = SignalLedger()
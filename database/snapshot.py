@@ -0,0 +1,46 @@
+import json
+import os
+import time
+from telemetry import get_logger
+
+SNAPSHOT_FILE = "bot_snapshot.json"
+SNAPSHOT_VERSION = 1
+SNAPSHOT_INTERVAL = 30  # seconds between checkpoints while the bot runs
+WINDOW_MAX_AGE = 5 * 60  # seconds a price window or coin state stays usable after a stop
+POSITION_MAX_AGE = 24 * 60 * 60  # seconds open positions are resumed after a stop
+
+log = get_logger("snapshot")
+
+
+def save_snapshot(state, path=SNAPSHOT_FILE):
+    """
+    Writes `state` (JSON-serializable) with a saved_at timestamp. The file is
+    replaced atomically, so a crash mid-write leaves the previous checkpoint.
+    """
+    state = {**state, "version": SNAPSHOT_VERSION, "saved_at": time.time()}
+    temporary = f"{path}.tmp"
+    with open(temporary, "w") as file:
+        json.dump(state, file, separators=(",", ":"))
+        file.flush()
+        os.fsync(file.fileno())
+    os.replace(temporary, path)
+
+
+def load_snapshot(path=SNAPSHOT_FILE):
+    """Returns the last checkpoint, or None when there is none or it can't be read"""
+    if not os.path.exists(path):
+        return None
+    try:
+        with open(path, "r") as file:
+            state = json.load(file)
+    except (OSError, json.JSONDecodeError) as e:
+        log.warning("⚠️ Ignoring unreadable snapshot", path=path, error=str(e))
+        return None
+    if state.get("version") != SNAPSHOT_VERSION:
+        log.warning("⚠️ Ignoring snapshot from another version", path=path, version=state.get("version"))
+        return None
+    return state
+
+
+def snapshot_age(state):
+    return time.time() - state.get("saved_at", 0)
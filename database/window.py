@@ -0,0 +1,116 @@
+import threading
+import numpy as np
+
+DEFAULT_WINDOW = 60  # price points kept per market
+
+
+class RingBuffer:
+    """
+    Fixed-size float buffer backed by a NumPy array. Appends overwrite the
+    oldest value and keep a running sum, so append and mean are O(1)
+    regardless of the window size.
+    """
+
+    def __init__(self, size):
+        self.size = int(size)
+        self._data = np.zeros(self.size, dtype=np.float64)
+        self._head = 0  # index the next value is written to
+        self._count = 0
+        self._sum = 0.0
+        self._lock = threading.Lock()
+
+    def __len__(self):
+        return self._count
+
+    @property
+    def full(self):
+        return self._count == self.size
+
+    def append(self, value):
+        value = float(value)
+        with self._lock:
+            if self._count == self.size:
+                self._sum -= self._data[self._head]
+            else:
+                self._count += 1
+            self._data[self._head] = value
+            self._sum += value
+            self._head = (self._head + 1) % self.size
+            if self._head == 0:
+                # Re-sum once per lap so floating point error can't accumulate
+                self._sum = float(self._data[:self._count].sum())
+
+    def extend(self, values):
+        for value in values:
+            self.append(value)
+
+    def mean(self):
+        with self._lock:
+            return self._sum / self._count if self._count else 0.0
+
+    def last(self):
+        with self._lock:
+            return float(self._data[self._head - 1]) if self._count else None
+
+    def values(self):
+        """Returns a copy of the buffered values, oldest first"""
+        with self._lock:
+            if self._count < self.size:
+                return self._data[:self._count].copy()
+            return np.concatenate((self._data[self._head:], self._data[:self._head]))
+
+    def clear(self):
+        with self._lock:
+            self._head = 0
+            self._count = 0
+            self._sum = 0.0
+
+
+class MarketWindow:
+    """Rolling price and 24h change windows for one market"""
+
+    def __init__(self, name, size=DEFAULT_WINDOW):
+        self.name = name
+        self.size = size
+        self.prices = RingBuffer(size)
+        self.changes = RingBuffer(size)
+
+    def __len__(self):
+        return len(self.prices)
+
+    @property
+    def full(self):
+        return self.prices.full
+
+    def append(self, price, change24h):
+        self.prices.append(price)
+        self.changes.append(change24h)
+
+
+_windows = {}
+_windows_lock = threading.Lock()
+
+
+def get_window(name, size=DEFAULT_WINDOW):
+    """Returns the market's window, creating an empty one on first use"""
+    with _windows_lock:
+        window = _windows.get(name)
+        if window is None:
+            window = _windows[name] = MarketWindow(name, size)
+        return window
+
+
+def reset_window(name, size=DEFAULT_WINDOW):
+    """Replaces the market's window with an empty one of `size`"""
+    with _windows_lock:
+        window = _windows[name] = MarketWindow(name, size)
+        return window
+
+
+def find_window(name):
+    return _windows.get(name)
+
+
+def clear_windows():
+    with _windows_lock:
+        _windows.clear()
@@ -0,0 +1,105 @@
+import asyncio
+import functools
+import math
+from market import getQuotes, PRIORITY_SIGNAL
+from telemetry import metrics
+
+BATCH_WINDOW = 0.05  # seconds quote requests are held so concurrent markets share one fetch
+
+
+async def run_blocking(func, *args, **kwargs):
+    """Runs a blocking call (network, file or database I/O) off the event loop"""
+    loop = asyncio.get_running_loop()
+    return await loop.run_in_executor(None, functools.partial(func, *args, **kwargs))
+
+
+def next_deadline(now, interval, epoch):
+    """First multiple of `interval` after `epoch` that is later than `now`"""
+    return epoch + (math.floor((now - epoch) / interval) + 1) * interval
+
+
+class Ticker:
+    """
+    Sleeps until the next multiple of `interval` after `epoch` (event loop time).
+    Time spent inside a tick doesn't push later ticks back, missed ticks are
+    skipped instead of bursting, and tickers sharing an epoch fire together.
+    """
+
+    def __init__(self, interval, epoch=None):
+        self.interval = interval
+        self.epoch = epoch
+        self._last = None
+
+    def next(self, now):
+        """Claims the next deadline after `now` (event loop time)"""
+        if self.epoch is None:
+            self.epoch = now
+        deadline = next_deadline(now, self.interval, self.epoch)
+        if self._last is not None and deadline <= self._last:
+            deadline = self._last + self.interval
+        self._last = deadline
+        return deadline
+
+    async def wait(self):
+        loop = asyncio.get_running_loop()
+        now = loop.time()
+        await asyncio.sleep(self.next(now) - now)
+
+
+class QuoteBatcher:
+    """
+    Merges the per-coin quote requests made by market and position tasks within
+    `window` seconds into one batched fetch run in a worker thread. The batch
+    is fetched at the most urgent priority among its requests.
+    """
+
+    def __init__(self, fetch_many=getQuotes, window=BATCH_WINDOW):
+        self.fetch_many = fetch_many
+        self.window = window
+        self._pending = {}
+        self._priority = None
+        self._flush_handle = None
+        self._tasks = set()
+
+    async def get(self, coin, priority=PRIORITY_SIGNAL):
+        loop = asyncio.get_running_loop()
+        self._priority = priority if self._priority is None else min(self._priority, priority)
+        pending = self._pending.get(coin)
+        if pending is None:
+            pending = self._pending[coin] = loop.create_future()
+            # Mark the result as retrieved even if every waiter was cancelled
+            pending.add_done_callback(lambda f: f.cancelled() or f.exception())
+            if self._flush_handle is None:
+                self._flush_handle = loop.call_later(self.window, self._start_flush)
+        # Shielded so one cancelled waiter doesn't cancel the quote for the others
+        return await asyncio.shield(pending)
+
+    async def get_price(self, coin, priority=PRIORITY_SIGNAL):
+        return (await self.get(coin, priority))[0]
+
+    def _start_flush(self):
+        self._flush_handle = None
+        pending, self._pending = self._pending, {}
+        priority, self._priority = self._priority, None
+        task = asyncio.ensure_future(self._flush(pending, priority))
+        self._tasks.add(task)
+        task.add_done_callback(self._tasks.discard)
+
+    async def _flush(self, pending, priority):
+        try:
+            with metrics.span("fetch"):
+                quotes = await run_blocking(self.fetch_many, list(pending), priority)
+        except Exception as e:
+            metrics.inc("fetch_errors_total")
+            for future in pending.values():
+                if not future.done():
+                    future.set_exception(e)
+            return
+
+        for coin, future in pending.items():
+            if future.done():
+                continue
+            if coin in quotes:
+                future.set_result(quotes[coin])
+            else:
+                future.set_exception(KeyError(f"No quote returned for {coin}"))
@@ -0,0 +1,53 @@
+import threading
+import time
+from collections import deque
+from telemetry import metrics
+
+EVENT_QUEUE_SIZE = 10000  # events held for the UI before the oldest are dropped
+
+TICK = "tick"  # coin, price
+SIGNAL = "signal"  # coin, signal, level
+FILL = "fill"  # coin, action, price, reason and the journaled fields
+POSITION = "position"  # coin, status ("open" or "closed"), price or profit
+STATE = "state"  # status ("starting", "running", "stopped" or "error"), error, bot (id of the TradingBot)
+
+
+class EventBus:
+    """
+    Bounded queue of bot events for the UI. `publish` never blocks the bot:
+    when the consumer falls behind by `maxsize` events, the oldest are
+    dropped and counted. The consumer takes events in batches with `drain`.
+    """
+
+    def __init__(self, maxsize=EVENT_QUEUE_SIZE):
+        self.maxsize = maxsize
+        self.dropped = 0
+        self._events = deque()
+        self._lock = threading.Lock()
+
+    def __len__(self):
+        return len(self._events)
+
+    def publish(self, kind, **fields):
+        event = (kind, time.time(), fields)
+        with self._lock:
+            if len(self._events) >= self.maxsize:
+                self._events.popleft()
+                self.dropped += 1
+                metrics.inc("ui_events_dropped_total")
+            self._events.append(event)
+
+    def drain(self, limit=None):
+        """Removes and returns up to `limit` events (all by default) as (kind, ts, fields), oldest first"""
+        with self._lock:
+            if limit is None or limit >= len(self._events):
+                events, self._events = list(self._events), deque()
+                return events
+            return [self._events.popleft() for _ in range(limit)]
+
+    def recorder(self, recorder):
+        """Wraps a trade recorder so every journaled fill is also published"""
+        def record(coin, action, price, reason, **fields):
+            recorder(coin, action, price, reason, **fields)
+            self.publish(FILL, coin=coin, action=action, price=price, reason=reason, **fields)
+        return record
@@ -0,0 +1,278 @@
+import heapq
+import itertools
+import time
+from collections import deque
+import numpy as np
+from telemetry import get_logger, metrics
+
+BUY = "buy"
+SELL = "sell"
+MARKET = "market"
+LIMIT = "limit"
+STOP = "stop"
+
+SPREAD = 0.05  # % between bid and ask, centered on the quoted price
+FEE = 0.1  # % of the notional charged on every fill
+SLIPPAGE = 0.02  # % beyond the bid/ask that market and triggered stop orders fill at
+LATENCY = 0.0  # seconds before a submitted order reaches the matching engine
+REPLAY_CHUNK = 65536  # ticks compared at once while replay() looks for the next fill
+
+log = get_logger("exchange")
+
+
+class Order:
+    def __init__(self, order_id, coin, side, size, kind, price, active_at, on_fill):
+        self.id = order_id
+        self.coin = coin
+        self.side = side
+        self.size = size
+        self.kind = kind
+        self.price = price  # limit price or stop trigger; None for market orders
+        self.active_at = active_at
+        self.on_fill = on_fill
+        self.status = "pending"  # pending -> open -> filled, or cancelled
+        self.fill = None
+
+
+class Fill:
+    def __init__(self, order, price, fee, ts):
+        self.order_id = order.id
+        self.coin = order.coin
+        self.side = order.side
+        self.size = order.size
+        self.price = price
+        self.fee = fee
+        self.ts = ts
+
+    def __repr__(self):
+        return f"Fill({self.side} {self.size:g} {self.coin} @ {self.price:g}, fee {self.fee:g})"
+
+
+class OrderBook:
+    """
+    Resting orders on one coin, indexed by the price that fills them: buy
+    limits in a max-heap, sell limits in a min-heap, and the stop triggers
+    the other way round, so a quote that crosses nothing costs four
+    comparisons. Cancelled orders are skipped when they surface.
+    """
+
+    def __init__(self, coin):
+        self.coin = coin
+        self.pending = deque()  # submitted orders waiting out the latency, oldest first
+        self.buy_limits = []  # (-limit, id, order): fill when ask <= limit
+        self.sell_limits = []  # (limit, id, order): fill when bid >= limit
+        self.buy_stops = []  # (trigger, id, order): fill when ask >= trigger
+        self.sell_stops = []  # (-trigger, id, order): fill when bid <= trigger
+        self.bid = None
+        self.ask = None
+        self.ts = None
+
+    @staticmethod
+    def _top(heap):
+        while heap and heap[0][2].status != "open":
+            heapq.heappop(heap)
+        return heap[0] if heap else None
+
+    def idle(self):
+        return not (self.pending or self.buy_limits or self.sell_limits or self.buy_stops or self.sell_stops)
+
+    def levels(self):
+        """(next activation time, highest buy limit, lowest sell limit, lowest buy stop, highest sell stop)"""
+        buy_limit, sell_limit = self._top(self.buy_limits), self._top(self.sell_limits)
+        buy_stop, sell_stop = self._top(self.buy_stops), self._top(self.sell_stops)
+        return (
+            self.pending[0].active_at if self.pending else np.inf,
+            -buy_limit[0] if buy_limit else -np.inf,
+            sell_limit[0] if sell_limit else np.inf,
+            buy_stop[0] if buy_stop else np.inf,
+            -sell_stop[0] if sell_stop else -np.inf,
+        )
+
+    def rest(self, order):
+        order.status = "open"
+        if order.kind == LIMIT:
+            heap, key = (self.buy_limits, -order.price) if order.side == BUY else (self.sell_limits, order.price)
+        else:
+            heap, key = (self.buy_stops, order.price) if order.side == BUY else (self.sell_stops, -order.price)
+        heapq.heappush(heap, (key, order.id, order))
+
+    def crossed(self):
+        """Pops the resting orders the current bid/ask fills, as (order, taker) pairs"""
+        bid, ask = self.bid, self.ask
+        orders = []
+        while (top := self._top(self.buy_limits)) is not None and ask <= -top[0]:
+            orders.append((heapq.heappop(self.buy_limits)[2], False))
+        while (top := self._top(self.sell_limits)) is not None and bid >= top[0]:
+            orders.append((heapq.heappop(self.sell_limits)[2], False))
+        while (top := self._top(self.buy_stops)) is not None and ask >= top[0]:
+            orders.append((heapq.heappop(self.buy_stops)[2], True))
+        while (top := self._top(self.sell_stops)) is not None and bid <= -top[0]:
+            orders.append((heapq.heappop(self.sell_stops)[2], True))
+        return orders
+
+
+class PaperExchange:
+    """
+    Simulated venue for paper trading, backtests and load tests. Market,
+    limit and stop orders are matched against the quotes fed to `quote` (or
+    whole tick arrays fed to `replay`). The quoted price is taken as the mid:
+    buys pay the ask and sells get the bid, `spread` % apart. Market orders
+    and triggered stops fill `slippage` % beyond that, resting limits fill at
+    their limit, and every fill pays `fee` % of its notional. Orders reach the
+    matching engine `latency` seconds after they are submitted.
+
+    With `prices(coin, ts)` (a replay's price lookup), market orders fill
+    right away at the quote `latency` seconds on, so a simulation doesn't
+    need to tick the exchange in between. Each order's `on_fill(fill)` is
+    called as it fills.
+    """
+
+    def __init__(self, spread=SPREAD, fee=FEE, slippage=SLIPPAGE, latency=LATENCY, clock=time.time, prices=None):
+        self.spread = float(spread)
+        self.fee = float(fee)
+        self.slippage = float(slippage)
+        self.latency = float(latency)
+        self.clock = clock
+        self.prices = prices
+        self.books = {}
+        self.orders = {}  # id -> order, for orders not yet filled or cancelled
+        self.fills = 0
+        self.volume = 0.0
+        self.fees = 0.0
+        self._ids = itertools.count(1)
+        self._half_spread = self.spread / 200
+        self._slip = self.slippage / 100
+
+    def book(self, coin):
+        book = self.books.get(coin)
+        if book is None:
+            book = self.books[coin] = OrderBook(coin)
+        return book
+
+    def submit(self, coin, side, size, kind=MARKET, price=None, on_fill=None):
+        """Places an order and returns it; a market order may already be filled on return"""
+        if side not in (BUY, SELL):
+            raise ValueError(f"Unknown order side {side!r}")
+        if kind not in (MARKET, LIMIT, STOP):
+            raise ValueError(f"Unknown order type {kind!r}")
+        if kind != MARKET and price is None:
+            raise ValueError(f"A {kind} order needs a price")
+        if size <= 0:
+            raise ValueError(f"Order size must be positive, got {size}")
+        now = self.clock()
+        order = Order(next(self._ids), coin, side, float(size), kind, price, now + self.latency, on_fill)
+        self.orders[order.id] = order
+        metrics.inc("orders_submitted_total", kind=kind)
+
+        if kind == MARKET and self.prices is not None:
+            ts = order.active_at
+            mid = self.prices(coin, ts)
+            self._fill(order, self._taker_price(side, mid * (1 - self._half_spread), mid * (1 + self._half_spread)), ts)
+            return order
+
+        book = self.book(coin)
+        if self.latency <= 0 and book.ts is not None:
+            self._activate(book, order, now)
+        else:
+            book.pending.append(order)
+        return order
+
+    def cancel(self, order_id):
+        """Cancels an order that hasn't filled; returns whether it was still live"""
+        order = self.orders.pop(order_id, None)
+        if order is None:
+            return False
+        order.status = "cancelled"
+        book = self.books.get(order.coin)
+        if book is not None and order in book.pending:
+            book.pending.remove(order)
+        return True
+
+    def open_orders(self, coin=None):
+        return [order for order in self.orders.values() if coin is None or order.coin == coin]
+
+    def quote(self, coin, price, ts=None):
+        """Matches the coin's orders against one quote; returns the fills it produced"""
+        book = self.books.get(coin)
+        if book is None:
+            book = self.book(coin)
+        book.bid = price * (1 - self._half_spread)
+        book.ask = price * (1 + self._half_spread)
+        book.ts = self.clock() if ts is None else ts
+        if book.idle():
+            return []
+
+        fills = []
+        while book.pending and book.pending[0].active_at <= book.ts:
+            fill = self._activate(book, book.pending.popleft(), book.ts)
+            if fill is not None:
+                fills.append(fill)
+        for order, taker in book.crossed():
+            if taker:
+                price = self._taker_price(order.side, book.bid, book.ask)
+            else:
+                price = order.price
+            fills.append(self._fill(order, price, book.ts))
+        return fills
+
+    def replay(self, coin, ts, prices):
+        """
+        Feeds a whole tick array. Between fills only vectorized comparisons
+        over REPLAY_CHUNK ticks run, so quiet stretches cost close to nothing.
+        Returns the fills in order.
+        """
+        ts = np.asarray(ts, dtype=np.float64)
+        prices = np.asarray(prices, dtype=np.float64)
+        book = self.book(coin)
+        fills = []
+        i, n = 0, len(prices)
+        while i < n:
+            if book.idle():
+                self.quote(coin, float(prices[-1]), float(ts[-1]))
+                break
+            active_at, buy_limit, sell_limit, buy_stop, sell_stop = book.levels()
+            end = min(i + REPLAY_CHUNK, n)
+            chunk = prices[i:end]
+            bids = chunk * (1 - self._half_spread)
+            asks = chunk * (1 + self._half_spread)
+            events = (ts[i:end] >= active_at) | (asks <= buy_limit) | (bids >= sell_limit) | (asks >= buy_stop) | (bids <= sell_stop)
+            hit = int(np.argmax(events))
+            if not events[hit]:
+                book.bid, book.ask, book.ts = float(bids[-1]), float(asks[-1]), float(ts[end - 1])
+                i = end
+                continue
+            i += hit
+            fills.extend(self.quote(coin, float(prices[i]), float(ts[i])))
+            i += 1
+        return fills
+
+    def _activate(self, book, order, ts):
+        if order.status != "pending":
+            return None
+        if order.kind == MARKET:
+            return self._fill(order, self._taker_price(order.side, book.bid, book.ask), ts)
+        if order.kind == LIMIT and (book.ask <= order.price if order.side == BUY else book.bid >= order.price):
+            # Marketable on arrival: fills at the touch, which is at least as good as the limit
+            return self._fill(order, book.ask if order.side == BUY else book.bid, ts)
+        if order.kind == STOP and (book.ask >= order.price if order.side == BUY else book.bid <= order.price):
+            return self._fill(order, self._taker_price(order.side, book.bid, book.ask), ts)
+        book.rest(order)
+        return None
+
+    def _taker_price(self, side, bid, ask):
+        return ask * (1 + self._slip) if side == BUY else bid * (1 - self._slip)
+
+    def _fill(self, order, price, ts):
+        fill = Fill(order, price, price * order.size * self.fee / 100, ts)
+        order.status = "filled"
+        order.fill = fill
+        self.orders.pop(order.id, None)
+        self.fills += 1
+        self.volume += price * order.size
+        self.fees += fill.fee
+        metrics.inc("orders_filled_total", side=order.side)
+        log.debug("💱 Order filled", coin=order.coin, side=order.side, kind=order.kind, size=order.size,
+                  price=price, fee=fill.fee)
+        if order.on_fill is not None:
+            order.on_fill(fill)
+        return fill
@@ -0,0 +1,244 @@
+import asyncio
+import json
+import os
+import random
+from engine import Ticker, run_blocking
+from market import get_source, PRIORITY_POSITION
+from telemetry import get_logger, metrics
+
+STREAM_STALE_AFTER = 15  # seconds without a streamed price before a coin is polled
+POLL_INTERVAL = 10  # seconds between polls when no interval function is given
+RECONNECT_DELAY = 1  # first reconnect delay, doubled per failed attempt
+MAX_RECONNECT_DELAY = 60
+
+# PRICE_FEED=poll (default), websocket, or replay:<tick file>
+PRICE_FEED = os.environ.get("PRICE_FEED", "poll")
+
+log = get_logger("feed")
+
+
+async def fetch_price(coin):
+    return await run_blocking(get_source().getPrice, coin, PRIORITY_POSITION)
+
+
+class PriceFeed:
+    """
+    Pushes prices to subscribers. `prices(coin)` is an async iterator that
+    yields every streamed price for the coin. While the stream is down, or
+    the coin has been silent for `stale_after` seconds, it polls `get_price`
+    instead on a Ticker aligned to `epoch`. The base class never streams, so
+    on its own it is a plain poller; subclasses run a background task that
+    calls `publish`.
+    """
+
+    def __init__(self, get_price=fetch_price, epoch=None, stale_after=STREAM_STALE_AFTER):
+        self.get_price = get_price
+        self.epoch = epoch
+        self.stale_after = stale_after
+        self.connected = False
+        self.latest = {}  # coin -> (loop time, price)
+        self._subscribers = {}
+        self._task = None
+
+    def start(self):
+        """Starts the stream task, if any (needs a running event loop)"""
+        if self._task is None or self._task.done():
+            stream = self.stream()
+            if stream is not None:
+                self._task = asyncio.ensure_future(stream)
+
+    def stream(self):
+        """Coroutine publishing prices until cancelled, or None for a polling-only feed"""
+        return None
+
+    async def close(self):
+        if self._task is not None:
+            self._task.cancel()
+            try:
+                await self._task
+            except asyncio.CancelledError:
+                pass
+            self._task = None
+        self.set_connected(False)
+
+    def set_connected(self, connected):
+        if connected == self.connected:
+            return
+        self.connected = connected
+        # Wake every subscriber so it re-plans between streaming and polling
+        for queues in self._subscribers.values():
+            for queue in queues:
+                if queue.empty():
+                    queue.put_nowait(None)
+
+    def publish(self, coin, price):
+        self.latest[coin] = (asyncio.get_running_loop().time(), price)
+        for queue in self._subscribers.get(coin, ()):
+            self._offer(queue, price)
+
+    @staticmethod
+    def _offer(queue, item):
+        # Subscribers only need the newest price, so a slow one skips ahead
+        if queue.full():
+            queue.get_nowait()
+        queue.put_nowait(item)
+
+    def streaming(self, coin):
+        return self.connected
+
+    async def poll(self, coin):
+        metrics.inc("feed_polls_total", coin=coin)
+        return await self.get_price(coin)
+
+    async def prices(self, coin, interval=None):
+        """
+        Yields the coin's prices as they arrive. `interval(price)` sets the
+        seconds until the next poll while falling back to polling.
+        """
+        self.start()
+        loop = asyncio.get_running_loop()
+        queue = asyncio.Queue(maxsize=1)
+        self._subscribers.setdefault(coin, set()).add(queue)
+        ticker = Ticker(POLL_INTERVAL, self.epoch)
+        try:
+            latest = self.latest.get(coin)
+            if self.streaming(coin) and latest and loop.time() - latest[0] < self.stale_after:
+                price = latest[1]
+            else:
+                price = await self.poll(coin)
+            while True:
+                yield price
+                if interval is not None:
+                    ticker.interval = interval(price)
+                price = poll_at = None
+                while price is None:  # None means the connection state changed
+                    if self.streaming(coin):
+                        deadline = loop.time() + self.stale_after
+                    else:
+                        poll_at = poll_at or ticker.next(loop.time())
+                        deadline = poll_at
+                    try:
+                        price = await asyncio.wait_for(queue.get(), max(0, deadline - loop.time()))
+                    except asyncio.TimeoutError:
+                        price = await self.poll(coin)
+        finally:
+            self._subscribers[coin].discard(queue)
+
+
+class PollingFeed(PriceFeed):
+    """Polls `get_price` only; the behaviour before streaming feeds existed"""
+
+
+class ReplayFeed(PriceFeed):
+    """
+    Streams recorded ticks ({coin: (ts, prices)}) in real time, `speed` times
+    faster than they were recorded. For exercising the streaming path offline;
+    polls still go to `get_price`.
+    """
+
+    def __init__(self, ticks, speed=1.0, get_price=fetch_price, epoch=None, stale_after=STREAM_STALE_AFTER):
+        super().__init__(get_price, epoch, stale_after)
+        self.ticks = ticks
+        self.speed = speed
+
+    @classmethod
+    def from_file(cls, path, coins, **kwargs):
+        from backtest import load_ticks
+        return cls({coin: load_ticks(path, coin)[:2] for coin in coins}, **kwargs)
+
+    async def stream(self):
+        loop = asyncio.get_running_loop()
+        events = sorted(
+            (float(ts), coin, float(price))
+            for coin, (stamps, prices) in self.ticks.items()
+            for ts, price in zip(stamps, prices)
+        )
+        if not events:
+            return
+        start, first = loop.time(), events[0][0]
+        self.set_connected(True)
+        try:
+            for ts, coin, price in events:
+                delay = start + (ts - first) / self.speed - loop.time()
+                if delay > 0:
+                    await asyncio.sleep(delay)
+                self.publish(coin, price)
+        finally:
+            self.set_connected(False)
+
+
+class WebSocketFeed(PriceFeed):
+    """
+    Binance's public aggregate-trade stream for the given coins, one
+    connection for all of them. Prices are USDT quotes, which track the USD
+    prices CoinGecko reports closely. Reconnects with exponential backoff and
+    polls CoinGecko while disconnected. Needs the optional `websockets`
+    package.
+    """
+
+    URL = "wss://stream.binance.com:9443/stream?streams="
+    SYMBOLS = {
+        "bitcoin": "btcusdt",
+        "ethereum": "ethusdt",
+        "solana": "solusdt",
+        "binancecoin": "bnbusdt",
+        "ripple": "xrpusdt",
+        "cardano": "adausdt",
+        "dogecoin": "dogeusdt",
+        "litecoin": "ltcusdt",
+    }
+
+    def __init__(self, coins, symbols=None, url=URL, get_price=fetch_price, epoch=None, stale_after=STREAM_STALE_AFTER):
+        try:
+            import websockets  # optional, imported only when streaming is used
+        except ImportError:
+            raise ImportError("WebSocketFeed needs the websockets package (pip install websockets)") from None
+        super().__init__(get_price, epoch, stale_after)
+        symbols = {**self.SYMBOLS, **(symbols or {})}
+        self.coins_by_symbol = {symbols[coin]: coin for coin in coins if coin in symbols}
+        self.url = url + "/".join(f"{symbol}@aggTrade" for symbol in self.coins_by_symbol)
+        for coin in coins:
+            if coin not in symbols:
+                log.warning("No stream symbol for coin, polling it instead", coin=coin)
+
+    def streaming(self, coin):
+        return self.connected and coin in self.coins_by_symbol.values()
+
+    async def stream(self):
+        if not self.coins_by_symbol:
+            return
+        import websockets
+        delay = RECONNECT_DELAY
+        while True:
+            try:
+                async with websockets.connect(self.url, ping_interval=20) as connection:
+                    self.set_connected(True)
+                    delay = RECONNECT_DELAY
+                    log.info("📡 Price stream connected", streams=len(self.coins_by_symbol))
+                    async for message in connection:
+                        data = json.loads(message).get("data", {})
+                        coin = self.coins_by_symbol.get(data.get("s", "").lower())
+                        if coin is not None:
+                            self.publish(coin, float(data["p"]))
+            except asyncio.CancelledError:
+                raise
+            except Exception as e:
+                log.warning("Price stream disconnected, polling meanwhile", error=str(e), retry_in=delay)
+            finally:
+                self.set_connected(False)
+            await asyncio.sleep(random.uniform(delay / 2, delay))
+            delay = min(delay * 2, MAX_RECONNECT_DELAY)
+
+
+def make_feed(coins, kind=PRICE_FEED, get_price=fetch_price, epoch=None):
+    """Builds the feed named by `kind` (see PRICE_FEED), falling back to polling"""
+    if kind == "websocket":
+        try:
+            return WebSocketFeed(coins, get_price=get_price, epoch=epoch)
+        except ImportError as e:
+            log.warning("Streaming unavailable, polling prices instead", error=str(e))
+    elif kind.startswith("replay:"):
+        return ReplayFeed.from_file(kind[len("replay:"):], coins, get_price=get_price, epoch=epoch)
+    elif kind != "poll":
+        raise ValueError(f"Unknown price feed {kind!r}")
+    return PollingFeed(get_price, epoch)
@@ -1,164 +1,464 @@
+import asyncio
+import functools
 import time
-import datetime
-from database.db import initialize_database, close_database, Market, clear_database
-from operation.getReady import makeReady
-from operation.strategy import TradingStrategy
-from trade_manager import manage_trade
-from market import getPrice, changesof24h
+import numpy as np
+from database.db import initialize_database, close_database, Market, record_tick, recent_ticks, record_trade, recent_candles
+from database.candles import get_candles
+from database.snapshot import save_snapshot, load_snapshot, snapshot_age, SNAPSHOT_INTERVAL, WINDOW_MAX_AGE, POSITION_MAX_AGE
+from database.window import get_window, reset_window
+from engine import QuoteBatcher, Ticker, run_blocking
+from events import TICK, SIGNAL, POSITION, STATE
+from feed import PriceFeed, make_feed, PRICE_FEED
+from market import get_source, PRIORITY_POSITION, PRIORITY_SIGNAL, PRIORITY_COLLECT
+from operation.strategy import TradingStrategy, MOMENTUM_THRESHOLD
+from operation.volatility import get_indicators, reset_indicators
+from positions import PositionManager
+from telemetry import get_logger, metrics
+from trade_manager import open_trade, trade_state, restore_trade
+
+WINDOW_SIZE = 60  # price points required before a coin is traded
+COLLECT_INTERVAL = 10  # seconds between price points during the initial warm-up
+TRADE_INTERVAL = 60  # seconds between signal checks and post-trade price points
+BACKFILL_MAX_LAG = COLLECT_INTERVAL  # seconds the newest history point may trail the clock for a backfill
+BACKFILL_MAX_GAP = 1.5  # widest gap between history points a backfill interpolates across, in warm-up spacings
+DAY = 24 * 60 * 60
+
+log = get_logger("bot")
+
+
+class CoinState:
+    """Per-coin progress through warm-up, signal checks and post-trade cool-down"""
+
+    def __init__(self, coin, pending=WINDOW_SIZE):
+        self.coin = coin
+        self.pending = pending  # price points still needed before checking signals
+        self.warming_up = True  # first collection after start, polled every COLLECT_INTERVAL
+        self.price = None
+        self.changes24 = None
+
+    @property
+    def ready(self):
+        return self.pending <= 0
+
 
 class TradingBot:
-    def __init__(self, total_money=1000, risk_percentage=2, mode="default", target_profit=1):
+    """
+    Runs every coin's data collection and signal checks as tasks on one
+    asyncio event loop, with open positions monitored by a PositionManager
+    (up to `positions_per_coin` per coin). `start` blocks the calling thread until
+    the bot is stopped; `stop` may be called from any thread and takes effect
+    immediately. Trades go to `recorder` and checkpoints to `save_checkpoint`,
+    which a cluster worker points at its supervisor (see cluster.py). Every
+    quote is also folded into the coin's 1m/5m/1h candles (database.candles);
+    `average_timeframe` makes the trend filter average candle closes, and
+    the `indicators` the strategy declares are updated as candles close.
+    With a PaperExchange as `exchange`, trades fill on it against the same
+    quotes instead of at the checked price. With `backfill`, a coin's first
+    window comes from one bulk history request instead of the live warm-up,
+    when the source's history is as fine as the warm-up spacing.
+    Ticks, signals, fills, positions and state changes are published to
+    `events` (an events.EventBus) for the UI.
+    """
+
+    def __init__(self, total_money=1000, risk_percentage=2, mode="default", target_profit=1, coins=None,
+                 window_size=WINDOW_SIZE, momentum_threshold=MOMENTUM_THRESHOLD, source=None, feed=None,
+                 positions_per_coin=1, warm_start=True, recorder=record_trade, save_checkpoint=save_snapshot,
+                 load_checkpoint=load_snapshot, average_timeframe=None, indicators=(), exchange=None, backfill=False,
+                 events=None):
+        self.source = source or get_source()
+        self.events = events
+        if events is not None:
+            recorder = events.recorder(recorder)
+        self.feed = feed  # PriceFeed for open trades, or a PRICE_FEED kind to build one from on start
         self.strategy = TradingStrategy(
             total_money=total_money,
             risk_percentage=risk_percentage,
             mode=mode,
-            target_profit=target_profit
+            target_profit=target_profit,
+            momentum_threshold=momentum_threshold,
+            source=self.source,
+            recorder=recorder,
+            average_timeframe=average_timeframe,
+            indicators=indicators
         )
         self.total_money = float(total_money)
         self.mode = mode.lower()
         self.target_profit = float(target_profit)
+        self.coins = normalize_coins(coins)
+        self.window_size = int(window_size)
+        self.positions_per_coin = int(positions_per_coin)
+        self.warm_start = warm_start  # resume windows and positions from the last checkpoint
+        self.recorder = recorder  # records trades (the trade journal by default)
+        self.save_checkpoint = save_checkpoint
+        self.load_checkpoint = load_checkpoint
+        self.exchange = exchange
+        self.backfill = backfill
+        self.positions = None
+        self.states = {}
         self.is_running = False
-        
-    def start(self, coin="bitcoin"):
+        self.loop = None
+        self.batcher = None
+        self.epoch = None
+        self._feed = None
+        self._task = None
+        self._started = None
+        self._checkpoint_due = None
+
+    def start(self, coins=None):
         """Start the trading bot"""
+        if coins:
+            self.coins = normalize_coins(coins)
+        self.states = {coin: CoinState(coin, self.window_size) for coin in self.coins}
         self.is_running = True
-        print(f"[{datetime.datetime.now()}] === Trading Bot Started ===")
-        print(f"[{datetime.datetime.now()}] Mode: {self.mode}, Money: ${self.total_money}")
-        self.marketValidation(coin)
-        
+        self._started = time.perf_counter()
+        log.info("=== Trading Bot Started ===", mode=self.mode, money=self.total_money, coins=",".join(self.coins))
+        self.publish(STATE, status="starting", bot=id(self))
+        try:
+            asyncio.run(self.run())
+        except Exception as e:
+            self.is_running = False
+            self.publish(STATE, status="error", error=str(e), bot=id(self))
+            raise
+
     def stop(self):
         """Stop the trading bot"""
         self.is_running = False
-        print(f"[{datetime.datetime.now()}] === Trading Bot Stopped ===")
-        
-    def marketValidation(self, coin):
-        """
-        Collects price data every minute until 60 data points are available.
-        Then, it starts trade execution.
-        """
-        print(f"[{datetime.datetime.now()}] Starting market validation for {coin}")
-        while self.is_running:
+        loop, task = self.loop, self._task
+        if loop is not None and task is not None and not loop.is_closed():
+            loop.call_soon_threadsafe(task.cancel)
+        log.info("=== Trading Bot Stopped ===")
+
+    async def run(self):
+        """Runs one task per coin until the bot is stopped"""
+        self.loop = asyncio.get_running_loop()
+        self._task = asyncio.current_task()
+        self.batcher = QuoteBatcher(self.source.getQuotes)
+        # Shared epoch so every coin's ticks line up and get batched into one fetch
+        self.epoch = self.loop.time()
+        if not self.is_running:
+            self.publish(STATE, status="stopped", bot=id(self))
+            return
+
+        metrics.gauge("quote_cache", self.source.stats)
+
+        self._feed = self.feed if isinstance(self.feed, PriceFeed) else make_feed(
+            self.coins,
+            self.feed or PRICE_FEED,
+            get_price=functools.partial(self.batcher.get_price, priority=PRIORITY_POSITION),
+            epoch=self.epoch
+        )
+        self._feed.start()
+        self.positions = PositionManager(self._feed, self.on_trade_closed, self.positions_per_coin, self.fold_price)
+        self._checkpoint_due = asyncio.Event()
+        initialize_database()
+        if self.warm_start:
+            self.restore()
+        tasks = [asyncio.ensure_future(self.run_market(coin)) for coin in self.coins]
+        tasks.append(asyncio.ensure_future(self.run_checkpoints()))
+        self.publish(STATE, status="running", bot=id(self))
+        try:
+            await asyncio.gather(*tasks)
+        except asyncio.CancelledError:
+            pass
+        finally:
+            for task in tasks:
+                task.cancel()
+            await self.positions.close()
+            await self._feed.close()
             try:
-                initialize_database()
-                price, changes24 = makeReady(coin)
-                print(f"[{datetime.datetime.now()}] Current {coin} price: ${price:.2f}, 24h change: {changes24:.2f}%")
+                self.save_checkpoint(self.snapshot())
+            except Exception as e:
+                log.exception("❌ Final checkpoint failed", error=str(e))
+            close_database()
+            self.is_running = False
+            self.publish(STATE, status="stopped", bot=id(self))
 
-                market, created = Market.get_or_create(name=coin)
-                if created:
-                    print(f"[{datetime.datetime.now()}] Created new market entry for {coin}")
-                
-                price_ranges = market.get_price_ranges()
-                changes_range = market.get_changes_range()
+    def publish(self, kind, **fields):
+        if self.events is not None:
+            self.events.publish(kind, **fields)
 
-                price_ranges.append(price)
-                changes_range.append(changes24)
+    def snapshot(self):
+        """Coin progress and open positions, as written to the checkpoint file"""
+        return {
+            "window_size": self.window_size,
+            "states": {coin: {"pending": state.pending, "warming_up": state.warming_up} for coin, state in self.states.items()},
+            "positions": [trade_state(trade) for _, _, trade in self.positions.positions()],
+        }
 
-                # Keep last 60 values
-                price_ranges = price_ranges[-60:]
-                changes_range = changes_range[-60:]
+    async def run_checkpoints(self):
+        """Saves a snapshot every SNAPSHOT_INTERVAL seconds and right after positions open or close"""
+        while True:
+            try:
+                await asyncio.wait_for(self._checkpoint_due.wait(), SNAPSHOT_INTERVAL)
+            except asyncio.TimeoutError:
+                pass
+            self._checkpoint_due.clear()
+            try:
+                await run_blocking(self.save_checkpoint, self.snapshot())
+            except Exception as e:
+                log.exception("❌ Checkpoint failed", error=str(e))
 
-                market.set_price_ranges(price_ranges)
-                market.set_changes_range(changes_range)
-                market.save()
+    def restore(self):
+        """
+        Warm restart: rebuilds each coin's window from its recorded ticks, reloads
+        its closed candles and resumes progress and open positions from the last checkpoint. Windows
+        and progress older than WINDOW_MAX_AGE, and positions older than
+        POSITION_MAX_AGE, are discarded. Candles are reloaded only as far back as
+        their series holds; the first live tick fills the downtime with flat candles.
+        The strategy's indicators are rebuilt from the candles.
+        """
+        snapshot = self.load_checkpoint()
+        age = snapshot_age(snapshot) if snapshot else None
+        fresh = snapshot is not None and age <= WINDOW_MAX_AGE and snapshot.get("window_size") == self.window_size
+        cutoff = time.time() - WINDOW_MAX_AGE
 
-                print(f"[{datetime.datetime.now()}] Collected price point {len(price_ranges)}/60 for {coin}: ${price:.2f}")
+        for coin, state in self.states.items():
+            ticks = recent_ticks(coin, self.window_size)
+            if not ticks or ticks[-1].ts < cutoff:
+                continue
+            window = reset_window(coin, self.window_size)
+            for tick in ticks:
+                window.append(tick.price, tick.change24h)
+            saved = snapshot["states"].get(coin) if fresh else None
+            state.pending = self.window_size - len(ticks)
+            if saved is not None:
+                state.pending = max(state.pending, saved["pending"])
+            state.warming_up = (saved["warming_up"] if saved is not None else True) and not state.ready
+            log.info("♻️ Restored price window", coin=coin, points=len(ticks), pending=max(state.pending, 0))
 
-                if len(price_ranges) == 60:
-                    print(f"[{datetime.datetime.now()}] ✅ 60 prices collected for {coin}. Ready to check trade signals.")
-                    self.performAction(price_ranges, changes_range, coin)
-                    break  # Stop collecting once trade starts
+        now = time.time()
+        for coin in self.states:
+            candles = get_candles(coin)
+            for timeframe, series in candles.series.items():
+                if len(series) == 0:
+                    since = now - series.seconds * (series.capacity + 1)
+                    series.load(recent_candles(coin, timeframe, series.capacity, since))
+            if self.strategy.indicators:
+                # A fresh set, so a restart in the same process doesn't feed the candles in twice
+                indicators = reset_indicators(coin, self.strategy.indicators)
+                for candle in candles.candles(self.strategy.indicator_timeframe):
+                    indicators.update_candle(candle)
 
-            except Exception as e:
-                print(f"[{datetime.datetime.now()}] ERROR in market validation: {str(e)}")
-            finally:
-                close_database()
+        positions = snapshot.get("positions", []) if snapshot else []
+        if positions and age > POSITION_MAX_AGE:
+            log.warning("⚠️ Discarding stale open positions", positions=len(positions), age_seconds=round(age))
+            positions = []
+        for saved in positions:
+            trade = restore_trade(saved, self.recorder, self.exchange)
+            self.positions.open(trade)
+            self.publish(POSITION, coin=trade.coin, status="open", price=trade.buy_price)
+            log.info("♻️ Resumed open position", coin=trade.coin, buy_price=trade.buy_price, stop=trade.stop_price, target=trade.next_target)
 
-            if not self.is_running:
-                break
-                
-            time.sleep(10)
+    def store_price_point(self, coin):
+        """Appends the coin's latest quote to its rolling window and the tick history"""
+        state = self.states[coin]
+        with metrics.span("persist"):
+            window = get_window(coin, self.window_size)
+            window.append(state.price, state.changes24)
+            record_tick(coin, state.price, state.changes24)
+        metrics.inc("price_points_total", coin=coin)
+        state.pending -= 1
+        return len(window)
 
-    def wait_for_new_data(self, coin):
+    async def run_market(self, coin):
         """
-        Waits for 60 new price updates before re-checking buy signals.
+        Collects price data every 10 seconds until 60 data points are available.
+        Then it checks trade signals every minute while the coin has room for
+        another position, and after a trade closes it collects 60 new prices
+        before trading the coin again.
         """
-        print(f"[{datetime.datetime.now()}] Starting new data collection cycle for {coin}")
+        state = self.states[coin]
+        ticker = Ticker(COLLECT_INTERVAL, self.epoch)
+        log.info("Starting market validation", coin=coin)
+        market, created = Market.get_or_create(name=coin)
+        if created:
+            log.info("Created new market entry", coin=coin)
+
+        if self.backfill and not state.ready:
+            await self.backfill_window(coin)
+
         while self.is_running:
+            if state.ready and not self.positions.can_open(coin):
+                await ticker.wait()
+                continue
             try:
-                initialize_database()
-                market = Market.get(Market.name == coin)
-                starting_price_data = len(market.get_price_ranges())
-                print(f"[{datetime.datetime.now()}] Starting with {starting_price_data} existing price points")
+                priority = PRIORITY_SIGNAL if state.ready else PRIORITY_COLLECT
+                state.price, state.changes24 = await self.batcher.get(coin, priority)
+                self.fold_price(coin, state.price)
+                if self._started is not None:
+                    log.info("First quotes received", startup_ms=round((time.perf_counter() - self._started) * 1000, 1))
+                    self._started = None
 
-                while len(market.get_price_ranges()) < starting_price_data + 60 and self.is_running:
-                    price, changes24 = makeReady(coin)
-                    
-                    price_ranges = market.get_price_ranges()
-                    changes_range = market.get_changes_range()
+                if state.ready:
+                    await self.check_signal(coin)
+                else:
+                    collected = self.store_price_point(coin)
+                    self.report_collection(state, collected)
 
-                    price_ranges.append(price)
-                    changes_range.append(changes24)
+            except asyncio.CancelledError:
+                raise
+            except Exception as e:
+                metrics.inc("market_errors_total", coin=coin)
+                log.exception("ERROR in market task", coin=coin, error=str(e))
 
-                    price_ranges = price_ranges[-60:]
-                    changes_range = changes_range[-60:]
+            ticker.interval = COLLECT_INTERVAL if state.warming_up else TRADE_INTERVAL
+            await ticker.wait()
 
-                    market.set_price_ranges(price_ranges)
-                    market.set_changes_range(changes_range)
-                    market.save()
+    async def backfill_window(self, coin):
+        """
+        Seeds the coin's window with the prices a poll every COLLECT_INTERVAL
+        would have seen, resampled from one bulk history request, so trading
+        starts without the live warm-up. Returns False, leaving the live
+        warm-up to fill the window, when the source has no history or it is
+        too short, coarser than the warm-up spacing or stale. A source whose
+        declared history_resolution is coarser (CoinGecko's 5 minutes) isn't
+        asked at all, so the request isn't spent on an answer that can't be used.
+        """
+        state = self.states[coin]
+        resolution = self.source.history_resolution
+        if resolution is None or resolution > COLLECT_INTERVAL:
+            log.debug("No price history as fine as the warm-up spacing, collecting live", coin=coin,
+                      resolution=resolution)
+            return False
+        try:
+            with metrics.span("backfill"):
+                ts, prices = await run_blocking(self.source.getHistory, coin)
+        except NotImplementedError:
+            log.debug("No price history from this source, collecting live", coin=coin)
+            return False
+        except Exception as e:
+            log.warning("⚠️ Backfill failed, collecting live", coin=coin, error=str(e))
+            return False
 
-                    current_count = len(price_ranges) - starting_price_data
-                    print(f"[{datetime.datetime.now()}] Waiting for new price data... {current_count}/60 collected (${price:.2f}, {changes24:.2f}%)")
-                    time.sleep(60)
+        points = resample_history(ts, prices, self.window_size, COLLECT_INTERVAL)
+        if points is None or time.time() - ts[-1] > BACKFILL_MAX_LAG:
+            log.warning("⚠️ Price history too short, gappy or stale, collecting live", coin=coin, points=len(ts))
+            return False
+        window = reset_window(coin, self.window_size)
+        for tick_ts, price, change in zip(*points):
+            window.append(price, change)
+            record_tick(coin, price, change, tick_ts)
+        state.pending = 0
+        state.warming_up = False
+        log.info("⏩ Backfilled price window", coin=coin, points=self.window_size, history_points=len(ts))
+        return True
 
-                if self.is_running:
-                    print(f"[{datetime.datetime.now()}] ✅ 60 new prices collected for {coin}. Resuming trading...")
-                    break
+    def fold_price(self, coin, price):
+        """
+        Folds a quote into the coin's candles (closed candles are written with
+        the ticks and update the indicators) and matches it on the paper exchange
+        """
+        if self.exchange is not None:
+            self.exchange.quote(coin, price)
+        self.publish(TICK, coin=coin, price=price)
+        closed = get_candles(coin).add(time.time(), price)
+        if closed and self.strategy.indicators:
+            indicators = get_indicators(coin, self.strategy.indicators)
+            for timeframe, candle in closed:
+                if timeframe == self.strategy.indicator_timeframe:
+                    indicators.update_candle(candle)
 
-            except Exception as e:
-                print(f"[{datetime.datetime.now()}] ERROR during price data collection: {str(e)}")
+    def report_collection(self, state, window_length):
+        coin = state.coin
+        if state.warming_up:
+            log.debug("Collected price point", coin=coin, collected=window_length, needed=self.window_size, price=state.price)
+            if state.ready:
+                state.warming_up = False
+                log.info("✅ Prices collected. Ready to check trade signals.", coin=coin, collected=self.window_size)
+        else:
+            log.debug("Waiting for new price data...", coin=coin, collected=self.window_size - state.pending,
+                      needed=self.window_size, price=state.price, change24h=state.changes24)
+            if state.ready:
+                log.info("✅ New prices collected. Resuming trading...", coin=coin, collected=self.window_size)
 
-            finally:
-                close_database()
+    def on_trade_closed(self, trade):
+        self._checkpoint_due.set()
+        self.publish(POSITION, coin=trade.coin, status="closed", profit=trade.profit)
+        if self.is_running and trade.coin in self.states:
+            log.info("🔄 Trade closed. Waiting for new price updates before next buy attempt...", coin=trade.coin, needed=self.window_size)
+            self.wait_for_new_data(trade.coin)
 
-    def performAction(self, price_ranges, changes_range, coin):
+    def wait_for_new_data(self, coin):
         """
-        Checks buy/sell signals and executes trades accordingly.
-        After a trade is closed, it waits for another 60 new prices before attempting to trade again.
+        Puts the coin into cool-down: it needs 60 new price updates before
+        its buy signals are re-checked.
         """
-        print(f"[{datetime.datetime.now()}] Entering trading mode for {coin}")
-        while self.is_running:
-            signal, level = self.strategy.momentum_based_entry_signal(coin, 1)
-            print(f"[{datetime.datetime.now()}] Strategy signal for {coin}: {signal} (strength level: {level})")
-
-            if signal == "buy":
-                buy_price = getPrice(coin)
-                print(f"[{datetime.datetime.now()}] 💰 BUY SIGNAL detected at ${buy_price:.2f}. Opening trade...")
-                
-                trade_closed = manage_trade(
-                    coin=coin,
-                    buy_price=buy_price,
-                    total_money=self.total_money,
-                    mode=self.mode,
-                    profit_percent=self.target_profit
-                )
-                
-                if trade_closed and self.is_running:
-                    print(f"[{datetime.datetime.now()}] 🔄 Trade closed. Waiting for 60 new price updates before next buy attempt...")
-                    self.wait_for_new_data(coin)
-            else:
-                print(f"[{datetime.datetime.now()}] 🚫 No buy signal for {coin}. Waiting...")
-
-            if not self.is_running:
-                break
-                
-            time.sleep(60)
+        log.info("Starting new data collection cycle", coin=coin)
+        self.states[coin].pending = self.window_size
+
+    async def check_signal(self, coin):
+        """Evaluates the entry signal for one coin and opens a position on a buy"""
+        with metrics.span("signal"):
+            signal, level = await run_blocking(self.strategy.momentum_based_entry_signal, coin, 1)
+        metrics.inc("signals_total", signal=signal)
+        log.info("Strategy signal", coin=coin, signal=signal, level=level)
+        self.publish(SIGNAL, coin=coin, signal=signal, level=level)
+
+        if signal == "buy":
+            buy_price = await self.batcher.get_price(coin, PRIORITY_POSITION)
+            log.info("💰 BUY SIGNAL detected. Opening trade...", coin=coin, price=buy_price)
+            trade = open_trade(coin, buy_price, self.total_money, self.mode, self.target_profit, self.recorder,
+                               self.exchange)
+            self.positions.open(trade)
+            self._checkpoint_due.set()
+            self.publish(POSITION, coin=coin, status="open", price=buy_price)
+        else:
+            log.debug("🚫 No buy signal. Waiting...", coin=coin)
+
+
+def resample_history(ts, prices, count, spacing, max_gap=BACKFILL_MAX_GAP):
+    """
+    (timestamps, prices, 24h changes %) of `count` points `spacing` seconds
+    apart, ending at the newest history point and linearly interpolated
+    between history points. The 24h change is taken from the same history,
+    clamped to its oldest point. None when the history doesn't span them,
+    or has a gap wider than `max_gap` spacings among them: interpolating
+    across it would make up prices nobody quoted.
+    """
+    if len(ts) < 2:
+        return None
+    ts = np.asarray(ts, dtype=np.float64)
+    prices = np.asarray(prices, dtype=np.float64)
+    times = ts[-1] - spacing * np.arange(count - 1, -1, -1)
+    if times[0] < ts[0]:
+        return None
+    covered = ts[np.searchsorted(ts, times[0], side="right") - 1:]
+    if len(covered) < 2 or np.diff(covered).max() > max_gap * spacing:
+        return None
+    points = np.interp(times, ts, prices)
+    day_ago = np.interp(times - DAY, ts, prices)
+    return times.tolist(), points.tolist(), ((points / day_ago - 1) * 100).tolist()
+
+
+def normalize_coins(coins):
+    """Accepts a single coin id, a comma-separated string or a list of ids"""
+    if not coins:
+        return ["bitcoin"]
+    if isinstance(coins, str):
+        coins = coins.split(",")
+    return list(dict.fromkeys(coin.strip().lower() for coin in coins if coin.strip()))
 
 # This will be called from the UI
-def start_bot(total_money=1000, risk_percentage=2, mode="default", target_profit=1):
+def start_bot(total_money=1000, risk_percentage=2, mode="default", target_profit=1, coins=None,
+              window_size=WINDOW_SIZE, momentum_threshold=MOMENTUM_THRESHOLD, source=None, feed=None,
+              positions_per_coin=1, warm_start=True, average_timeframe=None, indicators=(), exchange=None,
+              backfill=False, events=None):
     bot = TradingBot(
         total_money=total_money,
         risk_percentage=risk_percentage,
         mode=mode,
-        target_profit=target_profit
+        target_profit=target_profit,
+        coins=coins,
+        window_size=window_size,
+        momentum_threshold=momentum_threshold,
+        source=source,
+        feed=feed,
+        positions_per_coin=positions_per_coin,
+        warm_start=warm_start,
+        average_timeframe=average_timeframe,
+        indicators=indicators,
+        exchange=exchange,
+        backfill=backfill,
+        events=events
     )
     return bot
@@ -1,13 +1,370 @@
 # market.py
+import heapq
+import itertools
+import os
+import random
+import threading
+import time
+from concurrent.futures import Future
+import requests
 from pycoingecko import CoinGeckoAPI
+from telemetry import get_logger, metrics
 
-cg = CoinGeckoAPI()
+QUOTE_TTL = 5  # seconds a fetched quote is reused before hitting CoinGecko again
 
-def getPrice(coin):
-    price = cg.get_price(ids=str(coin), vs_currencies='usd')
-    return price['bitcoin']['usd']
+# Requests per minute allowed by each CoinGecko API plan
+API_PLANS = {"demo": 30, "analyst": 500, "lite": 500, "pro": 1000}
+API_PLAN = os.environ.get("COINGECKO_PLAN", "demo")
 
+# Lower values are served first when requests queue up for the rate limit
+PRIORITY_POSITION = 0  # price checks on an open trade
+PRIORITY_SIGNAL = 1  # signal checks and one-off lookups
+PRIORITY_COLLECT = 2  # warm-up and cool-down price collection
+HISTORY_DAYS = 1  # history fetched for a backfill
+# Seconds between the market_chart points CoinGecko serves over HISTORY_DAYS (the stand-in's --chart-step when pointed at it)
+HISTORY_RESOLUTION = float(os.environ.get("COINGECKO_HISTORY_RESOLUTION", 300))
 
-def changesof24h(coin):
-    history = cg.get_price(coin, include_24hr_change=True, vs_currencies='usd')
-    return history['bitcoin']['usd_24h_change']
\ No newline at end of file
+log = get_logger("market")
+
+
+def plan_rate_limit(plan=API_PLAN):
+    """COINGECKO_RATE_LIMIT (requests per minute) overrides the plan's limit"""
+    override = os.environ.get("COINGECKO_RATE_LIMIT")
+    if override:
+        return float(override)
+    if plan not in API_PLANS:
+        raise ValueError(f"Unknown CoinGecko plan {plan!r}, expected one of {', '.join(API_PLANS)}")
+    return API_PLANS[plan]
+
+
+def retry_after(error):
+    """
+    Seconds to wait before retrying a failed API call (0 when the server gave
+    no hint), or None when retrying won't help. pycoingecko raises the JSON
+    error body as a ValueError, and requests' HTTPError when there is none.
+    The ValueError is raised while handling the HTTPError, so the response
+    headers are still reachable through its __context__.
+    """
+    if isinstance(error, (requests.ConnectionError, requests.Timeout)):
+        return 0
+    if isinstance(error, requests.HTTPError) and error.response is not None:
+        status = error.response.status_code
+        if status == 429 or status >= 500:
+            header = error.response.headers.get("Retry-After", "")
+            return float(header) if header.isdigit() else 0
+        return None
+    if isinstance(error, ValueError) and error.args and isinstance(error.args[0], dict):
+        if isinstance(error.__context__, requests.HTTPError):
+            return retry_after(error.__context__)
+        code = error_code(error)
+        if isinstance(code, int) and (code == 429 or code >= 500):
+            return 0
+    return None
+
+
+def error_code(error):
+    """The HTTP status behind a failed API call, or None when it never got a response"""
+    if isinstance(error, requests.HTTPError) and error.response is not None:
+        return error.response.status_code
+    if isinstance(error, ValueError) and error.args and isinstance(error.args[0], dict):
+        status = error.args[0].get("status")
+        return status.get("error_code") if isinstance(status, dict) else None
+    return None
+
+
+class RequestScheduler:
+    """
+    Token bucket shared by every call to one API. `rate_limit` requests per
+    minute refill the bucket, which holds up to `burst` tokens. Waiting calls
+    are served lowest `priority` first, so open positions are never stuck
+    behind warm-up collection. Rate-limited and server errors are retried with
+    exponential backoff and full jitter, and a 429 pauses every caller for
+    its Retry-After, or a full refill of the bucket when it sends none.
+    """
+
+    def __init__(self, rate_limit, burst=5, max_retries=4, base_backoff=1.0, max_backoff=60.0, seed=None):
+        self.rate = rate_limit / 60
+        self.burst = max(1, burst)
+        self.max_retries = max_retries
+        self.base_backoff = base_backoff
+        self.max_backoff = max_backoff
+        self.rng = random.Random(seed)
+        self._tokens = float(self.burst)
+        self._refilled = time.monotonic()
+        self._blocked_until = 0.0
+        self._waiting = []
+        self._sequence = itertools.count()
+        self._condition = threading.Condition()
+
+    def _refill(self, now):
+        self._tokens = min(self.burst, self._tokens + (now - self._refilled) * self.rate)
+        self._refilled = now
+
+    def acquire(self, priority=PRIORITY_SIGNAL):
+        """Blocks until this caller may send one request"""
+        entry = (priority, next(self._sequence))
+        start = time.monotonic()
+        with self._condition:
+            heapq.heappush(self._waiting, entry)
+            while True:
+                now = time.monotonic()
+                self._refill(now)
+                if self._waiting[0] is not entry:
+                    self._condition.wait()
+                    continue
+                delay = max(self._blocked_until - now, (1 - self._tokens) / self.rate, 0)
+                if delay <= 0:
+                    heapq.heappop(self._waiting)
+                    self._tokens -= 1
+                    self._condition.notify_all()
+                    break
+                self._condition.wait(delay)
+        metrics.observe("api_wait_seconds", time.monotonic() - start)
+
+    def pause(self, seconds):
+        """Holds every caller back for `seconds` and empties the bucket"""
+        with self._condition:
+            self._blocked_until = max(self._blocked_until, time.monotonic() + seconds)
+            self._tokens = 0.0
+            self._condition.notify_all()
+
+    def backoff(self, attempt):
+        return self.rng.uniform(0, min(self.max_backoff, self.base_backoff * 2 ** attempt))
+
+    def call(self, func, *args, priority=PRIORITY_SIGNAL):
+        for attempt in range(self.max_retries + 1):
+            self.acquire(priority)
+            metrics.inc("api_requests_total")
+            try:
+                return func(*args)
+            except Exception as e:
+                hint = retry_after(e)
+                if hint is None or attempt == self.max_retries:
+                    raise
+                delay = max(hint, self.backoff(attempt))
+                if error_code(e) == 429:
+                    delay = max(delay, hint or self.burst / self.rate)
+                metrics.inc("api_retries_total")
+                log.warning("⏳ API call failed, backing off", attempt=attempt + 1, delay=delay, error=str(e))
+                self.pause(delay)
+
+    def stats(self):
+        with self._condition:
+            self._refill(time.monotonic())
+            return {"tokens": self._tokens, "waiting": len(self._waiting)}
+
+
+class QuoteCache:
+    """
+    Caches (price, 24h change) quotes per coin for `ttl` seconds.
+    Callers asking for a coin that is already being fetched wait on that
+    request instead of starting a new one, and a batch of uncached coins is
+    fetched with one request.
+    """
+
+    def __init__(self, fetch, ttl=QUOTE_TTL, scheduler=None):
+        self.fetch = fetch
+        self.ttl = ttl
+        self.scheduler = scheduler
+        self.hits = 0
+        self.misses = 0
+        self.coalesced = 0
+        self.requests = 0
+        self._quotes = {}
+        self._inflight = {}
+        self._lock = threading.Lock()
+
+    def get(self, coin, priority=PRIORITY_SIGNAL):
+        quotes = self.get_many([coin], priority)
+        if coin not in quotes:
+            raise KeyError(f"No quote returned for {coin}")
+        return quotes[coin]
+
+    def get_many(self, coins, priority=PRIORITY_SIGNAL):
+        """
+        Returns {coin: (price, change)} for every coin that could be quoted.
+        Cached coins are served locally, coins already being fetched are
+        awaited, and all remaining coins are fetched in one request, queued
+        at `priority` when a scheduler rate-limits the fetches.
+        """
+        quotes = {}
+        waiting = {}
+        leading = {}
+        now = time.monotonic()
+        with self._lock:
+            for coin in dict.fromkeys(coins):
+                cached = self._quotes.get(coin)
+                if cached and now - cached[0] < self.ttl:
+                    self.hits += 1
+                    quotes[coin] = cached[1]
+                elif coin in self._inflight:
+                    self.coalesced += 1
+                    waiting[coin] = self._inflight[coin]
+                else:
+                    self.misses += 1
+                    leading[coin] = self._inflight[coin] = Future()
+            if leading:
+                self.requests += 1
+
+        if leading:
+            try:
+                if self.scheduler is None:
+                    fetched = self.fetch(list(leading))
+                else:
+                    fetched = self.scheduler.call(self.fetch, list(leading), priority=priority)
+            except Exception as e:
+                with self._lock:
+                    for coin in leading:
+                        del self._inflight[coin]
+                for pending in leading.values():
+                    pending.set_exception(e)
+                raise
+
+            fetched_at = time.monotonic()
+            with self._lock:
+                for coin in leading:
+                    del self._inflight[coin]
+                    if coin in fetched:
+                        self._quotes[coin] = (fetched_at, fetched[coin])
+            for coin, pending in leading.items():
+                if coin in fetched:
+                    pending.set_result(fetched[coin])
+                    quotes[coin] = fetched[coin]
+                else:
+                    pending.set_exception(KeyError(f"No quote returned for {coin}"))
+
+        for coin, pending in waiting.items():
+            try:
+                quotes[coin] = pending.result()
+            except KeyError:
+                pass
+        return quotes
+
+    def clear(self):
+        with self._lock:
+            self._quotes.clear()
+
+    def stats(self):
+        with self._lock:
+            stats = {
+                "hits": self.hits,
+                "misses": self.misses,
+                "coalesced": self.coalesced,
+                "requests": self.requests,
+                "in_flight": len(self._inflight),
+            }
+        if self.scheduler is not None:
+            stats.update(self.scheduler.stats())
+        return stats
+
+
+class MarketDataSource:
+    """
+    Interface the bot reads market data through. Subclasses implement
+    `fetchQuotes(coins) -> {coin: (price, 24h change %)}`; lookups go through
+    a QuoteCache so repeated and concurrent reads share one fetch. Sources
+    with a request budget pass a RequestScheduler. Sources that implement
+    `fetchHistory` declare the seconds between its points as
+    `history_resolution`.
+    """
+
+    history_resolution = None  # None: no history to backfill from
+
+    def __init__(self, ttl=QUOTE_TTL, scheduler=None):
+        self.quotes = QuoteCache(self.fetchQuotes, ttl, scheduler)
+
+    def fetchQuotes(self, coins):
+        raise NotImplementedError
+
+    def getQuotes(self, coins, priority=PRIORITY_SIGNAL):
+        return self.quotes.get_many(coins, priority)
+
+    def getQuote(self, coin, priority=PRIORITY_SIGNAL):
+        return self.quotes.get(coin, priority)
+
+    def getPrice(self, coin, priority=PRIORITY_SIGNAL):
+        return self.getQuote(coin, priority)[0]
+
+    def changesof24h(self, coin, priority=PRIORITY_SIGNAL):
+        return self.getQuote(coin, priority)[1]
+
+    def fetchHistory(self, coin, days):
+        """Returns (timestamps, prices) over the last `days`, oldest first; sources without history raise NotImplementedError"""
+        raise NotImplementedError
+
+    def getHistory(self, coin, days=HISTORY_DAYS, priority=PRIORITY_COLLECT):
+        """One bulk history request, rate-limited like quotes"""
+        scheduler = self.quotes.scheduler
+        if scheduler is None:
+            return self.fetchHistory(coin, days)
+        return scheduler.call(self.fetchHistory, coin, days, priority=priority)
+
+    def stats(self):
+        return self.quotes.stats()
+
+
+class CoinGeckoSource(MarketDataSource):
+    """
+    CoinGecko's /simple/price endpoint, plus /coins/{id}/market_chart for
+    backfills. `api_base_url` points it at another
+    server speaking the same API, such as the local stand-in in standin.py.
+    Calls are rate-limited to `rate_limit` per minute (the COINGECKO_PLAN
+    plan's limit by default). `history_resolution` is the spacing of the
+    market_chart points the server returns.
+    """
+
+    def __init__(self, api_base_url=None, ttl=QUOTE_TTL, rate_limit=None, history_resolution=HISTORY_RESOLUTION):
+        super().__init__(ttl, RequestScheduler(rate_limit or plan_rate_limit()))
+        self.history_resolution = history_resolution
+        self.api = CoinGeckoAPI()
+        if api_base_url:
+            self.api.api_base_url = api_base_url.rstrip('/') + '/'
+
+    def fetchQuotes(self, coins):
+        """ Fetches price and 24h change for every coin in a single CoinGecko call """
+        data = self.api.get_price(ids=",".join(coins), vs_currencies='usd', include_24hr_change=True)
+        return {
+            coin: (data[coin]['usd'], data[coin]['usd_24h_change'])
+            for coin in coins
+            if coin in data and 'usd' in data[coin]
+        }
+
+    def fetchHistory(self, coin, days):
+        """ Fetches the coin's price history in one market_chart call """
+        data = self.api.get_coin_market_chart_by_id(id=coin, vs_currency='usd', days=days)
+        points = data.get('prices', [])
+        return [ts / 1000 for ts, _ in points], [price for _, price in points]
+
+
+# COINGECKO_API_URL=http://127.0.0.1:8123/api/v3 runs the bot against the local stand-in
+_source = CoinGeckoSource(os.environ.get("COINGECKO_API_URL"))
+
+
+def get_source():
+    return _source
+
+
+def set_source(source):
+    """ Replaces the source used by the module-level helpers below and by new bots """
+    global _source
+    _source = source
+
+
+def getQuote(coin, priority=PRIORITY_SIGNAL):
+    return _source.getQuote(coin, priority)
+
+
+def getQuotes(coins, priority=PRIORITY_SIGNAL):
+    return _source.getQuotes(coins, priority)
+
+
+def getPrice(coin, priority=PRIORITY_SIGNAL):
+    return getQuote(coin, priority)[0]
+
+
+def changesof24h(coin, priority=PRIORITY_SIGNAL):
+    return getQuote(coin, priority)[1]
+
+
+def quote_stats():
+    return _source.stats()
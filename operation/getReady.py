@@ -1,7 +1,11 @@
-from market import getPrice, changesof24h
+from market import get_source
 
 
-def makeReady(coin):
-    getprices = getPrice(coin)
-    getChanges = changesof24h(coin)
-    return getprices , getChanges
\ No newline at end of file
+def makeReady(coin, source=None):
+    getprices, getChanges = (source or get_source()).getQuote(coin)
+    return getprices , getChanges
+
+
+def makeReadyAll(coins, source=None):
+    """ Returns {coin: (price, 24h change)} for all coins from one batched request """
+    return (source or get_source()).getQuotes(coins)
@@ -1,86 +1,132 @@
-from market import getPrice, changesof24h
-from database.db import record_trade, load_trade_history, Market, clear_database
-import datetime
+from market import get_source
+from database.db import record_trade, clear_database
+from database.ledger import ledger as signal_ledger
+from database.window import find_window
+from database.candles import find_candles
+from operation.volatility import find_indicators, parse_indicators
+from telemetry import get_logger
+
+MOMENTUM_THRESHOLD = 1  # minimum 24h change (%) before the other checks run
 
 BUY_SIGNAL = "buy"
 NOT_BUY_SIGNAL = "keep"
 REJECT_SIGNAL = "reject"
 
+log = get_logger("strategy")
+
 class TradingStrategy:
-    def __init__(self, total_money=1000, risk_percentage=2, mode="default", target_profit=1):
+    def __init__(self, total_money=1000, risk_percentage=2, mode="default", target_profit=1,
+                 ledger=None, source=None, recorder=record_trade, windows=None, reset=False,
+                 momentum_threshold=MOMENTUM_THRESHOLD, candles=None, average_timeframe=None, indicators=(),
+                 indicator_timeframe="1m", indicator_sets=None):
+        """
+        `source` is the MarketDataSource prices are read from (market.get_source() by default),
+        `recorder` records trades and `windows` maps market names to their
+        rolling windows (the database.window registry by default), so
+        backtests can replay history through the same checks. `reset` clears
+        the windows first; by default the bot keeps them for a warm restart.
+        With `average_timeframe` ("1m", "5m" or "1h") the trend filter averages
+        the closes of as many candles as the window holds points, read from
+        `candles` (market name -> CandleAggregator, the database.candles
+        registry by default) instead of the raw window.
+        `indicators` declares the (kind, period) specs from operation.volatility
+        the strategy reads, computed once per closed `indicator_timeframe`
+        candle into the market's shared IndicatorSet (`indicator_sets` maps
+        market names to them, the operation.volatility registry by default).
+        """
         self.total_money = float(total_money)
         self.risk_percentage = float(risk_percentage)
         self.mode = mode.lower()
         self.target_profit = float(target_profit)
-        clear_database()  # Clear ranges on startup
+        self.momentum_threshold = float(momentum_threshold)
+        self.ledger = ledger or signal_ledger
+        self.source = source or get_source()
+        self.recorder = recorder
+        self.windows = windows
+        self.candles = candles
+        self.average_timeframe = average_timeframe
+        self.indicators = parse_indicators(indicators)
+        self.indicator_timeframe = indicator_timeframe
+        self.indicator_sets = indicator_sets
+        if reset:
+            clear_database()
         
     def momentum_based_entry_signal(self, coin, level_of_entry):
+        """
+        Evaluates the entry signal chain and records the result in the signal ledger.
+        """
+        signal, level = self.momentum_check(coin, level_of_entry)
+        self.ledger.record(coin, signal, level)
+        return signal, level
+
+    def momentum_check(self, coin, level_of_entry):
         """
         Determines if a buy signal should be generated based on price momentum.
         """
-        print(f"📊 momentum_based_entry_signal: Checking {coin}, entry level: {level_of_entry}")
-        history = changesof24h(coin)
-        print(f"📈 24h change for {coin}: {history}%")
+        history = self.source.changesof24h(coin)
+        log.debug("📊 momentum_check", coin=coin, level=level_of_entry, change24h=history, **self.indicator_values(coin))
 
-        if float(history) >= 1:
-            print(f"✅ Positive momentum detected for {coin}")
+        if float(history) >= self.momentum_threshold:
+            log.debug("✅ Positive momentum detected", coin=coin)
             return self.safe_filter_buying(coin, level_of_entry + 1)
         else:
-            print(f"⏸️ Insufficient momentum for {coin}")
+            log.debug("⏸️ Insufficient momentum", coin=coin)
             return NOT_BUY_SIGNAL, 0
 
+    def indicator_values(self, market_name):
+        """Current values of the declared indicators, e.g. {"rsi_14": 61.2}; empty before the first candle"""
+        if not self.indicators:
+            return {}
+        indicators = find_indicators(market_name) if self.indicator_sets is None else self.indicator_sets.get(market_name)
+        return {} if indicators is None else indicators.values()
+
     def safe_filter_buying(self, market_name, level_of_entry):
         """
-        Checks average price of last 60 trades before allowing a buy.
+        Checks average price of the market's full rolling window (last 60 prices by default) before allowing a buy.
+        In candle mode it is the average close of the last 60 candles instead, and
+        a market still short of candles is kept waiting rather than rejected.
         """
-        print(f"🛡️ safe_filter_buying: Checking {market_name}, entry level: {level_of_entry}")
-
-        try:
-            market = Market.get(Market.name == market_name)
-            price_ranges = market.get_price_ranges()
-            print(f"📊 Found {len(price_ranges)} price points for {market_name}")
-
-            if len(price_ranges) < 60:
-                print(f"⚠️ Not enough data for {market_name}.")
-                return REJECT_SIGNAL, 0
+        window = find_window(market_name) if self.windows is None else self.windows.get(market_name)
+        if window is None:
+            log.warning("❌ Market does not exist in database", coin=market_name)
+            return REJECT_SIGNAL, 0
 
-            avg_price = sum(price_ranges) / len(price_ranges)
-            current_price = getPrice(market_name)
-            print(f"💲 {market_name} - Avg price: {avg_price}, Current price: {current_price}")
+        if not window.full:
+            log.debug("⚠️ Not enough data", coin=market_name, points=len(window))
+            return REJECT_SIGNAL, 0
 
-            if avg_price < current_price:
-                print(f"✅ Price trending upward for {market_name}")
-                return self.history_check(market_name, level_of_entry + 1)
-            else:
-                print(f"❌ Price not trending upward for {market_name}")
-                return REJECT_SIGNAL, 0
+        if self.average_timeframe is None:
+            avg_price = window.prices.mean()
+        else:
+            candles = find_candles(market_name) if self.candles is None else self.candles.get(market_name)
+            available = 0 if candles is None else candles.count(self.average_timeframe)
+            if available < window.size:
+                log.debug("⏳ Not enough candles yet", coin=market_name, timeframe=self.average_timeframe,
+                          candles=available, needed=window.size)
+                return NOT_BUY_SIGNAL, 0
+            avg_price = candles.close_mean(self.average_timeframe, window.size)
+        current_price = self.source.getPrice(market_name)
+        log.debug("🛡️ safe_filter_buying", coin=market_name, level=level_of_entry, avg_price=avg_price, price=current_price)
 
-        except Market.DoesNotExist:
-            print(f"❌ Market {market_name} does not exist in database")
+        if avg_price < current_price:
+            log.debug("✅ Price trending upward", coin=market_name)
+            return self.history_check(market_name, level_of_entry + 1)
+        else:
+            log.debug("❌ Price not trending upward", coin=market_name)
             return REJECT_SIGNAL, 0
 
     def history_check(self, coin, level_of_entry):
         """
         Checks if there were 3 rejected buy signals today. If so, stops trading.
         """
-        print(f"🔍 history_check: Checking {coin}, entry level: {level_of_entry}")
-        trade_data = load_trade_history()
-        today = datetime.datetime.now().date()
-        print(f"📅 Analyzing trading history for {coin} on {today}")
-
-        bad_signals_today = sum(
-            1 for trade in trade_data
-            if trade["coin"] == coin and trade.get("signal") == "reject" and 
-            datetime.datetime.fromisoformat(trade["timestamp"]).date() == today
-        )
-        print(f"❗ Found {bad_signals_today} rejected signals today for {coin}")
+        bad_signals_today = self.ledger.count(coin, REJECT_SIGNAL)
+        log.debug("🔍 history_check", coin=coin, level=level_of_entry, rejected_today=bad_signals_today)
 
         if bad_signals_today >= 3:
-            print(f"🚫 Too many bad signals for {coin} today.")
+            log.info("🚫 Too many bad signals today", coin=coin, rejected_today=bad_signals_today)
             return REJECT_SIGNAL, 0
 
-        current_price = getPrice(coin)
-        print(f"💰 Recording BUY trade for {coin} at price {current_price}")
-        record_trade(coin, "buy", current_price, f"Entry with {self.mode} mode")
-        print(f"✅ BUY signal generated for {coin} at level {level_of_entry}")
+        current_price = self.source.getPrice(coin)
+        self.recorder(coin, "buy", current_price, f"Entry with {self.mode} mode")
+        log.info("✅ BUY signal generated", coin=coin, price=current_price, level=level_of_entry)
         return BUY_SIGNAL, level_of_entry
@@ -1 +1,400 @@
- 
\ No newline at end of file
+import math
+import threading
+import numpy as np
+from numpy.lib.stride_tricks import sliding_window_view
+from database.window import RingBuffer
+
+SMOOTHING_BLOCK = 256  # values per matrix product in the batch EMA/Wilder smoothing
+FLAT_SPREAD = 1e-9  # standard deviation, relative to the mean, below which a window counts as flat
+
+# Streaming indicators: `update(close, high=None, low=None)` folds in one bar
+# in O(1) and returns the current value, NaN until `period` bars are in. The
+# batch functions below return the same values for a whole array at once.
+
+
+class SMA:
+    """Simple moving average of the last `period` closes"""
+
+    def __init__(self, period):
+        self.period = int(period)
+        self._window = RingBuffer(self.period)
+        self.value = math.nan
+
+    def update(self, close, high=None, low=None):
+        self._window.append(close)
+        if self._window.full:
+            self.value = self._window.mean()
+        return self.value
+
+
+class EMA:
+    """Exponential moving average (alpha = 2 / (period + 1)), seeded with the SMA of the first `period` closes"""
+
+    def __init__(self, period):
+        self.period = int(period)
+        self.alpha = 2 / (self.period + 1)
+        self._count = 0
+        self._sum = 0.0
+        self.value = math.nan
+
+    def update(self, close, high=None, low=None):
+        self._count += 1
+        if self._count < self.period:
+            self._sum += close
+        elif self._count == self.period:
+            self.value = (self._sum + close) / self.period
+        else:
+            self.value += self.alpha * (close - self.value)
+        return self.value
+
+
+class RSI:
+    """Wilder's relative strength index over `period` close-to-close changes"""
+
+    def __init__(self, period):
+        self.period = int(period)
+        self._previous = None
+        self._count = 0  # changes seen
+        self._gain = 0.0
+        self._loss = 0.0
+        self.value = math.nan
+
+    def update(self, close, high=None, low=None):
+        previous, self._previous = self._previous, close
+        if previous is None:
+            return self.value
+        change = close - previous
+        gain, loss = max(change, 0.0), max(-change, 0.0)
+        self._count += 1
+        if self._count <= self.period:
+            self._gain += gain / self.period
+            self._loss += loss / self.period
+            if self._count < self.period:
+                return self.value
+        else:
+            self._gain += (gain - self._gain) / self.period
+            self._loss += (loss - self._loss) / self.period
+        self.value = rsi_value(self._gain, self._loss)
+        return self.value
+
+
+class ATR:
+    """Wilder's average true range; bars without high/low count as a single price"""
+
+    def __init__(self, period):
+        self.period = int(period)
+        self._previous = None
+        self._count = 0
+        self._sum = 0.0
+        self.value = math.nan
+
+    def update(self, close, high=None, low=None):
+        high = close if high is None else high
+        low = close if low is None else low
+        previous, self._previous = self._previous, close
+        true_range = high - low if previous is None else max(high, previous) - min(low, previous)
+        self._count += 1
+        if self._count < self.period:
+            self._sum += true_range
+        elif self._count == self.period:
+            self.value = (self._sum + true_range) / self.period
+        else:
+            self.value += (true_range - self.value) / self.period
+        return self.value
+
+
+class StdDev:
+    """
+    Rolling population standard deviation of the last `period` values. The
+    running sums are kept relative to a shift, which is moved to the
+    window's mean once per lap, when the sums are recomputed exactly. The
+    values stay small however far prices drift, so cancellation doesn't eat
+    the variance; amortized cost is still O(1) per update.
+    """
+
+    def __init__(self, period):
+        self.period = int(period)
+        self._values = np.zeros(self.period, dtype=np.float64)  # relative to _shift
+        self._head = 0
+        self._count = 0
+        self._shift = 0.0
+        self._sum = 0.0
+        self._squares = 0.0
+        self.value = math.nan
+
+    @property
+    def mean(self):
+        return self._shift + self._sum / self.period if self._count == self.period else math.nan
+
+    def update(self, close, high=None, low=None):
+        if self._count == 0:
+            self._shift = close
+        value = close - self._shift
+        if self._count == self.period:
+            oldest = self._values[self._head]
+            self._sum -= oldest
+            self._squares -= oldest * oldest
+        else:
+            self._count += 1
+        self._values[self._head] = value
+        self._sum += value
+        self._squares += value * value
+        self._head = (self._head + 1) % self.period
+        if self._head == 0:
+            self._recentre()
+        if self._count == self.period:
+            mean = self._sum / self.period
+            self.value = math.sqrt(max(self._squares / self.period - mean * mean, 0.0))
+        return self.value
+
+    def _recentre(self):
+        values = self._values[:self._count]
+        shift = values.mean()
+        values -= shift
+        self._shift += shift
+        self._sum = float(values.sum())
+        self._squares = float(values @ values)
+
+
+class Volatility:
+    """Realized volatility: standard deviation of the last `period` log returns, per bar (not annualized)"""
+
+    def __init__(self, period):
+        self.period = int(period)
+        self._previous = None
+        self._returns = StdDev(self.period)
+        self.value = math.nan
+
+    def update(self, close, high=None, low=None):
+        previous, self._previous = self._previous, close
+        if previous is not None:
+            self.value = self._returns.update(math.log(close / previous))
+        return self.value
+
+
+class ZScore:
+    """Distance of the latest close from the mean of the last `period` closes, in standard deviations"""
+
+    def __init__(self, period):
+        self.period = int(period)
+        self._stdev = StdDev(self.period)
+        self.value = math.nan
+
+    def update(self, close, high=None, low=None):
+        stdev = self._stdev.update(close)
+        if not math.isnan(stdev):
+            mean = self._stdev.mean
+            self.value = (close - mean) / stdev if stdev > FLAT_SPREAD * abs(mean) else 0.0
+        return self.value
+
+
+def rsi_value(gain, loss):
+    if loss == 0:
+        return 50.0 if gain == 0 else 100.0
+    return 100 - 100 / (1 + gain / loss)
+
+
+def _nans(n):
+    return np.full(n, np.nan)
+
+
+def _smooth(values, alpha, start):
+    """
+    y[0] = start, y[i] = y[i-1] + alpha * (values[i] - y[i-1]). The recurrence
+    is unrolled SMOOTHING_BLOCK values at a time into one matrix product, so
+    it runs at NumPy speed instead of one Python step per value.
+    """
+    values = np.asarray(values, dtype=np.float64)
+    out = np.empty(len(values))
+    out[0] = start
+    decay = 1 - alpha
+    steps = np.arange(SMOOTHING_BLOCK)
+    lags = steps[:, None] - steps[None, :]
+    weights = np.where(lags >= 0, alpha * decay ** np.maximum(lags, 0), 0.0)
+    carry = decay ** (steps + 1)
+    previous = start
+    for begin in range(1, len(values), SMOOTHING_BLOCK):
+        block = values[begin:begin + SMOOTHING_BLOCK]
+        n = len(block)
+        out[begin:begin + n] = weights[:n, :n] @ block + carry[:n] * previous
+        previous = out[begin + n - 1]
+    return out
+
+
+def sma(close, period, high=None, low=None):
+    close = np.asarray(close, dtype=np.float64)
+    out = _nans(len(close))
+    if len(close) >= period:
+        out[period - 1:] = sliding_window_view(close, period).mean(axis=1)
+    return out
+
+
+def ema(close, period, high=None, low=None):
+    close = np.asarray(close, dtype=np.float64)
+    out = _nans(len(close))
+    if len(close) >= period:
+        out[period - 1:] = _smooth(close[period - 1:], 2 / (period + 1), close[:period].mean())
+    return out
+
+
+def rsi(close, period, high=None, low=None):
+    close = np.asarray(close, dtype=np.float64)
+    out = _nans(len(close))
+    if len(close) > period:
+        changes = np.diff(close)
+        gains, losses = np.maximum(changes, 0.0), np.maximum(-changes, 0.0)
+        gain = _smooth(gains[period - 1:], 1 / period, gains[:period].mean())
+        loss = _smooth(losses[period - 1:], 1 / period, losses[:period].mean())
+        with np.errstate(divide="ignore", invalid="ignore"):
+            values = 100 - 100 / (1 + gain / loss)
+        values[loss == 0] = np.where(gain[loss == 0] == 0, 50.0, 100.0)
+        out[period:] = values
+    return out
+
+
+def atr(close, period, high=None, low=None):
+    close = np.asarray(close, dtype=np.float64)
+    high = close if high is None else np.asarray(high, dtype=np.float64)
+    low = close if low is None else np.asarray(low, dtype=np.float64)
+    out = _nans(len(close))
+    if len(close) >= period:
+        previous = np.concatenate(([np.nan], close[:-1]))
+        true_range = np.fmax(high, previous) - np.fmin(low, previous)
+        out[period - 1:] = _smooth(true_range[period - 1:], 1 / period, true_range[:period].mean())
+    return out
+
+
+def stdev(close, period, high=None, low=None):
+    close = np.asarray(close, dtype=np.float64)
+    out = _nans(len(close))
+    if len(close) >= period:
+        out[period - 1:] = sliding_window_view(close, period).std(axis=1)
+    return out
+
+
+def volatility(close, period, high=None, low=None):
+    close = np.asarray(close, dtype=np.float64)
+    out = _nans(len(close))
+    if len(close) > period:
+        out[period:] = sliding_window_view(np.diff(np.log(close)), period).std(axis=1)
+    return out
+
+
+def zscore(close, period, high=None, low=None):
+    close = np.asarray(close, dtype=np.float64)
+    out = _nans(len(close))
+    if len(close) >= period:
+        windows = sliding_window_view(close, period)
+        mean, spread = windows.mean(axis=1), windows.std(axis=1)
+        with np.errstate(divide="ignore", invalid="ignore"):
+            out[period - 1:] = np.where(spread > FLAT_SPREAD * np.abs(mean), (close[period - 1:] - mean) / spread, 0.0)
+    return out
+
+
+# kind -> (streaming class, batch function)
+INDICATORS = {
+    "sma": (SMA, sma),
+    "ema": (EMA, ema),
+    "rsi": (RSI, rsi),
+    "atr": (ATR, atr),
+    "stdev": (StdDev, stdev),
+    "volatility": (Volatility, volatility),
+    "zscore": (ZScore, zscore),
+}
+
+
+def parse_indicators(specs):
+    """Accepts "rsi:14,atr:14", ["rsi:14"] or [("rsi", 14)]; returns [(kind, period)]"""
+    if not specs:
+        return []
+    if isinstance(specs, str):
+        specs = specs.split(",")
+    parsed = []
+    for spec in specs:
+        if isinstance(spec, str):
+            kind, _, period = spec.strip().partition(":")
+            spec = (kind, period)
+        kind, period = spec[0].strip().lower(), int(spec[1])
+        if kind not in INDICATORS:
+            raise ValueError(f"Unknown indicator {kind!r}, expected one of {', '.join(INDICATORS)}")
+        if period < 1:
+            raise ValueError(f"Indicator period must be positive, got {period}")
+        parsed.append((kind, period))
+    return list(dict.fromkeys(parsed))
+
+
+def indicator_name(kind, period):
+    return f"{kind}_{period}"
+
+
+def compute(specs, close, high=None, low=None):
+    """Batch mode: {name: array} for a whole history, equal to streaming the bars one by one"""
+    return {indicator_name(kind, period): INDICATORS[kind][1](close, period, high, low)
+            for kind, period in parse_indicators(specs)}
+
+
+class IndicatorSet:
+    """
+    The indicators one market needs. Strategies declare (kind, period)
+    specs; each distinct one is updated once per bar however many readers
+    share it.
+    """
+
+    def __init__(self, specs=()):
+        self.indicators = {}
+        self._lock = threading.Lock()
+        self.require(specs)
+
+    def require(self, specs):
+        with self._lock:
+            for kind, period in parse_indicators(specs):
+                if (kind, period) not in self.indicators:
+                    self.indicators[kind, period] = INDICATORS[kind][0](period)
+
+    def update(self, close, high=None, low=None):
+        with self._lock:
+            for indicator in self.indicators.values():
+                indicator.update(close, high, low)
+
+    def update_candle(self, candle):
+        """Folds in a closed (ts, open, high, low, close, volume) candle"""
+        self.update(candle[4], candle[2], candle[3])
+
+    def value(self, kind, period):
+        with self._lock:
+            return self.indicators[kind, period].value
+
+    def values(self):
+        """{name: current value}, e.g. {"rsi_14": 61.2}"""
+        with self._lock:
+            return {indicator_name(kind, period): indicator.value for (kind, period), indicator in self.indicators.items()}
+
+
+_indicators = {}
+_indicators_lock = threading.Lock()
+
+
+def get_indicators(name, specs=()):
+    """Returns the market's indicator set, adding any of `specs` it doesn't compute yet"""
+    with _indicators_lock:
+        indicators = _indicators.get(name)
+        if indicators is None:
+            indicators = _indicators[name] = IndicatorSet()
+    indicators.require(specs)
+    return indicators
+
+
+def reset_indicators(name, specs=()):
+    """Replaces the market's indicator set with a fresh one computing `specs`"""
+    with _indicators_lock:
+        indicators = _indicators[name] = IndicatorSet(specs)
+        return indicators
+
+
+def find_indicators(name):
+    return _indicators.get(name)
+
+
+def clear_indicators():
+    with _indicators_lock:
+        _indicators.clear()
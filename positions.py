@@ -0,0 +1,180 @@
+import asyncio
+import heapq
+import itertools
+from feed import PollingFeed
+from telemetry import get_logger, metrics
+from trade_manager import level_interval
+
+RETRY_DELAY = 5  # seconds before a failed price subscription is retried
+
+log = get_logger("positions")
+
+
+class PositionBook:
+    """
+    Open positions on one coin, indexed by price level. Trailing stops sit in
+    a max-heap and next targets in a min-heap, so a price update pops only the
+    positions whose stop or target it crossed: O(k log n) for k crossings
+    instead of a pass over every position. Heap entries left behind when a
+    position moves its levels or closes are skipped when they surface.
+    """
+
+    def __init__(self, coin):
+        self.coin = coin
+        self.trades = {}  # position id -> trade object
+        self._versions = {}
+        self._stops = []  # (-stop price, id, version)
+        self._targets = []  # (next target, id, version)
+
+    def __len__(self):
+        return len(self.trades)
+
+    def add(self, position_id, trade):
+        self.trades[position_id] = trade
+        self._index(position_id)
+
+    def remove(self, position_id):
+        self._versions.pop(position_id, None)
+        return self.trades.pop(position_id, None)
+
+    def _index(self, position_id):
+        trade = self.trades[position_id]
+        version = self._versions[position_id] = self._versions.get(position_id, -1) + 1
+        heapq.heappush(self._stops, (-trade.stop_price, position_id, version))
+        heapq.heappush(self._targets, (trade.next_target, position_id, version))
+        if len(self._stops) + len(self._targets) > 4 * len(self.trades) + 32:
+            self._compact()
+
+    def _compact(self):
+        self._stops = [entry for entry in self._stops if self._live(entry)]
+        self._targets = [entry for entry in self._targets if self._live(entry)]
+        heapq.heapify(self._stops)
+        heapq.heapify(self._targets)
+
+    def _live(self, entry):
+        return self._versions.get(entry[1]) == entry[2]
+
+    def _top(self, heap):
+        while heap and not self._live(heap[0]):
+            heapq.heappop(heap)
+        return heap[0] if heap else None
+
+    def levels(self):
+        """(highest trailing stop, lowest next target), or None when empty"""
+        stop, target = self._top(self._stops), self._top(self._targets)
+        if stop is None:
+            return None
+        return -stop[0], target[0]
+
+    def crossed(self, price):
+        """Pops the ids of positions with price below their stop or at/above their target"""
+        ids = set()
+        while (top := self._top(self._stops)) is not None and -top[0] > price:
+            ids.add(heapq.heappop(self._stops)[1])
+        while (top := self._top(self._targets)) is not None and top[0] <= price:
+            ids.add(heapq.heappop(self._targets)[1])
+        return ids
+
+    def update(self, price):
+        """Applies a price to the positions it crossed; returns [(id, trade)] for those that closed"""
+        closed = []
+        for position_id in self.crossed(price):
+            trade = self.trades[position_id]
+            if trade.update(price):
+                self.remove(position_id)
+                closed.append((position_id, trade))
+            else:
+                self._index(position_id)
+        return closed
+
+    def interval(self, price):
+        """Poll interval for the coin, set by the levels nearest to the price"""
+        levels = self.levels()
+        if levels is None:
+            return level_interval(price, price, price, 1)
+        profit_percent = min(trade.profit_percent for trade in self.trades.values())
+        return level_interval(price, *levels, profit_percent)
+
+
+class PositionManager:
+    """
+    Tracks every open position across coins without blocking the market
+    tasks. Each coin with open positions gets one monitor task reading the
+    price feed, and `on_close(trade)` is called as positions close.
+    `on_price(coin, price)` sees every price the monitors read.
+    """
+
+    def __init__(self, feed=None, on_close=None, max_per_coin=1, on_price=None):
+        self.feed = feed or PollingFeed()
+        self.on_close = on_close
+        self.on_price = on_price
+        self.max_per_coin = max_per_coin
+        self.books = {}
+        self._tasks = {}
+        self._ids = itertools.count(1)
+        metrics.gauge("open_positions", lambda: {coin: len(book) for coin, book in self.books.items()})
+
+    def count(self, coin=None):
+        if coin is not None:
+            return len(self.books.get(coin, ()))
+        return sum(len(book) for book in self.books.values())
+
+    def can_open(self, coin):
+        return self.count(coin) < self.max_per_coin
+
+    def positions(self):
+        """Yields (coin, position id, trade) for every open position"""
+        for coin, book in self.books.items():
+            for position_id, trade in book.trades.items():
+                yield coin, position_id, trade
+
+    def open(self, trade):
+        """Starts tracking an opened trade object; returns its position id"""
+        position_id = next(self._ids)
+        book = self.books.setdefault(trade.coin, PositionBook(trade.coin))
+        book.add(position_id, trade)
+        metrics.inc("positions_opened_total", coin=trade.coin)
+        if trade.coin not in self._tasks:
+            self._tasks[trade.coin] = asyncio.ensure_future(self._monitor(book))
+        return position_id
+
+    def apply(self, coin, price):
+        """Feeds one price to the coin's positions and reports the ones that closed"""
+        if self.on_price is not None:
+            self.on_price(coin, price)
+        book = self.books.get(coin)
+        if book is None:
+            return []
+        with metrics.span("trade_monitor"):
+            closed = book.update(price)
+        for position_id, trade in closed:
+            metrics.inc("trades_closed_total")
+            if self.on_close is not None:
+                self.on_close(trade)
+        return closed
+
+    async def _monitor(self, book):
+        coin = book.coin
+        while True:
+            prices = self.feed.prices(coin, book.interval)
+            try:
+                async for price in prices:
+                    self.apply(coin, price)
+                    if not book:
+                        # Unregistered before any await so a new position starts a fresh task
+                        del self._tasks[coin]
+                        return
+            except asyncio.CancelledError:
+                raise
+            except Exception as e:
+                log.exception("❌ Position monitoring failed, retrying", coin=coin, error=str(e))
+                await asyncio.sleep(RETRY_DELAY)
+            finally:
+                await prices.aclose()
+
+    async def close(self):
+        """Stops monitoring; positions stay in their books"""
+        tasks, self._tasks = list(self._tasks.values()), {}
+        for task in tasks:
+            task.cancel()
+        await asyncio.gather(*tasks, return_exceptions=True)
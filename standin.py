@@ -0,0 +1,276 @@
+"""
+Local stand-in for the subset of the CoinGecko API the bot uses
+(/api/v3/simple/price, /api/v3/coins/<id>/market_chart and /api/v3/ping),
+for offline runs and load tests.
+
+Prices follow synthetic GBM or random-walk paths, or replay a recorded tick
+file, on a simulated clock running `speed` times faster than wall time.
+Latency, server errors and 429 rate limiting can be injected. Point the bot
+at it with COINGECKO_API_URL=http://127.0.0.1:8123/api/v3 or
+CoinGeckoSource(api_base_url=...).
+"""
+import argparse
+import json
+import random
+import threading
+import time
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from urllib.parse import urlparse, parse_qs
+import numpy as np
+
+DAY = 24 * 60 * 60
+SECONDS_PER_YEAR = 365 * DAY
+START_PRICES = {"bitcoin": 60000.0, "ethereum": 3000.0, "solana": 150.0}
+CHART_STEPS = ((1, 5 * 60), (90, 60 * 60))  # (up to days, seconds between points) like CoinGecko's auto granularity
+
+
+class SyntheticPath:
+    """
+    Price path generated lazily in `step`-second increments. It starts a day
+    before simulated time 0 so the 24h change is defined from the first request.
+    """
+
+    def __init__(self, start_price, model="gbm", volatility=0.8, drift=0.0, step=1.0, seed=None):
+        if model not in ("gbm", "walk"):
+            raise ValueError(f"Unknown price model {model!r}")
+        self.model = model
+        self.step = step
+        self.volatility = volatility
+        self.drift = drift
+        self.start_price = start_price
+        self.rng = np.random.default_rng(seed)
+        self.prices = np.array([start_price], dtype=np.float64)
+        self._lock = threading.Lock()
+
+    def _extend(self, length):
+        dt = self.step / SECONDS_PER_YEAR
+        count = max(length - len(self.prices), 4096)
+        shocks = self.rng.standard_normal(count) * self.volatility * np.sqrt(dt)
+        if self.model == "gbm":
+            steps = np.exp(np.cumsum(shocks + (self.drift - self.volatility ** 2 / 2) * dt))
+            extension = self.prices[-1] * steps
+        else:
+            extension = np.maximum(self.prices[-1] + np.cumsum(shocks * self.start_price), self.start_price * 0.01)
+        self.prices = np.concatenate((self.prices, extension))
+
+    def price_at(self, t):
+        index = int((t + DAY) / self.step)
+        with self._lock:
+            if index >= len(self.prices):
+                self._extend(index + 1)
+            return float(self.prices[index])
+
+
+class ReplayPath:
+    """
+    Recorded ticks (see backtest.load_ticks). Simulated time 0 maps to a day
+    after the first tick when the recording is long enough; the last price is
+    held once the recording runs out.
+    """
+
+    def __init__(self, ts, prices):
+        self.ts = ts
+        self.prices = prices
+        self.start = ts[0] + DAY if ts[-1] - ts[0] > DAY else ts[0]
+
+    def price_at(self, t):
+        index = np.searchsorted(self.ts, self.start + t, side="right") - 1
+        return float(self.prices[max(index, 0)])
+
+
+class StandIn:
+    """Simulated market plus fault injection shared by all request handler threads"""
+
+    def __init__(self, paths, speed=1.0, latency=0.0, jitter=0.0, error_rate=0.0, rate_limit=None, throttle_rate=0.0, seed=None,
+                 chart_step=None):
+        self.paths = paths
+        self.chart_step = chart_step  # seconds between market_chart points, None for CoinGecko's granularity
+        self.speed = speed
+        self.latency = latency  # seconds added to every response
+        self.jitter = jitter  # extra uniform random delay, seconds
+        self.error_rate = error_rate  # probability of a 500 response
+        self.rate_limit = rate_limit  # requests per minute before 429s, None for unlimited
+        self.throttle_rate = throttle_rate  # probability of a 429 regardless of the limit
+        self.rng = random.Random(seed)
+        self.started = time.monotonic()
+        self.epoch = time.time()  # wall clock at simulated time 0, for chart timestamps
+        self.stats = {"requests": 0, "ok": 0, "errors": 0, "throttled": 0}
+        self._tokens = float(rate_limit or 0)
+        self._refilled = self.started
+        self._lock = threading.Lock()
+
+    def now(self):
+        """Simulated seconds since the server started"""
+        return (time.monotonic() - self.started) * self.speed
+
+    def quote(self, coin):
+        t = self.now()
+        path = self.paths[coin]
+        price = path.price_at(t)
+        previous = path.price_at(t - DAY)
+        return price, (price / previous - 1) * 100
+
+    def history(self, coin, days):
+        """[[timestamp ms, price], ...] over the last `days`, ending with the current price"""
+        t = self.now()
+        step = self.chart_step or next((seconds for limit, seconds in CHART_STEPS if days <= limit), DAY)
+        # Synthetic paths start a day before simulated time 0
+        times = np.arange(max(t - days * DAY, -DAY), t, step).tolist() + [t]
+        path = self.paths[coin]
+        return [[(self.epoch + time_) * 1000, path.price_at(time_)] for time_ in times]
+
+    def admit(self):
+        """Returns the HTTP status to answer with before any payload is built"""
+        with self._lock:
+            self.stats["requests"] += 1
+            if self.rate_limit:
+                now = time.monotonic()
+                self._tokens = min(self.rate_limit, self._tokens + (now - self._refilled) * self.rate_limit / 60)
+                self._refilled = now
+                if self._tokens < 1:
+                    self.stats["throttled"] += 1
+                    return 429
+                self._tokens -= 1
+            roll = self.rng.random()
+            if roll < self.throttle_rate:
+                self.stats["throttled"] += 1
+                return 429
+            if roll < self.throttle_rate + self.error_rate:
+                self.stats["errors"] += 1
+                return 500
+            self.stats["ok"] += 1
+            return 200
+
+    def delay(self):
+        with self._lock:
+            delay = self.latency + (self.rng.uniform(0, self.jitter) if self.jitter else 0)
+        if delay > 0:
+            time.sleep(delay)
+
+
+def make_handler(standin):
+    class Handler(BaseHTTPRequestHandler):
+        def do_GET(self):
+            url = urlparse(self.path)
+            path = url.path.rstrip("/")
+            if path.startswith("/api/v3"):
+                path = path[len("/api/v3"):]
+
+            if path == "/standin/stats":
+                return self.respond(200, {**standin.stats, "simulated_time": standin.now()})
+
+            standin.delay()
+            status = standin.admit()
+            if status == 429:
+                return self.respond(429, {"status": {"error_code": 429, "error_message": "You've exceeded the Rate Limit."}},
+                                    {"Retry-After": "60"})
+            if status != 200:
+                return self.respond(status, {"status": {"error_code": status, "error_message": "Internal server error (injected)"}})
+
+            if path == "/ping":
+                return self.respond(200, {"gecko_says": "(V3) To the Moon!"})
+            if path == "/simple/price":
+                return self.respond(200, self.simple_price(parse_qs(url.query)))
+            if path.startswith("/coins/") and path.endswith("/market_chart"):
+                return self.market_chart(path.split("/")[2], parse_qs(url.query))
+            return self.respond(404, {"error": f"Unknown endpoint {url.path}"})
+
+        def simple_price(self, query):
+            ids = [coin for coin in query.get("ids", [""])[0].split(",") if coin]
+            currencies = query.get("vs_currencies", ["usd"])[0].split(",")
+            include_change = query.get("include_24hr_change", ["false"])[0].lower() == "true"
+            data = {}
+            for coin in ids:
+                if coin not in standin.paths:
+                    continue
+                price, change = standin.quote(coin)
+                entry = {}
+                for currency in currencies:
+                    entry[currency] = price
+                    if include_change:
+                        entry[f"{currency}_24h_change"] = change
+                data[coin] = entry
+            return data
+
+        def market_chart(self, coin, query):
+            if coin not in standin.paths:
+                return self.respond(404, {"error": "coin not found"})
+            days = float(query.get("days", ["1"])[0])
+            prices = standin.history(coin, days)
+            return self.respond(200, {"prices": prices, "market_caps": [], "total_volumes": []})
+
+        def respond(self, status, payload, headers=None):
+            body = json.dumps(payload).encode("utf-8")
+            self.send_response(status)
+            self.send_header("Content-Type", "application/json")
+            self.send_header("Content-Length", str(len(body)))
+            for name, value in (headers or {}).items():
+                self.send_header(name, value)
+            self.end_headers()
+            self.wfile.write(body)
+
+        def log_message(self, format, *args):
+            pass  # keep load tests quiet
+
+    return Handler
+
+
+def serve(standin, host="127.0.0.1", port=8123):
+    """Starts the stand-in on a background thread and returns the server"""
+    server = ThreadingHTTPServer((host, port), make_handler(standin))
+    server.daemon_threads = True
+    threading.Thread(target=server.serve_forever, name="coingecko-standin", daemon=True).start()
+    return server
+
+
+def build_paths(coins, model="gbm", volatility=0.8, drift=0.0, step=1.0, seed=None, replay=None):
+    if replay:
+        from backtest import load_ticks
+        return {coin: ReplayPath(*load_ticks(replay, coin)[:2]) for coin in coins}
+    return {
+        coin: SyntheticPath(START_PRICES.get(coin, 100.0), model, volatility, drift, step,
+                            None if seed is None else seed + position)
+        for position, coin in enumerate(coins)
+    }
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Local CoinGecko /simple/price stand-in")
+    parser.add_argument("--host", default="127.0.0.1")
+    parser.add_argument("--port", type=int, default=8123)
+    parser.add_argument("--coins", default="bitcoin,ethereum,solana")
+    parser.add_argument("--model", default="gbm", choices=["gbm", "walk"])
+    parser.add_argument("--volatility", type=float, default=0.8, help="Annualized volatility")
+    parser.add_argument("--drift", type=float, default=0.0, help="Annualized drift")
+    parser.add_argument("--replay", help="Replay this tick file instead of a synthetic path")
+    parser.add_argument("--speed", type=float, default=1.0, help="Simulated seconds per wall-clock second")
+    parser.add_argument("--latency", type=float, default=0.0, help="Added response latency in ms")
+    parser.add_argument("--jitter", type=float, default=0.0, help="Extra random latency up to this many ms")
+    parser.add_argument("--error-rate", type=float, default=0.0, help="Probability of a 500 response")
+    parser.add_argument("--rate-limit", type=float, default=None, help="Requests per minute before answering 429")
+    parser.add_argument("--throttle-rate", type=float, default=0.0, help="Probability of a random 429")
+    parser.add_argument("--seed", type=int, default=None)
+    parser.add_argument("--chart-step", type=float, default=None,
+                        help="Seconds between market_chart points (CoinGecko's 5 minutes by default, too coarse to backfill); "
+                             "run the bot with COINGECKO_HISTORY_RESOLUTION set to the same value")
+    args = parser.parse_args()
+
+    coins = [coin.strip() for coin in args.coins.split(",") if coin.strip()]
+    standin = StandIn(
+        build_paths(coins, args.model, args.volatility, args.drift, seed=args.seed, replay=args.replay),
+        speed=args.speed,
+        latency=args.latency / 1000,
+        jitter=args.jitter / 1000,
+        error_rate=args.error_rate,
+        rate_limit=args.rate_limit,
+        throttle_rate=args.throttle_rate,
+        seed=args.seed,
+        chart_step=args.chart_step,
+    )
+    server = serve(standin, args.host, args.port)
+    print(f"🦎 CoinGecko stand-in on http://{args.host}:{args.port}/api/v3 serving {', '.join(coins)}")
+    try:
+        while True:
+            time.sleep(1)
+    except KeyboardInterrupt:
+        server.shutdown()
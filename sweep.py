@@ -0,0 +1,183 @@
+import argparse
+import csv
+import itertools
+import os
+import random
+from concurrent.futures import ProcessPoolExecutor, as_completed
+from multiprocessing import shared_memory
+import numpy as np
+from backtest import Backtest, load_ticks
+from main import WINDOW_SIZE
+from operation.strategy import MOMENTUM_THRESHOLD
+
+# risk_percentage isn't swept: neither TradingStrategy nor Backtest sizes positions with it
+PARAMETERS = ("mode", "target_profit", "window_size", "momentum_threshold")
+RESULT_COLUMNS = PARAMETERS + ("pnl", "max_drawdown", "trades", "final_equity")
+RESULTS_FILE = "sweep_results.csv"
+
+# Set in each worker by _attach_ticks: (ts, prices, changes) views over the shared block
+_ticks = None
+_shared = None
+
+
+def grid(modes, target_profits, window_sizes, momentum_thresholds):
+    """Every combination of the given parameter values"""
+    for values in itertools.product(modes, target_profits, window_sizes, momentum_thresholds):
+        yield dict(zip(PARAMETERS, values))
+
+
+def random_search(count, modes, target_profits, window_sizes, momentum_thresholds, seed=None):
+    """
+    `count` distinct combinations. Two-value numeric lists are treated as
+    (low, high) ranges to sample from; other lists are sampled as choices.
+    """
+    rng = random.Random(seed)
+
+    def sample(values, integer=False):
+        if len(values) == 2 and not isinstance(values[0], str):
+            low, high = values
+            return rng.randint(int(low), int(high)) if integer else round(rng.uniform(low, high), 4)
+        return rng.choice(values)
+
+    seen = set()
+    for _ in range(count * 20):
+        if len(seen) == count:
+            break
+        params = {
+            "mode": sample(modes),
+            "target_profit": sample(target_profits),
+            "window_size": sample(window_sizes, integer=True),
+            "momentum_threshold": sample(momentum_thresholds),
+        }
+        key = params_key(params)
+        if key not in seen:
+            seen.add(key)
+            yield params
+
+
+def params_key(params):
+    return (
+        str(params["mode"]),
+        float(params["target_profit"]),
+        int(params["window_size"]),
+        float(params["momentum_threshold"]),
+    )
+
+
+def _attach_ticks(name, length):
+    """Worker initializer: maps the parent's shared tick block without copying it"""
+    global _ticks, _shared
+    _shared = shared_memory.SharedMemory(name=name)
+    block = np.ndarray((3, length), dtype=np.float64, buffer=_shared.buf)
+    _ticks = (block[0], block[1], block[2])
+
+
+def _run(params, coin, total_money):
+    ts, prices, changes = _ticks
+    backtest = Backtest(
+        ts, prices, changes, coin,
+        total_money=total_money,
+        mode=params["mode"],
+        target_profit=params["target_profit"],
+        window_size=params["window_size"],
+        momentum_threshold=params["momentum_threshold"]
+    )
+    summary = backtest.run().summary()
+    return {**params, **{column: summary[column] for column in ("pnl", "max_drawdown", "trades", "final_equity")}}
+
+
+def load_results(path):
+    if not os.path.exists(path):
+        return []
+    with open(path, newline="") as file:
+        reader = csv.DictReader(file)
+        if reader.fieldnames and tuple(reader.fieldnames) != RESULT_COLUMNS:
+            raise ValueError(f"{path} has columns {', '.join(reader.fieldnames)}; pass another --out to start a new results file")
+        return list(reader)
+
+
+def run_sweep(path, combinations, coin="bitcoin", total_money=1000, workers=None, results_path=RESULTS_FILE):
+    """
+    Backtests every parameter combination across a process pool and returns
+    all results ranked by PnL. Each result is appended to `results_path` as
+    it finishes, and combinations already in that file are skipped, so an
+    interrupted sweep resumes where it stopped.
+    """
+    done = load_results(path=results_path)
+    finished = {params_key(row) for row in done}
+    todo = [params for params in combinations if params_key(params) not in finished]
+    print(f"🧮 {len(todo)} combinations to run, {len(finished)} already done")
+
+    ts, prices, changes = load_ticks(path, coin)
+    shared = shared_memory.SharedMemory(create=True, size=3 * len(ts) * 8)
+    try:
+        block = np.ndarray((3, len(ts)), dtype=np.float64, buffer=shared.buf)
+        block[0], block[1], block[2] = ts, prices, changes
+
+        new_file = not os.path.exists(results_path)
+        with open(results_path, "a", newline="") as file, ProcessPoolExecutor(
+            max_workers=workers or os.cpu_count(),
+            initializer=_attach_ticks,
+            initargs=(shared.name, len(ts)),
+        ) as pool:
+            writer = csv.DictWriter(file, fieldnames=RESULT_COLUMNS)
+            if new_file:
+                writer.writeheader()
+            futures = [pool.submit(_run, params, coin, total_money) for params in todo]
+            for count, future in enumerate(as_completed(futures), 1):
+                result = future.result()
+                writer.writerow(result)
+                file.flush()
+                done.append(result)
+                print(f"✅ {count}/{len(todo)} {params_key(result)} pnl ${result['pnl']:.2f}")
+    finally:
+        shared.close()
+        shared.unlink()
+
+    return rank(done)
+
+
+def rank(results):
+    """Sorts by PnL (best first), breaking ties by the smaller drawdown"""
+    return sorted(results, key=lambda row: (-float(row["pnl"]), float(row["max_drawdown"])))
+
+
+def print_table(results, limit=20):
+    header = f"{'#':>3} {'mode':<10} {'profit%':>8} {'window':>6} {'momentum':>8} {'pnl':>10} {'drawdown':>9} {'trades':>6}"
+    print(header)
+    print("-" * len(header))
+    for position, row in enumerate(results[:limit], 1):
+        print(f"{position:>3} {row['mode']:<10} {float(row['target_profit']):>8.2f} {int(row['window_size']):>6} "
+              f"{float(row['momentum_threshold']):>8.2f} "
+              f"{float(row['pnl']):>10.2f} {float(row['max_drawdown']):>9.2%} {int(row['trades']):>6}")
+
+
+def _floats(text):
+    return [float(value) for value in text.split(",")]
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Grid or random search of strategy parameters over historical ticks")
+    parser.add_argument("ticks", help="Tick file (.csv, .parquet, .npz or .npy)")
+    parser.add_argument("--coin", default="bitcoin")
+    parser.add_argument("--money", type=float, default=1000)
+    parser.add_argument("--mode", default="default,aggressive", help="Comma-separated modes")
+    parser.add_argument("--target-profit", default="0.5,1,2", help="Comma-separated values")
+    parser.add_argument("--window", default=f"30,{WINDOW_SIZE},120", help="Comma-separated window lengths")
+    parser.add_argument("--momentum", default=f"0.5,{MOMENTUM_THRESHOLD},2", help="Comma-separated 24h change thresholds")
+    parser.add_argument("--random", type=int, default=0,
+                        help="Sample this many combinations instead of the full grid (two-value lists become ranges)")
+    parser.add_argument("--seed", type=int, default=None)
+    parser.add_argument("--workers", type=int, default=None, help="Worker processes (default: all cores)")
+    parser.add_argument("--out", default=RESULTS_FILE, help="Results CSV; existing rows are kept and skipped")
+    parser.add_argument("--top", type=int, default=20)
+    args = parser.parse_args()
+
+    space = (
+        args.mode.split(","),
+        _floats(args.target_profit),
+        [int(value) for value in _floats(args.window)],
+        _floats(args.momentum),
+    )
+    combinations = random_search(args.random, *space, seed=args.seed) if args.random else grid(*space)
+    print_table(run_sweep(args.ticks, combinations, args.coin, args.money, args.workers, args.out), args.top)
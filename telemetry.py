@@ -0,0 +1,289 @@
+import atexit
+import bisect
+import json
+import logging
+import logging.handlers
+import os
+import queue
+import sys
+import threading
+import time
+from contextlib import contextmanager
+
+LOG_LEVEL = os.environ.get("TRADER_LOG_LEVEL", "INFO")
+LOG_FORMAT = os.environ.get("TRADER_LOG_FORMAT", "text")  # "text" or "json"
+ROOT_LOGGER = "trader"
+METRICS_PORT = int(os.environ.get("TRADER_METRICS_PORT", "0"))  # 0 keeps the /metrics endpoint off
+
+# Seconds; covers a cache hit (sub-millisecond) up to a slow API call
+DEFAULT_BUCKETS = (0.0001, 0.0005, 0.001, 0.0025, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0)
+
+
+class StructuredLogger:
+    """
+    Logs an event message plus key=value fields. Fields are passed as
+    keyword arguments rather than formatted into the message, so a disabled
+    level costs one level check and nothing is formatted.
+    """
+
+    def __init__(self, name):
+        self.logger = logging.getLogger(f"{ROOT_LOGGER}.{name}")
+
+    def enabled(self, level):
+        return self.logger.isEnabledFor(level)
+
+    def _log(self, level, event, fields, exc_info=None):
+        if self.logger.isEnabledFor(level):
+            self.logger.log(level, event, exc_info=exc_info, extra={"fields": fields})
+
+    def debug(self, event, **fields):
+        self._log(logging.DEBUG, event, fields)
+
+    def info(self, event, **fields):
+        self._log(logging.INFO, event, fields)
+
+    def warning(self, event, **fields):
+        self._log(logging.WARNING, event, fields)
+
+    def error(self, event, **fields):
+        self._log(logging.ERROR, event, fields)
+
+    def exception(self, event, **fields):
+        self._log(logging.ERROR, event, fields, exc_info=True)
+
+
+def get_logger(name):
+    return StructuredLogger(name)
+
+
+def _value(value):
+    if isinstance(value, float):
+        return f"{value:.6g}"
+    return str(value)
+
+
+class TextFormatter(logging.Formatter):
+    def format(self, record):
+        fields = getattr(record, "fields", None) or {}
+        line = f"[{self.formatTime(record)}] {record.levelname:<7} {record.name[len(ROOT_LOGGER) + 1:]}: {record.getMessage()}"
+        if fields:
+            line += " " + " ".join(f"{key}={_value(value)}" for key, value in fields.items())
+        if record.exc_info:
+            line += "\n" + self.formatException(record.exc_info)
+        return line
+
+
+class JsonFormatter(logging.Formatter):
+    def format(self, record):
+        entry = {
+            "ts": record.created,
+            "level": record.levelname,
+            "logger": record.name,
+            "event": record.getMessage(),
+        }
+        entry.update(getattr(record, "fields", None) or {})
+        if record.exc_info:
+            entry["exception"] = self.formatException(record.exc_info)
+        return json.dumps(entry, default=str)
+
+
+_listener = None
+
+
+def configure_logging(level=LOG_LEVEL, fmt=LOG_FORMAT, stream=None):
+    """
+    Sends the bot's logs to `stream` (stdout by default) at `level`. Records
+    are handed to a queue and written by a listener thread, so the trading
+    loop never waits on terminal or file I/O.
+    """
+    global _listener
+    if _listener is not None:
+        _listener.stop()
+    else:
+        atexit.register(flush_logs)
+
+    handler = logging.StreamHandler(stream or sys.stdout)
+    handler.setFormatter(JsonFormatter() if fmt == "json" else TextFormatter())
+    records = queue.SimpleQueue()
+    _listener = logging.handlers.QueueListener(records, handler)
+    _listener.start()
+
+    logger = logging.getLogger(ROOT_LOGGER)
+    logger.handlers[:] = [_QueueHandler(records)]
+    logger.setLevel(level.upper() if isinstance(level, str) else level)
+    logger.propagate = False
+
+
+class _QueueHandler(logging.handlers.QueueHandler):
+    def prepare(self, record):
+        # Formatting happens on the listener thread; only resolve the message here
+        record.msg = record.getMessage()
+        record.args = None
+        return record
+
+
+def flush_logs():
+    """Writes out every queued record (call before exiting)"""
+    global _listener
+    if _listener is not None:
+        _listener.stop()
+        _listener.start()
+
+
+@contextmanager
+def quiet_logs(level=logging.CRITICAL):
+    """Temporarily raises the bot's log level, e.g. for backtests and benchmarks"""
+    logger = logging.getLogger(ROOT_LOGGER)
+    previous = logger.level
+    logger.setLevel(level)
+    try:
+        yield
+    finally:
+        logger.setLevel(previous)
+
+
+class Histogram:
+    def __init__(self, buckets=DEFAULT_BUCKETS):
+        self.buckets = buckets
+        self.counts = [0] * (len(buckets) + 1)
+        self.sum = 0.0
+        self.count = 0
+
+    def observe(self, value):
+        self.counts[bisect.bisect_left(self.buckets, value)] += 1
+        self.sum += value
+        self.count += 1
+
+
+class Metrics:
+    """Counters, histograms and sampled gauges, rendered in Prometheus text format"""
+
+    def __init__(self):
+        self._counters = {}
+        self._histograms = {}
+        self._gauges = {}
+        self._lock = threading.Lock()
+
+    def inc(self, name, value=1, **labels):
+        key = (name, tuple(sorted(labels.items())))
+        with self._lock:
+            self._counters[key] = self._counters.get(key, 0) + value
+
+    def observe(self, name, value, **labels):
+        key = (name, tuple(sorted(labels.items())))
+        with self._lock:
+            histogram = self._histograms.get(key)
+            if histogram is None:
+                histogram = self._histograms[key] = Histogram()
+            histogram.observe(value)
+
+    def gauge(self, name, func):
+        """Registers `func() -> number or {label_value: number}`, sampled at render time"""
+        with self._lock:
+            self._gauges[name] = func
+
+    @contextmanager
+    def span(self, name, **labels):
+        """Times the block into the `<name>_seconds` histogram"""
+        start = time.perf_counter()
+        try:
+            yield
+        finally:
+            self.observe(f"{name}_seconds", time.perf_counter() - start, **labels)
+
+    def render(self):
+        with self._lock:
+            counters = dict(self._counters)
+            histograms = {key: (h.buckets, list(h.counts), h.sum, h.count) for key, h in self._histograms.items()}
+            gauges = dict(self._gauges)
+
+        lines = []
+        for name in sorted({name for name, _ in counters}):
+            lines.append(f"# TYPE {name} counter")
+            for (metric, labels), value in sorted(counters.items()):
+                if metric == name:
+                    lines.append(f"{name}{_labels(labels)} {value}")
+        for name in sorted({name for name, _ in histograms}):
+            lines.append(f"# TYPE {name} histogram")
+            for (metric, labels), (buckets, counts, total, count) in sorted(histograms.items()):
+                if metric != name:
+                    continue
+                cumulative = 0
+                for bound, bucket_count in zip(buckets + (float("inf"),), counts):
+                    cumulative += bucket_count
+                    le = "+Inf" if bound == float("inf") else repr(bound)
+                    lines.append(f"{name}_bucket{_labels(labels + (('le', le),))} {cumulative}")
+                lines.append(f"{name}_sum{_labels(labels)} {total}")
+                lines.append(f"{name}_count{_labels(labels)} {count}")
+        for name, func in sorted(gauges.items()):
+            try:
+                value = func()
+            except Exception:
+                continue
+            lines.append(f"# TYPE {name} gauge")
+            if isinstance(value, dict):
+                for label, item in sorted(value.items()):
+                    lines.append(f"{name}{_labels((('key', label),))} {item}")
+            else:
+                lines.append(f"{name} {value}")
+        return "\n".join(lines) + "\n"
+
+    def reset(self):
+        with self._lock:
+            self._counters.clear()
+            self._histograms.clear()
+
+
+def _labels(labels):
+    if not labels:
+        return ""
+    return "{" + ",".join(f'{key}="{value}"' for key, value in labels) + "}"
+
+
+metrics = Metrics()
+
+
+_server = None
+
+
+def serve_metrics(port=9108, host="127.0.0.1"):
+    """Serves metrics.render() at http://host:port/metrics on a background thread (once per process)"""
+    global _server
+    if _server is not None:
+        return _server
+    from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+    class Handler(BaseHTTPRequestHandler):
+        def do_GET(self):
+            if self.path.rstrip("/") != "/metrics":
+                self.send_error(404)
+                return
+            body = metrics.render().encode("utf-8")
+            self.send_response(200)
+            self.send_header("Content-Type", "text/plain; version=0.0.4")
+            self.send_header("Content-Length", str(len(body)))
+            self.end_headers()
+            self.wfile.write(body)
+
+        def log_message(self, format, *args):
+            pass
+
+    _server = ThreadingHTTPServer((host, port), Handler)
+    _server.daemon_threads = True
+    threading.Thread(target=_server.serve_forever, name="metrics-server", daemon=True).start()
+    return _server
+
+
+def start_metrics_dump(path, interval=60):
+    """Rewrites `path` with the current metrics every `interval` seconds"""
+    stop = threading.Event()
+
+    def dump():
+        while not stop.wait(interval):
+            temporary = f"{path}.tmp"
+            with open(temporary, "w") as file:
+                file.write(metrics.render())
+            os.replace(temporary, path)
+
+    threading.Thread(target=dump, name="metrics-dump", daemon=True).start()
+    return stop
@@ -0,0 +1,23 @@
+import os
+import sys
+import pytest
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+
+@pytest.fixture(autouse=True)
+def workdir(tmp_path, monkeypatch):
+    """Runs every test in its own directory, so journals and databases never touch the checkout"""
+    monkeypatch.chdir(tmp_path)
+    return tmp_path
+
+
+@pytest.fixture
+def database(workdir):
+    """Points the shared database at a fresh file in the test's directory"""
+    from database.db import db, session, close_database, DATABASE_FILE, PRAGMAS
+    close_database()
+    session.schema_ready = False
+    db.init(str(workdir / DATABASE_FILE), pragmas=PRAGMAS, timeout=10)
+    yield db
+    close_database()
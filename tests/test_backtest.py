@@ -0,0 +1,116 @@
+import asyncio
+import selectors
+import numpy as np
+import pytest
+import engine
+import main
+from backtest import Backtest, TickReplay, changes_from_prices
+from database.candles import clear_candles
+from database.ledger import SignalLedger
+from database.window import clear_windows
+from operation.strategy import TradingStrategy
+
+
+def synthetic_ticks(seed, days=1.5):
+    rng = np.random.default_rng(seed)
+    n = int(days * 86400 / 7)
+    ts = 1.7e9 + np.cumsum(rng.uniform(3, 11, n))
+    prices = 30000 * np.exp(np.cumsum(rng.normal(0.00003, 0.0015, n)))
+    return ts, prices, changes_from_prices(ts, prices)
+
+
+class VirtualClock(selectors.DefaultSelector):
+    """Selector that jumps the clock to the next timer instead of sleeping"""
+
+    def __init__(self, now):
+        super().__init__()
+        self.now = now
+
+    def select(self, timeout=None):
+        if timeout:
+            self.now += timeout
+        return super().select(0)
+
+
+class ReplaySource:
+    """The replay's quote at the event loop's virtual time"""
+
+    def __init__(self, replay, clock):
+        self.replay = replay
+        self.clock = clock
+
+    def getQuote(self, coin, priority=None):
+        self.replay.seek(self.clock.now)
+        return self.replay.getQuote(coin)
+
+    def getQuotes(self, coins, priority=None):
+        return {coin: self.getQuote(coin) for coin in coins}
+
+    def getPrice(self, coin, priority=None):
+        return self.getQuote(coin)[0]
+
+    def changesof24h(self, coin, priority=None):
+        return self.getQuote(coin)[1]
+
+    def stats(self):
+        return {}
+
+
+def run_live_bot(ts, prices, changes, mode, monkeypatch):
+    """Runs the real TradingBot over the ticks on a virtual-time event loop and returns its trades"""
+    async def inline(func, *args, **kwargs):
+        return func(*args, **kwargs)
+
+    monkeypatch.setattr(main, "run_blocking", inline)
+    monkeypatch.setattr(engine, "run_blocking", inline)
+    monkeypatch.setattr(main, "QuoteBatcher", lambda fetch_many: engine.QuoteBatcher(fetch_many, window=0))
+    clear_windows()
+    clear_candles()
+
+    clock = VirtualClock(float(ts[0]))
+    loop = asyncio.SelectorEventLoop(clock)
+    loop.time = lambda: clock.now
+    # Unix-scale times are too coarse for the default 1 ns resolution: timers due now would never run
+    loop._clock_resolution = 1e-6
+    replay = TickReplay("bitcoin", ts, prices, changes)
+    source = ReplaySource(replay, clock)
+    trades = []
+
+    def record(coin, action, price, reason, **fields):
+        replay.seek(clock.now)
+        trades.append({"timestamp": replay.now().isoformat(), "coin": coin, "action": action,
+                       "price": price, "reason": reason, **fields})
+
+    bot = main.TradingBot(mode=mode, coins="bitcoin", source=source, feed="poll", warm_start=False, backfill=False,
+                          recorder=record, save_checkpoint=lambda snapshot: None, load_checkpoint=lambda: None)
+    ledger = SignalLedger(clock=lambda: (replay.seek(clock.now), replay.now())[1], persist=False)
+    bot.strategy = TradingStrategy(mode=mode, ledger=ledger, source=source, recorder=record)
+    bot.states = {coin: main.CoinState(coin, bot.window_size) for coin in bot.coins}
+    bot.is_running = True
+
+    async def stop_at_the_end():
+        while clock.now < ts[-1]:
+            await asyncio.sleep(30)
+        bot.stop()
+
+    async def run():
+        stopper = asyncio.ensure_future(stop_at_the_end())
+        await bot.run()
+        stopper.cancel()
+
+    try:
+        loop.run_until_complete(run())
+    finally:
+        loop.close()
+    return trades
+
+
+@pytest.mark.parametrize("mode, seed", [("default", 1), ("aggressive", 3)])
+def test_backtest_replays_the_same_trades_as_the_live_bot(mode, seed, database, monkeypatch):
+    ts, prices, changes = synthetic_ticks(seed)
+    expected = Backtest(ts, prices, changes, mode=mode).run().trades
+
+    live = run_live_bot(ts, prices, changes, mode, monkeypatch)
+
+    assert len(expected) >= 4
+    assert live == expected
@@ -0,0 +1,34 @@
+import random
+import pytest
+from database.candles import CandleSeries
+
+
+def test_first_tick_after_a_reload_fills_the_downtime_with_flat_candles():
+    series = CandleSeries(60, capacity=100)
+    series.load([(0, 1.0, 1.0, 1.0, 1.0, 3), (60, 2.0, 2.5, 1.5, 2.0, 3)])
+
+    closed = series.add(10 * 60 + 5, 5.0)
+
+    assert [candle[0] for candle in closed] == list(range(120, 600, 60))
+    assert all(candle[1:] == (2.0, 2.0, 2.0, 2.0, 0) for candle in closed)
+    assert len(series) == 10
+    assert series.close_mean(8) == 2.0
+    assert series.current == [600, 5.0, 5.0, 5.0, 5.0, 1]
+
+
+def test_close_mean_matches_the_closed_candles_while_the_ring_wraps():
+    series = CandleSeries(60, capacity=7)
+    rng = random.Random(5)
+    closes = []
+    ts, price = 0.0, 100.0
+    for _ in range(3000):
+        # Mostly several ticks per candle, sometimes a gap of a few minutes
+        ts += rng.choice([7, 13, 29, 61, 250])
+        price *= 1 + rng.gauss(0, 0.003)
+        closes.extend(candle[4] for candle in series.add(ts, price))
+        for n in range(1, len(series) + 1):
+            assert series.close_mean(n) == pytest.approx(sum(closes[-n:]) / n, rel=1e-12)
+        assert series.candles()[:, 4].tolist() == closes[-len(series):]
+    assert len(series) == 7 and len(closes) > 7 * 50
+    with pytest.raises(ValueError):
+        series.close_mean(8)
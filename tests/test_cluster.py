@@ -0,0 +1,30 @@
+from cluster import Supervisor
+
+
+def trade(coin):
+    return {"coin": coin, "buy_price": 100.0}
+
+
+def test_retire_keeps_track_of_positions_on_unwatched_coins(monkeypatch):
+    supervisor = Supervisor(coins="bitcoin,ethereum,solana", workers=3, source=object())
+    spawned = []
+    monkeypatch.setattr(supervisor, "spawn", lambda worker, snapshot=None: spawned.append((worker.index, snapshot)))
+    monkeypatch.setattr(supervisor, "halt", lambda worker: None)
+    monkeypatch.setattr(supervisor, "save", lambda: None)
+    first, second, third = supervisor.workers
+    # The first worker also holds a position on a coin that was dropped from the watch list
+    supervisor.checkpoints = {
+        0: {"window_size": 60, "saved_at": 0, "states": {}, "positions": [trade("bitcoin"), trade("dogecoin")]},
+        1: {"window_size": 60, "saved_at": 0, "states": {}, "positions": []},
+        2: {"window_size": 60, "saved_at": 0, "states": {}, "positions": []},
+    }
+
+    supervisor.retire(first)
+    holder = next(worker for worker in supervisor.workers if "dogecoin" in worker.coins)
+    assert sorted(trade["coin"] for trade in spawned[-1][1]["positions"]) == ["bitcoin", "dogecoin"]
+
+    supervisor.checkpoints[holder.index] = spawned[-1][1]
+    supervisor.retire(holder)
+    (last,) = supervisor.workers
+    assert sorted(last.coins) == ["bitcoin", "dogecoin", "ethereum", "solana"]
+    assert sorted(trade["coin"] for trade in spawned[-1][1]["positions"]) == ["bitcoin", "dogecoin"]
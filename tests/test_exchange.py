@@ -0,0 +1,42 @@
+import numpy as np
+from exchange import BUY, LIMIT, MARKET, SELL, STOP, PaperExchange
+
+
+def place_orders(exchange, coin, price):
+    """A mix of resting limits, stops and market orders still waiting out the latency"""
+    rng = np.random.default_rng(11)
+    for k in range(40):
+        side = BUY if k % 2 else SELL
+        kind = [LIMIT, STOP, MARKET][k % 3]
+        level = None if kind == MARKET else price * (1 + rng.uniform(-0.08, 0.08))
+        exchange.submit(coin, side, 1 + k % 4, kind, level, on_fill=lambda fill: follow_up(exchange, fill))
+
+
+def follow_up(exchange, fill):
+    # Take profit on every filled buy, so orders also arrive in the middle of a replay
+    if fill.side == BUY and fill.order_id < 100:
+        exchange.submit(fill.coin, SELL, fill.size, LIMIT, fill.price * 1.01)
+
+
+def test_replay_fills_exactly_like_quoting_every_tick():
+    rng = np.random.default_rng(12)
+    ts = 1000.0 + np.cumsum(rng.uniform(0.5, 2.0, 200000))
+    prices = 100.0 * np.exp(np.cumsum(rng.normal(0, 0.0001, len(ts))))
+
+    looped = PaperExchange(latency=5, clock=lambda: 1000.0)
+    place_orders(looped, "bitcoin", prices[0])
+    expected = []
+    for t, price in zip(ts, prices):
+        expected.extend(looped.quote("bitcoin", float(price), float(t)))
+
+    replayed = PaperExchange(latency=5, clock=lambda: 1000.0)
+    place_orders(replayed, "bitcoin", prices[0])
+    fills = replayed.replay("bitcoin", ts, prices)
+
+    def summary(fills):
+        return [(fill.order_id, fill.side, fill.price, fill.ts, fill.fee) for fill in fills]
+
+    assert len(expected) > 40 and replayed.open_orders()
+    assert summary(fills) == summary(expected)
+    assert sorted(replayed.orders) == sorted(looped.orders)
+    assert (replayed.fills, replayed.volume, replayed.fees) == (looped.fills, looped.volume, looped.fees)
@@ -0,0 +1,31 @@
+from database.journal import TradeJournal
+
+
+def test_torn_last_line_is_skipped_and_the_next_record_starts_cleanly(workdir):
+    path = str(workdir / "trade_history.jsonl")
+    journal = TradeJournal(path, fsync="never")
+    journal.append({"coin": "bitcoin", "action": "buy", "price": 100.0})
+    journal.append({"coin": "bitcoin", "action": "sell", "price": 101.0})
+    journal.close()
+    with open(path, "ab") as file:
+        file.write(b'{"coin": "bitcoin", "action": "bu')  # crash mid-write
+
+    reopened = TradeJournal(path, fsync="never")
+    assert [record["action"] for record in reopened] == ["buy", "sell"]
+
+    reopened.append({"coin": "ethereum", "action": "buy", "price": 2000.0})
+    reopened.close()
+    records = list(TradeJournal(path))
+    assert [(record["coin"], record["action"]) for record in records] == [
+        ("bitcoin", "buy"), ("bitcoin", "sell"), ("ethereum", "buy")]
+
+
+def test_read_from_resumes_at_the_returned_offset(workdir):
+    journal = TradeJournal(str(workdir / "trade_history.jsonl"), fsync="never")
+    for price in range(5):
+        journal.append({"price": price})
+    first, offset = journal.read_from(0, limit=3)
+    rest, end = journal.read_from(offset)
+    assert [record["price"] for record in first + rest] == [0, 1, 2, 3, 4]
+    assert journal.read_from(end) == ([], end)
+    journal.close()
@@ -0,0 +1,48 @@
+import datetime
+from database.ledger import SignalLedger
+
+
+class Clock:
+    def __init__(self, now):
+        self.now = now
+
+    def __call__(self):
+        return self.now
+
+
+def test_counts_are_per_coin_signal_and_day():
+    clock = Clock(datetime.datetime(2024, 1, 1, 12))
+    ledger = SignalLedger(clock=clock, persist=False)
+    for signal in ["buy", "reject", "reject", "buy", "reject"]:
+        ledger.record("bitcoin", signal, 1)
+    ledger.record("ethereum", "reject", 0)
+
+    assert ledger.count("bitcoin", "buy") == 2
+    assert ledger.count("bitcoin", "reject") == 3
+    assert ledger.count("ethereum", "reject") == 1
+    assert ledger.count("ethereum", "buy") == 0
+
+    clock.now += datetime.timedelta(days=1)
+    assert ledger.count("bitcoin", "reject") == 0
+    ledger.record("bitcoin", "buy", 1)
+    # The previous day's counts are dropped once the new day starts
+    assert list(ledger._counts) == [("bitcoin", "2024-01-02", "buy")]
+    assert ledger.count("bitcoin", "reject", day=datetime.date(2024, 1, 1)) == 0
+
+
+def test_a_new_ledger_loads_the_day_recorded_before_it(database):
+    clock = Clock(datetime.datetime(2024, 1, 1, 12))
+    ledger = SignalLedger(clock=clock)
+    for _ in range(3):
+        ledger.record("bitcoin", "reject", 0)
+    ledger.record("bitcoin", "buy", 1)
+
+    restarted = SignalLedger(clock=clock)
+    assert restarted.count("bitcoin", "reject") == 3
+    restarted.record("bitcoin", "reject", 0)
+    assert restarted.count("bitcoin", "reject") == 4
+    assert restarted.count("bitcoin", "buy") == 1
+
+    clock.now += datetime.timedelta(days=1)
+    assert restarted.count("bitcoin", "reject") == 0
+    assert restarted.count("bitcoin", "reject", day=datetime.date(2024, 1, 1)) == 4
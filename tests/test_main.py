@@ -0,0 +1,92 @@
+import asyncio
+import time
+import numpy as np
+import pytest
+import main
+from database.candles import get_candles, clear_candles
+from database.db import initialize_database
+from database.window import get_window, clear_windows
+from main import resample_history, COLLECT_INTERVAL
+from market import MarketDataSource
+from operation.volatility import clear_indicators, compute, get_indicators, indicator_name
+
+
+def test_resample_history_keeps_history_at_the_warm_up_spacing():
+    ts = 1_000_000 + np.arange(0, 3600, COLLECT_INTERVAL, dtype=np.float64)
+    prices = 100 + np.sin(ts / 300)
+
+    times, points, changes = resample_history(ts, prices, 60, COLLECT_INTERVAL)
+
+    assert times == ts[-60:].tolist()
+    np.testing.assert_allclose(points, prices[-60:])
+    assert len(changes) == 60
+
+
+def test_resample_history_rejects_history_coarser_than_the_warm_up_spacing():
+    ts = np.arange(0, 24 * 3600 + 1, 5 * 60, dtype=np.float64)
+    assert resample_history(ts, np.full(len(ts), 100.0), 60, COLLECT_INTERVAL) is None
+
+
+def test_resample_history_rejects_a_gap_inside_the_window():
+    ts = np.arange(0, 3600, COLLECT_INTERVAL, dtype=np.float64)
+    ts = np.delete(ts, slice(-30, -25))
+    assert resample_history(ts, np.full(len(ts), 100.0), 60, COLLECT_INTERVAL) is None
+
+
+def test_resample_history_needs_history_spanning_the_window():
+    ts = np.arange(0, 300, COLLECT_INTERVAL, dtype=np.float64)
+    assert resample_history(ts, np.full(len(ts), 100.0), 60, COLLECT_INTERVAL) is None
+
+
+class HistorySource(MarketDataSource):
+    """Serves a fresh price history at `history_resolution` and counts the requests"""
+
+    def __init__(self, history_resolution):
+        super().__init__(ttl=0)
+        self.history_resolution = history_resolution
+        self.requests = 0
+
+    def fetchHistory(self, coin, days):
+        self.requests += 1
+        ts = time.time() - np.arange(3600, -1, -self.history_resolution)
+        return ts.tolist(), (100 + np.sin(ts / 300)).tolist()
+
+
+def test_backfill_skips_sources_whose_history_is_coarser_than_the_warm_up():
+    source = HistorySource(5 * 60)
+    bot = main.TradingBot(coins="bitcoin", source=source, backfill=True)
+    bot.states = {"bitcoin": main.CoinState("bitcoin")}
+
+    assert asyncio.run(bot.backfill_window("bitcoin")) is False
+    assert source.requests == 0 and not bot.states["bitcoin"].ready
+
+
+def test_backfill_fills_the_window_from_fine_history(database):
+    initialize_database()
+    clear_windows()
+    source = HistorySource(COLLECT_INTERVAL)
+    bot = main.TradingBot(coins="bitcoin", source=source, backfill=True)
+    bot.states = {"bitcoin": main.CoinState("bitcoin")}
+
+    assert asyncio.run(bot.backfill_window("bitcoin")) is True
+    assert source.requests == 1 and bot.states["bitcoin"].ready
+    assert len(get_window("bitcoin")) == main.WINDOW_SIZE
+
+
+def test_restarting_in_the_same_process_rebuilds_the_indicators_once(database):
+    initialize_database()
+    clear_candles()
+    clear_indicators()
+    closes = 100 * np.exp(np.cumsum(np.random.default_rng(2).normal(0, 0.002, 50)))
+    start = time.time() // 60 * 60 - 50 * 60
+    get_candles("bitcoin").series["1m"].load(
+        [(start + i * 60, close, close * 1.001, close * 0.999, close, 1) for i, close in enumerate(closes)])
+    bot = main.TradingBot(coins="bitcoin", indicators="rsi:14,atr:14,stdev:14,zscore:14", load_checkpoint=lambda: None)
+    bot.states = {"bitcoin": main.CoinState("bitcoin")}
+
+    for _ in range(2):  # Start, then Stop and Start again
+        bot.restore()
+
+    expected = compute(bot.strategy.indicators, closes, closes * 1.001, closes * 0.999)
+    for (kind, period), indicator in get_indicators("bitcoin").indicators.items():
+        assert indicator.value == pytest.approx(expected[indicator_name(kind, period)][-1], rel=1e-9)
@@ -0,0 +1,117 @@
+import threading
+import pytest
+import market
+from market import (CoinGeckoSource, QuoteCache, RequestScheduler, retry_after, PRIORITY_COLLECT,
+                    PRIORITY_POSITION, PRIORITY_SIGNAL)
+from standin import StandIn, build_paths, serve
+
+
+@pytest.fixture
+def throttling_standin():
+    server = serve(StandIn(build_paths(["bitcoin"], seed=1), throttle_rate=1.0), port=0)
+    yield f"http://127.0.0.1:{server.server_address[1]}/api/v3"
+    server.shutdown()
+
+
+def test_retry_after_reads_the_header_behind_pycoingecko_errors(throttling_standin):
+    source = CoinGeckoSource(throttling_standin)
+    with pytest.raises(ValueError) as error:
+        source.fetchQuotes(["bitcoin"])
+    assert retry_after(error.value) == 60
+
+
+def test_a_429_without_retry_after_pauses_for_a_full_bucket_refill():
+    scheduler = RequestScheduler(rate_limit=30, burst=5, max_retries=1, seed=1)
+    pauses = []
+    scheduler.pause = pauses.append
+    calls = []
+
+    def fetch():
+        calls.append(1)
+        if len(calls) == 1:
+            raise ValueError({"status": {"error_code": 429, "error_message": "You've exceeded the Rate Limit."}})
+        return "quote"
+
+    assert scheduler.call(fetch) == "quote"
+    assert pauses == [pytest.approx(10.0)]
+
+
+
+def test_concurrent_gets_for_one_coin_share_a_single_fetch():
+    release = threading.Event()
+    calls = []
+
+    def fetch(coins):
+        calls.append(list(coins))
+        release.wait(5)
+        return {coin: (100.0 + len(calls), 1.5) for coin in coins}
+
+    cache = QuoteCache(fetch, ttl=60)
+    results = [None] * 8
+
+    def get(i):
+        results[i] = cache.get("bitcoin")
+
+    threads = [threading.Thread(target=get, args=(i,)) for i in range(8)]
+    threads[0].start()
+    while not calls:
+        pass
+    for thread in threads[1:]:
+        thread.start()
+    while cache.coalesced < 7:
+        pass
+    release.set()
+    for thread in threads:
+        thread.join(5)
+
+    assert calls == [["bitcoin"]]
+    assert results == [(101.0, 1.5)] * 8
+    assert (cache.misses, cache.coalesced, cache.requests) == (1, 7, 1)
+
+    assert cache.get("bitcoin") == (101.0, 1.5)
+    assert (cache.hits, cache.requests) == (1, 1)
+
+
+def test_expired_quotes_are_fetched_again():
+    calls = []
+
+    def fetch(coins):
+        calls.append(list(coins))
+        return {coin: (float(len(calls)), 0.0) for coin in coins}
+
+    cache = QuoteCache(fetch, ttl=0)
+    assert [cache.get("bitcoin"), cache.get("bitcoin")] == [(1.0, 0.0), (2.0, 0.0)]
+    assert (cache.hits, cache.misses) == (0, 2)
+
+
+def test_get_many_fetches_only_the_uncached_coins_in_one_request():
+    calls = []
+
+    def fetch(coins):
+        calls.append(list(coins))
+        return {coin: (100.0 + len(calls), 1.5) for coin in coins if coin != "delisted"}
+
+    cache = QuoteCache(fetch, ttl=60)
+    cache.get("bitcoin")
+    quotes = cache.get_many(["bitcoin", "ethereum", "solana", "ethereum", "delisted"])
+
+    assert calls == [["bitcoin"], ["ethereum", "solana", "delisted"]]
+    assert quotes == {"bitcoin": (101.0, 1.5), "ethereum": (102.0, 1.5), "solana": (102.0, 1.5)}
+    assert (cache.hits, cache.misses, cache.requests) == (1, 4, 2)
+
+
+def test_module_helpers_pass_the_priority_to_the_source(monkeypatch):
+    class Source:
+        def __init__(self):
+            self.priorities = []
+
+        def getQuote(self, coin, priority):
+            self.priorities.append(priority)
+            return 100.0, 1.5
+
+    source = Source()
+    monkeypatch.setattr(market, "_source", source)
+    assert market.getPrice("bitcoin", PRIORITY_POSITION) == 100.0
+    assert market.changesof24h("bitcoin", PRIORITY_COLLECT) == 1.5
+    assert market.getQuote("bitcoin") == (100.0, 1.5)
+    assert source.priorities == [PRIORITY_POSITION, PRIORITY_COLLECT, PRIORITY_SIGNAL]
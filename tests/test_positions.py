@@ -0,0 +1,37 @@
+import random
+import pytest
+from positions import PositionBook
+from trade_manager import open_trade
+
+
+def test_position_book_matches_updating_every_position_on_every_price():
+    # 2000 positions opened along a random path, 10 per price, in both modes
+    rng = random.Random(1)
+    book, book_fills = PositionBook("bitcoin"), []
+    open_positions, loop_fills = {}, []
+
+    def recorder(fills, position_id):
+        return lambda coin, action, price, reason, **fields: fills.append((position_id, action, price, reason))
+
+    price = 100.0
+    for step in range(205):
+        for position_id in range(step * 10 + 1, step * 10 + 11) if step < 200 else ():
+            mode = rng.choice(["default", "aggressive"])
+            buy_price = price * (1 + rng.gauss(0, 0.002))
+            profit_percent = rng.choice([0.2, 0.5, 1])
+            book.add(position_id, open_trade("bitcoin", buy_price, 1000, mode, profit_percent,
+                                             recorder(book_fills, position_id)))
+            open_positions[position_id] = open_trade("bitcoin", buy_price, 1000, mode, profit_percent,
+                                                     recorder(loop_fills, position_id))
+        price *= 1 + rng.gauss(0.0002, 0.002)
+
+        closed = {position_id for position_id, _ in book.update(price)}
+        expected = {position_id for position_id, trade in list(open_positions.items()) if trade.update(price)}
+        for position_id in expected:
+            del open_positions[position_id]
+        assert closed == expected
+        assert sorted(book_fills) == sorted(loop_fills)
+
+    assert 0 < len(book) == len(open_positions) < 2000
+    assert book.levels() == (max(trade.stop_price for trade in open_positions.values()),
+                             min(trade.next_target for trade in open_positions.values()))
@@ -0,0 +1,30 @@
+import asyncio
+import market
+import trade_manager
+from market import MarketDataSource
+from trade_manager import open_trade, monitor_trade
+
+
+class ScriptedSource(MarketDataSource):
+    """Quotes the next scripted price on every fetch"""
+
+    def __init__(self, prices):
+        super().__init__(ttl=0)
+        self.prices = iter(prices)
+
+    def fetchQuotes(self, coins):
+        price = next(self.prices)
+        return {coin: (price, 0.0) for coin in coins}
+
+
+def test_monitor_trade_polls_the_source_without_an_injected_feed(monkeypatch):
+    monkeypatch.setattr(market, "_source", ScriptedSource([100.0, 101.5, 100.5]))
+    monkeypatch.setattr(trade_manager, "MONITOR_MIN_INTERVAL", 0.01)
+    monkeypatch.setattr(trade_manager, "MONITOR_MAX_INTERVAL", 0.01)
+    fills = []
+    trade = open_trade("bitcoin", 100.0, 1000, "default", 1, recorder=lambda *args, **fields: fills.append(args))
+
+    closed = asyncio.run(asyncio.wait_for(monitor_trade(trade), 5))
+
+    assert closed and trade.closed
+    assert fills == [("bitcoin", "sell", 100.5, "Default mode profit: $5.00")]
@@ -0,0 +1,38 @@
+import numpy as np
+import pytest
+from operation.volatility import INDICATORS, IndicatorSet, StdDev, ZScore, compute, indicator_name, stdev, zscore
+
+
+def gbm(n, start=60000.0, sigma=0.002, seed=7):
+    rng = np.random.default_rng(seed)
+    return start * np.exp(np.cumsum(rng.normal(0, sigma, n)))
+
+
+def stream(indicator, close):
+    return np.array([indicator.update(price) for price in close])
+
+
+@pytest.mark.parametrize("period", [2, 14, 200])
+def test_streaming_stdev_and_zscore_stay_exact_while_prices_drift(period):
+    # The path wanders far from its first price, where a fixed shift used to lose precision
+    close = gbm(20000)
+
+    assert stream(StdDev(period), close) == pytest.approx(stdev(close, period), abs=1e-9, nan_ok=True)
+    assert stream(ZScore(period), close) == pytest.approx(zscore(close, period), abs=1e-7, nan_ok=True)
+
+
+@pytest.mark.parametrize("kind", list(INDICATORS))
+@pytest.mark.parametrize("period", [1, 5, 14])
+def test_batch_compute_matches_streaming_every_bar(kind, period):
+    close = gbm(3000, seed=3)
+    spread = np.abs(np.random.default_rng(4).normal(0, 0.001, len(close))) * close
+    high, low = close + spread, close - spread
+    indicators = IndicatorSet([(kind, period)])
+    streamed = []
+    for bar in zip(close, high, low):
+        indicators.update(*bar)
+        streamed.append(indicators.indicators[kind, period].value)
+
+    batch = compute([(kind, period)], close, high, low)[indicator_name(kind, period)]
+    assert np.isnan(streamed).tolist() == np.isnan(batch).tolist()
+    assert streamed == pytest.approx(batch, rel=1e-9, abs=1e-9, nan_ok=True)
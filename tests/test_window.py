@@ -0,0 +1,21 @@
+import numpy as np
+from database.window import RingBuffer
+
+
+def test_ring_buffer_keeps_the_last_values_in_order_across_wraps():
+    buffer = RingBuffer(5)
+    for value in range(1, 13):
+        buffer.append(value)
+        expected = np.arange(max(1, value - 4), value + 1, dtype=np.float64)
+        assert buffer.values().tolist() == expected.tolist()
+        assert buffer.mean() == expected.mean()
+        assert buffer.last() == value
+    assert len(buffer) == 5 and buffer.full
+
+
+def test_ring_buffer_mean_recovers_after_a_huge_value_leaves_the_window():
+    # The running sum is recomputed once per lap, so the 1e16 can't leave rounding error behind
+    buffer = RingBuffer(4)
+    buffer.extend([1e16, 1.0, 1.0, 1.0])
+    buffer.extend([1.0] * 8)
+    assert buffer.mean() == 1.0
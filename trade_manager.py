@@ -1,104 +1,284 @@
-import time
-import json
-from market import getPrice
 from database.db import record_trade
+from feed import PollingFeed
+from telemetry import get_logger, metrics
 
-TRADE_HISTORY_FILE = "trade_history.json"
+MONITOR_INTERVAL = 10  # seconds between price checks on an open trade
+MONITOR_MIN_INTERVAL = 2  # price checks when the price is right at the stop or target
+MONITOR_MAX_INTERVAL = 30  # price checks when the price is a full profit step away from both
 
-def manage_trade(coin, buy_price, total_money, mode="default", profit_percent=1):
+log = get_logger("trade")
+
+
+class Trade:
     """
-    Monitors an open trade with support for aggressive mode.
-    
-    Args:
-        coin: The cryptocurrency to trade
-        buy_price: Entry price
-        total_money: Total money available for trading
-        mode: Trading mode ('default' or 'aggressive')
-        profit_percent: Target profit percentage
+    Execution shared by the trade modes. Without an exchange every entry and
+    exit fills at the price checked. With one (see exchange.py) they are sent
+    as market orders and the fills it reports set the real entry, exit and
+    fees, so `profit` is net of spread, slippage and fees.
     """
-    if mode.lower() == "aggressive":
-        return manage_aggressive_trade(coin, buy_price, total_money, profit_percent)
-    else:
-        return manage_default_trade(coin, buy_price, total_money, profit_percent)
 
-def manage_default_trade(coin, buy_price, total_money, profit_percent):
+    exchange = None
+    fees = 0.0
+    journaled_fees = 0.0  # part of `fees` already on journaled fills
+
+    def execute(self, action, price, reason, on_fill=None, **fields):
+        """
+        Fills `size` coins at `price`, or on the exchange, and records the fill.
+        `reason` may be a callable, evaluated once the fill is known.
+        """
+        if self.exchange is None:
+            self.recorder(self.coin, action, price, reason() if callable(reason) else reason, **fields)
+            return
+
+        def filled(fill):
+            self.fees += fill.fee
+            if on_fill is not None:
+                on_fill(fill)
+            # Fees of unjournaled fills (the default mode entry) go on the next journaled one
+            fee, self.journaled_fees = self.fees - self.journaled_fees, self.fees
+            self.recorder(self.coin, action, fill.price, reason() if callable(reason) else reason,
+                          **fields, fee=fee)
+
+        self.exchange.submit(self.coin, action, fields["size"], on_fill=filled)
+
+    def exit(self, price, reason, **fields):
+        """Sells the whole position; the profit is updated again when the exchange reports the fill"""
+        size = self.position_size
+        entry = self.average_entry
+
+        def filled(fill):
+            self.profit = (fill.price - entry) * size - self.fees
+
+        self.profit = (price - entry) * size - self.fees
+        self.execute("sell", price, lambda: reason(self.profit), on_fill=filled, size=size, entry=entry, **fields)
+
+
+class DefaultTrade(Trade):
     """Default trading mode - enters with full amount"""
-    target_price = buy_price * (1 + (profit_percent / 100))
-    last_profit_target = buy_price
-    position_size = total_money / buy_price
 
-    print(f"📈 Entering default trade with {position_size} {coin} at ${buy_price}")
-    
-    while True:
-        current_price = getPrice(coin)
+    fill_price = None  # entry price reported by the exchange
+
+    def __init__(self, coin, buy_price, total_money, profit_percent, recorder=record_trade, exchange=None):
+        self.coin = coin
+        self.buy_price = buy_price
+        self.profit_percent = profit_percent
+        self.recorder = recorder
+        self.exchange = exchange
+        self.target_price = buy_price * (1 + (profit_percent / 100))
+        self.last_profit_target = buy_price
+        self.position_size = total_money / buy_price
+        self.closed = False
+        self.profit = None
 
-        if current_price >= target_price:
-            last_profit_target = target_price
-            target_price *= (1 + (profit_percent / 100))
-            print(f"📈 New profit target: ${target_price}")
+        log.info("📈 Entering default trade", coin=coin, size=self.position_size, price=buy_price)
+        if exchange is not None:
+            # The strategy journals the entry signal; only the exchange's fill is kept here
+            exchange.submit(coin, "buy", self.position_size, on_fill=self.entry_filled)
 
-        elif current_price < last_profit_target:
-            profit = (current_price - buy_price) * position_size
-            print(f"✅ Taking profit: ${profit:.2f}")
-            record_trade(coin, "sell", current_price, f"Default mode profit: ${profit:.2f}")
-            return True
+    def entry_filled(self, fill):
+        self.fill_price = fill.price
+        self.fees += fill.fee
 
-        time.sleep(10)
+    @property
+    def average_entry(self):
+        return self.buy_price if self.fill_price is None else self.fill_price
 
-def manage_aggressive_trade(coin, buy_price, total_money, profit_percent):
+    @property
+    def stop_price(self):
+        return self.last_profit_target
+
+    @property
+    def next_target(self):
+        return self.target_price
+
+    def unrealized(self, current_price):
+        return (current_price - self.average_entry) * self.position_size - self.fees
+
+    def update(self, current_price):
+        """Applies one price check. Returns True once the trade is closed."""
+        if current_price >= self.target_price:
+            self.last_profit_target = self.target_price
+            self.target_price *= (1 + (self.profit_percent / 100))
+            log.info("📈 New profit target", coin=self.coin, target=self.target_price)
+
+        elif current_price < self.last_profit_target:
+            self.exit(current_price, lambda profit: f"Default mode profit: ${profit:.2f}")
+            log.info("✅ Taking profit", coin=self.coin, price=current_price, profit=self.profit)
+            self.closed = True
+
+        return self.closed
+
+
+class AggressiveTrade(Trade):
     """Aggressive trading mode - enters in three parts"""
-    initial_target = buy_price * (1 + (profit_percent / 100))
-    second_target = initial_target * (1 + (profit_percent / 100))
-    final_target = second_target * (1 + (profit_percent / 100))
-    
-    # Calculate position sizes (1/3 each)
-    coin_per_entry = (total_money / buy_price) / 3
-    positions = {
-        "first": {"size": coin_per_entry, "active": True},
-        "second": {"size": coin_per_entry, "active": False},
-        "third": {"size": coin_per_entry, "active": False}
-    }
-    
-    last_profit_target = buy_price
-    current_target = initial_target
-    
-    print(f"📈 Entering first position: {coin_per_entry} {coin} at ${buy_price}")
-    record_trade(coin, "buy", buy_price, f"Aggressive mode - First entry (1/3)")
-    
-    while True:
-        current_price = getPrice(coin)
-        
+
+    def __init__(self, coin, buy_price, total_money, profit_percent, recorder=record_trade, exchange=None):
+        self.coin = coin
+        self.buy_price = buy_price
+        self.profit_percent = profit_percent
+        self.recorder = recorder
+        self.exchange = exchange
+        self.initial_target = buy_price * (1 + (profit_percent / 100))
+        self.second_target = self.initial_target * (1 + (profit_percent / 100))
+        self.final_target = self.second_target * (1 + (profit_percent / 100))
+
+        # Calculate position sizes (1/3 each)
+        coin_per_entry = (total_money / buy_price) / 3
+        self.positions = {
+            "first": {"size": coin_per_entry, "active": True, "price": buy_price},
+            "second": {"size": coin_per_entry, "active": False},
+            "third": {"size": coin_per_entry, "active": False}
+        }
+
+        self.last_profit_target = buy_price
+        self.current_target = self.initial_target
+        self.closed = False
+        self.profit = None
+
+        log.info("📈 Entering first position", coin=coin, size=coin_per_entry, price=buy_price)
+        self.enter("first", buy_price, f"Aggressive mode - First entry (1/3)")
+
+    def enter(self, tranche, price, reason):
+        position = self.positions[tranche]
+        position.update(active=True, price=price)
+
+        def filled(fill):
+            position["price"] = fill.price
+
+        self.execute("buy", price, reason, on_fill=filled, size=position["size"])
+
+    @property
+    def position_size(self):
+        return sum(p["size"] for p in self.positions.values() if p["active"])
+
+    @property
+    def average_entry(self):
+        """Size-weighted entry price of the active tranches"""
+        active = [p for p in self.positions.values() if p["active"]]
+        # Checkpoints written before tranche prices were kept only know the first entry
+        cost = sum(p["size"] * p.get("price", self.buy_price) for p in active)
+        return cost / sum(p["size"] for p in active)
+
+    @property
+    def stop_price(self):
+        return self.last_profit_target
+
+    @property
+    def next_target(self):
+        return self.current_target
+
+    def unrealized(self, current_price):
+        return (current_price - self.average_entry) * self.position_size - self.fees
+
+    def update(self, current_price):
+        """Applies one price check. Returns True once the trade is closed."""
+        positions = self.positions
+
         # Check for target hits
-        if current_price >= current_target:
+        if current_price >= self.current_target:
             if not positions["second"]["active"]:
                 # Enter second position
-                positions["second"]["active"] = True
-                print(f"📈 Entering second position at ${current_price}")
-                record_trade(coin, "buy", current_price, f"Aggressive mode - Second entry (2/3)")
-                current_target = second_target
-                last_profit_target = current_price
+                log.info("📈 Entering second position", coin=self.coin, price=current_price)
+                self.enter("second", current_price, f"Aggressive mode - Second entry (2/3)")
+                self.current_target = self.second_target
+                self.last_profit_target = current_price
             elif not positions["third"]["active"]:
                 # Enter third position
-                positions["third"]["active"] = True
-                print(f"📈 Entering final position at ${current_price}")
-                record_trade(coin, "buy", current_price, f"Aggressive mode - Final entry (3/3)")
-                current_target = final_target
-                last_profit_target = current_price
+                log.info("📈 Entering final position", coin=self.coin, price=current_price)
+                self.enter("third", current_price, f"Aggressive mode - Final entry (3/3)")
+                self.current_target = self.final_target
+                self.last_profit_target = current_price
             else:
                 # All positions entered, update trailing profit
-                last_profit_target = current_target
-                current_target *= (1 + (profit_percent / 100))
-                print(f"📈 New profit target: ${current_target}")
-        
+                self.last_profit_target = self.current_target
+                self.current_target *= (1 + (self.profit_percent / 100))
+                log.info("📈 New profit target", coin=self.coin, target=self.current_target)
+
         # Check for exit
-        elif current_price < last_profit_target and any(p["active"] for p in positions.values()):
-            total_position = sum(p["size"] for p in positions.values() if p["active"])
-            avg_entry = buy_price  # Simplified average entry calculation
-            profit = (current_price - avg_entry) * total_position
-            print(f"✅ Taking profit on all active positions: ${profit:.2f}")
-            record_trade(coin, "sell", current_price, f"Aggressive mode profit: ${profit:.2f}")
-            return True
-            
-        time.sleep(10)
-
-    print("✅ Trade closed. Restarting data collection...")
\ No newline at end of file
+        elif current_price < self.last_profit_target and any(p["active"] for p in positions.values()):
+            self.exit(current_price, lambda profit: f"Aggressive mode profit: ${profit:.2f}")
+            log.info("✅ Taking profit on all active positions", coin=self.coin, price=current_price, profit=self.profit)
+            self.closed = True
+
+        return self.closed
+
+
+def open_trade(coin, buy_price, total_money, mode="default", profit_percent=1, recorder=record_trade, exchange=None):
+    """Creates the trade object for `mode`; live monitoring and backtests both drive it"""
+    if mode.lower() == "aggressive":
+        return AggressiveTrade(coin, buy_price, total_money, profit_percent, recorder, exchange)
+    return DefaultTrade(coin, buy_price, total_money, profit_percent, recorder, exchange)
+
+
+def trade_state(trade):
+    """JSON-serializable copy of an open trade's levels, tranches, sizes and fees"""
+    state = {key: value for key, value in vars(trade).items() if key not in ("recorder", "exchange")}
+    state["mode"] = "aggressive" if isinstance(trade, AggressiveTrade) else "default"
+    return state
+
+
+def restore_trade(state, recorder=record_trade, exchange=None):
+    """Rebuilds a trade from trade_state() without recording its entry again"""
+    cls = AggressiveTrade if state["mode"] == "aggressive" else DefaultTrade
+    trade = cls.__new__(cls)
+    trade.__dict__.update({key: value for key, value in state.items() if key != "mode"})
+    trade.recorder = recorder
+    trade.exchange = exchange
+    return trade
+
+
+def level_interval(current_price, stop_price, next_target, profit_percent):
+    """
+    Seconds until the next price check. It shrinks linearly as the price
+    approaches the trailing stop or the next target, measured in profit
+    steps, so the request budget goes where an exit or entry is close.
+    """
+    step = current_price * profit_percent / 100
+    if step <= 0:
+        return MONITOR_INTERVAL
+    gap = min(abs(current_price - stop_price), abs(next_target - current_price)) / step
+    return min(MONITOR_MAX_INTERVAL, max(MONITOR_MIN_INTERVAL, gap * MONITOR_MAX_INTERVAL))
+
+
+def monitor_interval(trade, current_price):
+    return level_interval(current_price, trade.stop_price, trade.next_target, trade.profit_percent)
+
+
+async def monitor_trade(trade, feed=None):
+    """
+    Feeds the trade every price the feed delivers until it closes. Polling
+    feeds are paced by monitor_interval, faster near the stop or target.
+    """
+    prices = (feed or PollingFeed()).prices(trade.coin, lambda price: monitor_interval(trade, price))
+    try:
+        async for current_price in prices:
+            with metrics.span("trade_monitor"):
+                closed = trade.update(current_price)
+            if closed:
+                metrics.inc("trades_closed_total")
+                return True
+    finally:
+        await prices.aclose()
+
+async def manage_trade(coin, buy_price, total_money, mode="default", profit_percent=1, feed=None):
+    """
+    Monitors an open trade with support for aggressive mode.
+
+    Args:
+        coin: The cryptocurrency to trade
+        buy_price: Entry price
+        total_money: Total money available for trading
+        mode: Trading mode ('default' or 'aggressive')
+        profit_percent: Target profit percentage
+        feed: PriceFeed delivering the coin's prices (polls CoinGecko by default)
+    """
+    trade = open_trade(coin, buy_price, total_money, mode, profit_percent)
+    return await monitor_trade(trade, feed)
+
+async def manage_default_trade(coin, buy_price, total_money, profit_percent, feed=None):
+    """Default trading mode - enters with full amount"""
+    return await monitor_trade(DefaultTrade(coin, buy_price, total_money, profit_percent), feed)
+
+async def manage_aggressive_trade(coin, buy_price, total_money, profit_percent, feed=None):
+    """Aggressive trading mode - enters in three parts"""
+    return await monitor_trade(AggressiveTrade(coin, buy_price, total_money, profit_percent), feed)
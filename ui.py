@@ -1,14 +1,77 @@
 import tkinter as tk
 from tkinter import ttk, messagebox
 from ttkbootstrap import Style, Window
-import pandas as pd
+import os
+import queue
 import threading
+from collections import deque
+import numpy as np
+from analytics import TradeAnalytics
+from chart import PriceSeries, lttb
+from events import EventBus, TICK, SIGNAL, FILL, POSITION, STATE
 from main import start_bot
-from database.db import load_trade_history
-import json
+from database.db import journal
+from telemetry import get_logger, configure_logging, serve_metrics, METRICS_PORT
 
 # Modern Cyberpunk style
 CYBERPUNK_THEME = "cyborg"
+HISTORY_PAGE_SIZE = 100  # trades materialized in the history Treeview at once
+HISTORY_POLL_INTERVAL = 1.0  # seconds between journal checks
+EVENT_DRAIN_INTERVAL = 200  # milliseconds between batches of bot events
+EVENT_BATCH = 5000  # bot events applied per batch at most
+CHART_PADDING = 50  # pixels around the live chart's plot area
+CHART_MARKERS = 200  # recent fills marked on each coin's chart
+CHART_COLORS = {"line": "#2a9fd6", "buy": "#77b300", "sell": "#cc0000", "text": "#888888", "background": "#060606"}
+BOT_STATES = {"starting": "Starting...", "running": "Running", "stopped": "Stopped"}
+
+log = get_logger("ui")
+
+
+class JournalWatcher(threading.Thread):
+    """
+    Tails the trade journal off the Tk thread. The journal is only read when
+    its size or mtime changed, and only from the last offset; new records are
+    handed to the UI through `queue`. New records also update `analytics`,
+    and `report` holds its latest (summary, per-coin table).
+    """
+
+    def __init__(self, journal, interval=HISTORY_POLL_INTERVAL, analytics=None):
+        super().__init__(name="journal-watcher", daemon=True)
+        self.journal = journal
+        self.interval = interval
+        self.analytics = analytics
+        self.report = None
+        self.queue = queue.Queue()
+        self.offset = 0
+        self._last_stat = None
+        self._stop_event = threading.Event()
+
+    def run(self):
+        while not self._stop_event.is_set():
+            try:
+                self.poll()
+            except Exception as e:
+                log.error("Error reading trade journal", error=str(e))
+            self._stop_event.wait(self.interval)
+
+    def poll(self):
+        try:
+            stat = os.stat(self.journal.path)
+            signature = (stat.st_size, stat.st_mtime_ns)
+        except FileNotFoundError:
+            signature = None  # may still be migrated from the legacy file by read_from
+        if signature is not None and signature == self._last_stat:
+            return
+        records, self.offset = self.journal.read_from(self.offset)
+        self._last_stat = signature
+        if records:
+            if self.analytics is not None:
+                self.analytics.update(records)
+                self.report = (self.analytics.summary(), self.analytics.by_coin())
+            self.queue.put(records)
+
+    def stop(self):
+        self._stop_event.set()
 
 class TradeBotApp:
     def __init__(self, root):
@@ -25,28 +88,50 @@ class TradeBotApp:
         self.risk_age = tk.StringVar()
         self.money = tk.StringVar(value="1000")  # Default $1000
         self.mode = tk.StringVar(value="Default")
+        self.coins = tk.StringVar(value="bitcoin")  # Comma-separated CoinGecko ids
         self.risk_percentage = tk.StringVar(value="2")
         self.target_profit = tk.StringVar(value="1")
         self.bot_status = tk.StringVar(value="Not Running")
+        self.last_signal = tk.StringVar(value="-")
+        self.open_positions = tk.IntVar(value=0)
 
         # Create Tabs
         self.tab_control = ttk.Notebook(root)
         self.overview_tab = ttk.Frame(self.tab_control)
         self.history_tab = ttk.Frame(self.tab_control)
+        self.analytics_tab = ttk.Frame(self.tab_control)
+        self.chart_tab = ttk.Frame(self.tab_control)
         self.settings_tab = ttk.Frame(self.tab_control)
         self.tab_control.add(self.overview_tab, text="Overview")
+        self.tab_control.add(self.chart_tab, text="Live Chart")
         self.tab_control.add(self.history_tab, text="Trade History")
+        self.tab_control.add(self.analytics_tab, text="Analytics")
         self.tab_control.add(self.settings_tab, text="Settings")
         self.tab_control.pack(expand=True, fill="both", padx=10, pady=10)
 
         # Setup Tabs
         self.setup_overview_tab()
         self.setup_history_tab()
+        self.setup_analytics_tab()
+        self.setup_chart_tab()
         self.setup_settings_tab()
         
-        # Update timer
+        # Trade history is read on a watcher thread and drained by the update timer
+        self.trades = []
+        self.history_page = 0
+        self.history_rows_shown = 0
+        self.history_watcher = JournalWatcher(journal, analytics=TradeAnalytics(float(self.money.get())))
+        self.report_shown = None
+        self.history_watcher.start()
         self.root.after(1000, self.update_trade_history)
 
+        # The bot publishes ticks, signals, fills and state changes; the Tk thread drains them in batches
+        self.events = EventBus()
+        self.price_series = {}
+        self.chart_fills = {}
+        self.chart_dirty = False
+        self.root.after(EVENT_DRAIN_INTERVAL, self.drain_events)
+
     def setup_overview_tab(self):
         # Frame for Inputs
         input_frame = ttk.LabelFrame(self.overview_tab, text="Trading Configuration", padding=10)
@@ -61,15 +146,23 @@ class TradeBotApp:
         mode_combo = ttk.Combobox(input_frame, textvariable=self.mode, values=["Default", "Aggressive"], state="readonly")
         mode_combo.grid(row=1, column=1, padx=5, pady=5, sticky="ew")
 
+        # Coins Input
+        ttk.Label(input_frame, text="Coins (comma-separated):").grid(row=2, column=0, padx=5, pady=5, sticky="w")
+        ttk.Entry(input_frame, textvariable=self.coins).grid(row=2, column=1, padx=5, pady=5, sticky="ew")
+
         # Start/Stop Button
         self.start_button = ttk.Button(input_frame, text="Start Bot", command=self.toggle_bot, style="success.TButton")
-        self.start_button.grid(row=2, column=0, columnspan=2, pady=10, sticky="ew")
+        self.start_button.grid(row=3, column=0, columnspan=2, pady=10, sticky="ew")
 
         # Bot Status
         status_frame = ttk.LabelFrame(self.overview_tab, text="Status", padding=10)
         status_frame.pack(fill="x", padx=10, pady=10)
         ttk.Label(status_frame, text="Bot Status:").grid(row=0, column=0, padx=5, pady=5, sticky="w")
         ttk.Label(status_frame, textvariable=self.bot_status, style="info.TLabel").grid(row=0, column=1, padx=5, pady=5, sticky="w")
+        ttk.Label(status_frame, text="Last Signal:").grid(row=1, column=0, padx=5, pady=5, sticky="w")
+        ttk.Label(status_frame, textvariable=self.last_signal, style="info.TLabel").grid(row=1, column=1, padx=5, pady=5, sticky="w")
+        ttk.Label(status_frame, text="Open Positions:").grid(row=2, column=0, padx=5, pady=5, sticky="w")
+        ttk.Label(status_frame, textvariable=self.open_positions, style="info.TLabel").grid(row=2, column=1, padx=5, pady=5, sticky="w")
 
         # Money Overview Section
         money_overview_frame = ttk.LabelFrame(self.overview_tab, text="Trading Overview", padding=10)
@@ -111,9 +204,66 @@ class TradeBotApp:
         scrollbar = ttk.Scrollbar(history_frame, orient="vertical", command=self.tree.yview)
         self.tree.configure(yscrollcommand=scrollbar.set)
         
+        # Paging controls: only one page of trades exists in the Treeview at a time
+        pager = ttk.Frame(self.history_tab)
+        pager.pack(fill="x", padx=10, pady=(0, 10))
+        ttk.Button(pager, text="◀ Older", command=lambda: self.show_history_page(self.history_page - 1)).pack(side="left")
+        ttk.Button(pager, text="Newer ▶", command=lambda: self.show_history_page(self.history_page + 1)).pack(side="left", padx=5)
+        ttk.Button(pager, text="Latest", command=lambda: self.show_history_page(self.last_history_page())).pack(side="left")
+        self.history_page_label = ttk.Label(pager, text="Page 1 / 1 (0 trades)")
+        self.history_page_label.pack(side="right")
+
         self.tree.pack(side="left", fill="both", expand=True)
         scrollbar.pack(side="right", fill="y")
 
+    def setup_analytics_tab(self):
+        # Realized performance, paired from the trade journal by analytics.TradeAnalytics
+        summary_frame = ttk.LabelFrame(self.analytics_tab, text="Performance", padding=10)
+        summary_frame.pack(fill="x", padx=10, pady=10)
+        fields = [
+            ("realized_pnl", "Realized PnL:"),
+            ("trades", "Closed Trades:"),
+            ("win_rate", "Win Rate:"),
+            ("avg_win", "Average Win:"),
+            ("avg_loss", "Average Loss:"),
+            ("profit_factor", "Profit Factor:"),
+            ("max_drawdown", "Max Drawdown:"),
+            ("exposure", "Exposure:"),
+            ("open_positions", "Open Positions:"),
+        ]
+        self.analytics_labels = {}
+        for i, (key, text) in enumerate(fields):
+            row, column = i % 5, (i // 5) * 2
+            ttk.Label(summary_frame, text=text).grid(row=row, column=column, padx=5, pady=5, sticky="w")
+            self.analytics_labels[key] = ttk.Label(summary_frame, text="-", style="info.TLabel")
+            self.analytics_labels[key].grid(row=row, column=column + 1, padx=(5, 30), pady=5, sticky="w")
+
+        coin_frame = ttk.LabelFrame(self.analytics_tab, text="By Coin", padding=10)
+        coin_frame.pack(fill="both", expand=True, padx=10, pady=(0, 10))
+        columns = ("Coin", "Trades", "PnL", "Win Rate", "Avg PnL")
+        self.coin_tree = ttk.Treeview(coin_frame, columns=columns, show="headings")
+        for col in columns:
+            self.coin_tree.heading(col, text=col)
+            self.coin_tree.column(col, width=120)
+        self.coin_tree.pack(fill="both", expand=True)
+
+    def setup_chart_tab(self):
+        # Live prices from the bot's events, downsampled to the canvas width on every redraw
+        controls = ttk.Frame(self.chart_tab)
+        controls.pack(fill="x", padx=10, pady=(10, 0))
+        ttk.Label(controls, text="Coin:").pack(side="left")
+        self.chart_coin = tk.StringVar()
+        self.chart_coin_combo = ttk.Combobox(controls, textvariable=self.chart_coin, values=[], state="readonly", width=20)
+        self.chart_coin_combo.pack(side="left", padx=5)
+        self.chart_price_label = ttk.Label(controls, text="Waiting for prices...", style="info.TLabel")
+        self.chart_price_label.pack(side="right")
+
+        self.chart_canvas = tk.Canvas(self.chart_tab, background=CHART_COLORS["background"], highlightthickness=0)
+        self.chart_canvas.pack(fill="both", expand=True, padx=10, pady=10)
+        self.chart_canvas.bind("<Configure>", lambda event: self.draw_chart())
+        self.chart_coin.trace_add("write", lambda *args: self.draw_chart())
+        self.tab_control.bind("<<NotebookTabChanged>>", lambda event: self.chart_dirty and self.draw_chart())
+
     def setup_settings_tab(self):
         # Frame for Settings
         settings_frame = ttk.LabelFrame(self.settings_tab, text="Trading Settings", padding=10)
@@ -150,14 +300,17 @@ class TradeBotApp:
                 total_money=money,
                 risk_percentage=risk,
                 mode=self.mode.get(),
-                target_profit=profit
+                target_profit=profit,
+                coins=self.coins.get(),
+                events=self.events
             )
             
             self.bot_thread = threading.Thread(target=self.bot.start)
             self.bot_thread.daemon = True
             self.bot_thread.start()
             
-            self.bot_status.set("Running")
+            # Confirmed by the bot's own state events in drain_events
+            self.bot_status.set(BOT_STATES["starting"])
             self.start_button.configure(text="Stop Bot", style="danger.TButton")
             
         except ValueError as e:
@@ -169,7 +322,7 @@ class TradeBotApp:
         if self.bot:
             self.bot.stop()
             self.bot = None
-            self.bot_status.set("Stopped")
+            self.bot_status.set("Stopping...")
             self.start_button.configure(text="Start Bot", style="success.TButton")
 
     def save_settings(self):
@@ -201,32 +354,178 @@ class TradeBotApp:
             pass
 
     def update_trade_history(self):
-        """Update trade history every second"""
+        """Shows trades recorded since the last update; the journal is read by the watcher thread"""
         try:
-            trade_data = load_trade_history()
-            
-            # Clear existing items
-            for item in self.tree.get_children():
-                self.tree.delete(item)
-            
-            # Add new items
-            for trade in trade_data:
-                self.tree.insert("", "end", values=(
-                    trade["timestamp"],
-                    trade["action"].upper(),
-                    f"${trade['price']:,.2f}",
-                    trade["reason"]
-                ))
-                
+            new_trades = []
+            while True:
+                try:
+                    new_trades.extend(self.history_watcher.queue.get_nowait())
+                except queue.Empty:
+                    break
+
+            if self.history_watcher.report is not self.report_shown:
+                self.report_shown = self.history_watcher.report
+                self.show_analytics(*self.report_shown)
+
+            if new_trades:
+                follow = self.history_page == self.last_history_page()
+                self.trades.extend(new_trades)
+                if follow and self.history_page == self.last_history_page():
+                    self.append_history_rows()
+                elif follow:
+                    self.show_history_page(self.last_history_page())
+                else:
+                    self.update_history_label()
+
         except Exception as e:
-            print(f"Error updating trade history: {str(e)}")
-            
+            log.error("Error updating trade history", error=str(e))
+
         finally:
             # Schedule next update
             self.root.after(1000, self.update_trade_history)
 
+    def drain_events(self):
+        """Applies up to EVENT_BATCH queued bot events, then redraws the chart once if it changed"""
+        try:
+            for kind, ts, fields in self.events.drain(EVENT_BATCH):
+                if kind == TICK:
+                    self.add_price(fields["coin"], ts, fields["price"])
+                elif kind == FILL:
+                    fills = self.chart_fills.setdefault(fields["coin"], deque(maxlen=CHART_MARKERS))
+                    fills.append((ts, fields["action"], fields["price"]))
+                    self.chart_dirty = True
+                elif kind == SIGNAL:
+                    self.last_signal.set(f"{fields['coin']}: {fields['signal']}")
+                elif kind == POSITION:
+                    self.open_positions.set(max(0, self.open_positions.get() + (1 if fields["status"] == "open" else -1)))
+                elif kind == STATE:
+                    self.show_bot_state(fields)
+            if self.chart_dirty and self.tab_control.select() == str(self.chart_tab):
+                self.draw_chart()
+        except Exception as e:
+            log.error("Error applying bot events", error=str(e))
+        finally:
+            self.root.after(EVENT_DRAIN_INTERVAL, self.drain_events)
+
+    def show_bot_state(self, fields):
+        # A bot stopped from the UI may still report after a new one started
+        if self.bot is not None and fields.get("bot") != id(self.bot):
+            return
+        status = fields["status"]
+        if status == "starting":
+            self.open_positions.set(0)
+        self.bot_status.set(BOT_STATES.get(status) or f"Error: {fields.get('error')}")
+        running = status in ("starting", "running")
+        self.start_button.configure(text="Stop Bot" if running else "Start Bot",
+                                    style="danger.TButton" if running else "success.TButton")
+
+    def add_price(self, coin, ts, price):
+        series = self.price_series.get(coin)
+        if series is None:
+            series = self.price_series[coin] = PriceSeries()
+            self.chart_coin_combo.configure(values=sorted(self.price_series))
+            if not self.chart_coin.get():
+                self.chart_coin.set(coin)
+        series.append(ts, price)
+        self.chart_dirty = True
+
+    def draw_chart(self):
+        """
+        Redraws the selected coin as one line of at most one point per pixel
+        column (LTTB over the series' bounded buckets), so a redraw costs the
+        same after a million ticks as after a hundred.
+        """
+        self.chart_dirty = False
+        canvas = self.chart_canvas
+        canvas.delete("all")
+        coin = self.chart_coin.get()
+        series = self.price_series.get(coin)
+        width, height = canvas.winfo_width(), canvas.winfo_height()
+        if series is None or width <= 2 * CHART_PADDING or height <= 2 * CHART_PADDING:
+            return
+
+        plot_width, plot_height = width - 2 * CHART_PADDING, height - 2 * CHART_PADDING
+        times, prices = lttb(*series.points(), plot_width)
+        start, end = times[0], max(times[-1], times[0] + 1)
+        low, high = prices.min(), prices.max()
+        if high == low:
+            low, high = low * 0.999, high * 1.001
+
+        def x(ts):
+            return CHART_PADDING + (ts - start) / (end - start) * plot_width
+
+        def y(price):
+            return CHART_PADDING + (high - price) / (high - low) * plot_height
+
+        if len(times) > 1:
+            canvas.create_line(*np.column_stack((x(times), y(prices))).ravel().tolist(), fill=CHART_COLORS["line"], width=1.5)
+        for ts, action, price in self.chart_fills.get(coin, ()):
+            if start <= ts <= end:
+                cx, cy = x(ts), y(min(max(price, low), high))
+                canvas.create_oval(cx - 4, cy - 4, cx + 4, cy + 4, outline="", fill=CHART_COLORS.get(action, CHART_COLORS["text"]))
+        for price, anchor_y in ((high, CHART_PADDING), (low, CHART_PADDING + plot_height)):
+            canvas.create_text(CHART_PADDING - 5, anchor_y, text=f"{price:,.2f}", anchor="e", fill=CHART_COLORS["text"])
+
+        last_ts, last_price = series.last
+        self.chart_price_label.config(text=f"{coin}: ${last_price:,.2f} ({series.ticks:,} ticks)")
+
+    def show_analytics(self, summary, by_coin):
+        labels = self.analytics_labels
+        labels["realized_pnl"].config(text=f"${summary['realized_pnl']:,.2f}")
+        labels["trades"].config(text=str(summary["trades"]))
+        labels["win_rate"].config(text=f"{summary['win_rate']:.1%}")
+        labels["avg_win"].config(text=f"${summary['avg_win']:,.2f}")
+        labels["avg_loss"].config(text=f"${summary['avg_loss']:,.2f}")
+        profit_factor = summary["profit_factor"]
+        labels["profit_factor"].config(text="-" if profit_factor is None else f"{profit_factor:.2f}")
+        labels["max_drawdown"].config(text=f"${summary['max_drawdown']:,.2f} ({summary['max_drawdown_pct']:.1%})")
+        labels["exposure"].config(text=f"{summary['exposure']:.1%}")
+        labels["open_positions"].config(text=str(summary["open_positions"]))
+
+        self.coin_tree.delete(*self.coin_tree.get_children())
+        for coin, row in by_coin.iterrows():
+            self.coin_tree.insert("", "end", values=(
+                coin,
+                int(row["trades"]),
+                f"${row['pnl']:,.2f}",
+                f"{row['win_rate']:.1%}",
+                f"${row['avg_pnl']:,.2f}"
+            ))
+
+    def last_history_page(self):
+        return max(0, (len(self.trades) - 1) // HISTORY_PAGE_SIZE)
+
+    def show_history_page(self, page):
+        """Replaces the Treeview contents with one page of trades"""
+        self.history_page = min(max(0, page), self.last_history_page())
+        self.tree.delete(*self.tree.get_children())
+        self.history_rows_shown = 0
+        self.append_history_rows()
+
+    def append_history_rows(self):
+        """Inserts the current page's trades that aren't in the Treeview yet"""
+        start = self.history_page * HISTORY_PAGE_SIZE + self.history_rows_shown
+        end = (self.history_page + 1) * HISTORY_PAGE_SIZE
+        for trade in self.trades[start:end]:
+            self.tree.insert("", "end", values=(
+                trade["timestamp"],
+                trade["action"].upper(),
+                f"${trade['price']:,.2f}",
+                trade["reason"]
+            ))
+            self.history_rows_shown += 1
+        self.update_history_label()
+
+    def update_history_label(self):
+        self.history_page_label.config(
+            text=f"Page {self.history_page + 1} / {self.last_history_page() + 1} ({len(self.trades)} trades)"
+        )
+
 # Run the App
 if __name__ == "__main__":
+    configure_logging()
+    if METRICS_PORT:
+        serve_metrics(METRICS_PORT)
     root = Window(themename=CYBERPUNK_THEME)
     app = TradeBotApp(root)
     root.mainloop() 
\ No newline at end of file